@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from mock import patch
+from six.moves import BaseHTTPServer, socketserver
+
+from txclib import utils
+from txclib.exceptions import HttpNotFound
+from txclib.project import Project
+
+try:
+    import asyncio
+    from txclib import aio
+except (ImportError, SyntaxError):
+    aio = None
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve slow responses, keeping track of the concurrent requests."""
+
+    content = b'msgid "a"\nmsgstr "b"\n' * 100000
+
+    def track(self):
+        with self.server.lock:
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active,
+                                         self.server.active)
+        time.sleep(0.05)
+        with self.server.lock:
+            self.server.active -= 1
+
+    def respond(self, status, content):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self.track()
+        if self.path == '/missing':
+            self.respond(404, b'Not found')
+        elif self.path == '/throttled' and not self.server.throttled:
+            self.server.throttled = True
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path == '/file':
+            self.respond(200, self.content)
+        else:
+            self.respond(200, self.path.encode('utf-8'))
+
+    def do_PUT(self):
+        length = int(self.headers.get('Content-Length'))
+        self.server.uploads.append(
+            (self.headers.get('Content-Type'), self.rfile.read(length))
+        )
+        self.respond(200, b'{"translations_added": 1}')
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(aio is None, "aiohttp is not installed")
+class AsyncRequestsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingServer(('127.0.0.1', 0), Handler)
+        self.server.lock = threading.Lock()
+        self.server.active = 0
+        self.server.max_active = 0
+        self.server.uploads = []
+        self.server.throttled = False
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.host = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+        utils.REQUESTS = []
+
+    def queue(self, url, **kwargs):
+        utils.queue_request('GET', self.host, url, 'api', 'token', **kwargs)
+
+    def test_bounded_requests_on_a_single_thread(self):
+        results = []
+
+        def callback(data, charset):
+            results.append((data, threading.current_thread()))
+
+        paths = ['/%d' % i for i in range(12)]
+        for path in paths:
+            self.queue(path, callback=callback)
+        errors = utils.perform_parallel_requests(workers=4, use_async=True)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(data for data, _ in results), sorted(paths))
+        self.assertEqual(set(thread for _, thread in results),
+                         set([threading.current_thread()]))
+        self.assertLessEqual(self.server.max_active, 4)
+        self.assertGreater(self.server.max_active, 1)
+        self.assertEqual(utils.REQUESTS, [])
+
+    def test_throttled_requests_are_retried(self):
+        results = []
+        self.queue('/throttled',
+                   callback=lambda data, charset: results.append(data))
+        self.assertEqual(utils.perform_parallel_requests(use_async=True), [])
+        self.assertTrue(self.server.throttled)
+        self.assertEqual(results, ['/throttled'])
+
+    def test_throttled_requests_decrease_the_concurrency(self):
+        limiters = []
+
+        class Limiter(aio.AdaptiveConcurrency):
+            def __init__(self, *args, **kwargs):
+                super(Limiter, self).__init__(*args, **kwargs)
+                limiters.append(self)
+
+        for path in ('/throttled', '/1', '/2'):
+            self.queue(path)
+        with patch('txclib.aio.AdaptiveConcurrency', Limiter):
+            errors = utils.perform_parallel_requests(workers=4,
+                                                     use_async=True)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(limiters), 1)
+        self.assertLess(limiters[0].limit, 4)
+        self.assertEqual(limiters[0].in_flight, 0)
+
+    def test_paused_requests_wait_on_the_event_loop(self):
+        sent = []
+
+        async def request(limiter, name):
+            await limiter.acquire()
+            sent.append((name, limiter.in_flight))
+            await asyncio.sleep(0.01)
+            limiter.release(throttled=name == 'first', retry_after=0.1)
+
+        async def run():
+            limiter = aio.AdaptiveConcurrency(1)
+            await asyncio.gather(*[request(limiter, name)
+                                   for name in ('first', 'second', 'third')])
+            return limiter
+
+        loop = asyncio.new_event_loop()
+        try:
+            start = time.time()
+            limiter = loop.run_until_complete(run())
+        finally:
+            loop.close()
+        self.assertEqual(sorted(sent), [('first', 1), ('second', 1),
+                                        ('third', 1)])
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_streamed_download(self):
+        local_file = os.path.join(self.tmp_dir, 'el.po')
+        self.queue('/file', callback=Project._save_file,
+                   callback_args={'local_file': local_file}, stream=True)
+        self.queue('/missing', stream=True)
+        errors = utils.perform_parallel_requests(use_async=True)
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], HttpNotFound)
+        with open(local_file, 'rb') as f:
+            self.assertEqual(f.read(), Handler.content)
+
+    def test_multipart_upload(self):
+        path = os.path.join(self.tmp_dir, 'el.po')
+        with open(path, 'wb') as f:
+            f.write(Handler.content)
+        body = utils.MultipartFileBody({'language': 'el'}, 'uploaded_file',
+                                       path)
+        expected = body.read()
+        body.seek(0)
+        utils.queue_request('PUT', self.host, '/upload', 'api', 'token',
+                            body)
+        self.assertEqual(utils.perform_parallel_requests(use_async=True), [])
+
+        self.assertEqual(self.server.uploads, [
+            (body.headers['Content-Type'], expected)
+        ])
+        self.assertIsNone(body._file)
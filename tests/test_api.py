@@ -1,15 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import threading
+import time
 import unittest
 from mock import MagicMock, patch
 
-from txclib.api import Api
+from txclib.api import Api, _page_urls
 
 
 class ApiTestCase(unittest.TestCase):
 
     @patch('txclib.utils.get_api_domains')
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_resolve_api_call(self, requests_mock, domains_mock):
         token = 'blabla'
         domains_mock.return_value = {
@@ -35,7 +37,7 @@ class ApiTestCase(unittest.TestCase):
         )
 
     @patch('txclib.utils.get_api_domains')
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_pagination(self, requests_mock, domains_mock):
         token = 'blabla'
         domains_mock.return_value = {
@@ -72,3 +74,119 @@ class ApiTestCase(unittest.TestCase):
         api = Api(token='blabla')
         with self.assertRaises(Exception):
             api.get('invalid')
+
+
+class PaginationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('txclib.utils.get_api_domains')
+        patcher.start().return_value = {
+            'hostname': 'https://www.foo.bar',
+            'api_hostname': 'https://api.foo.bar'
+        }
+        self.addCleanup(patcher.stop)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def response(self, data, links=None, headers=None):
+        response = MagicMock()
+        response.json.return_value = data
+        response.links = links or {}
+        response.headers = headers or {}
+        return response
+
+    def serve(self, pages):
+        """Serve the responses of a dict of urls slowly."""
+        def get(url, auth):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.02)
+            with self.lock:
+                self.active -= 1
+            return pages[url]
+        return get
+
+    @patch('requests.Session.get')
+    def test_pages_are_fetched_concurrently(self, requests_mock):
+        url = 'https://api.foo.bar/organizations/'
+        last = {'url': url + '?page=5'}
+        pages = {url: self.response(
+            [0], links={'next': {'url': url + '?page=2'}, 'last': last}
+        )}
+        for page in range(2, 6):
+            pages[url + '?page=%d' % page] = self.response([page - 1])
+        requests_mock.side_effect = self.serve(pages)
+
+        self.assertEqual(Api(token='t').get('organizations'), [0, 1, 2, 3, 4])
+        self.assertEqual(requests_mock.call_count, 5)
+        self.assertGreater(self.max_active, 1)
+
+    @patch('requests.Session.get')
+    def test_next_page_is_prefetched(self, requests_mock):
+        url = 'https://api.foo.bar/organizations/'
+        pages = {
+            url: self.response([1, 2], links={'next': {'url': url + '?p'}}),
+            url + '?p': self.response([3]),
+        }
+        requests_mock.side_effect = self.serve(pages)
+
+        items = Api(token='t').iterate('organizations')
+        self.assertEqual(next(items), 1)
+        # The second page is requested before the first one is consumed
+        time.sleep(0.05)
+        self.assertEqual(requests_mock.call_count, 2)
+        self.assertEqual(list(items), [2, 3])
+
+    @patch('requests.Session.get')
+    def test_pages_are_yielded_as_they_arrive(self, requests_mock):
+        url = 'https://api.foo.bar/organizations/'
+        last = url + '?page=5'
+        links = {'next': {'url': url + '?page=2'}, 'last': {'url': last}}
+        pages = {url: self.response([0], links=links)}
+        for page in range(2, 6):
+            pages[url + '?page=%d' % page] = self.response([page - 1])
+        release = threading.Event()
+        served = []
+
+        def get(url, auth):
+            if url == last:
+                release.wait(5)
+            served.append(url)
+            return pages[url]
+        requests_mock.side_effect = get
+
+        items = Api(token='t').iterate('organizations')
+        try:
+            self.assertEqual([next(items) for _ in range(4)], [0, 1, 2, 3])
+            self.assertNotIn(last, served)
+        finally:
+            release.set()
+        self.assertEqual(list(items), [4])
+
+    def test_page_urls(self):
+        url = 'https://api.foo.bar/projects/?limit=10&offset=%d'
+        self.assertEqual(
+            _page_urls(self.response([], links={'next': {'url': url % 10}},
+                                     headers={'X-Total-Count': '25'})),
+            [url % 10, url % 20]
+        )
+        self.assertEqual(
+            _page_urls(self.response([], links={
+                'next': {'url': url % 10}, 'last': {'url': url % 30}
+            })),
+            [url % 10, url % 20, url % 30]
+        )
+        # Links that cannot be enumerated are followed one by one
+        self.assertIsNone(_page_urls(self.response([], links={
+            'next': {'url': url % 10}
+        })))
+        self.assertIsNone(_page_urls(self.response([], links={
+            'next': {'url': url % 10},
+            'last': {'url': url.replace('limit=10', 'limit=5') % 30}
+        })))
+        self.assertIsNone(_page_urls(self.response([], links={
+            'next': {'url': 'https://api.foo.bar/projects/?cursor=abc'}
+        })))
+        self.assertIsNone(_page_urls(self.response([])))
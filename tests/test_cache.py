@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from txclib.cache import ExpiringCache, JsonCache, SyncState, file_digest
+
+
+class TestJsonCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, '.tx', 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_save_and_load(self):
+        cache = JsonCache(self.path)
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', {'a': 1})
+        cache.save()
+        self.assertEqual(JsonCache(self.path).get('key'), {'a': 1})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['cache'])
+
+        cache.delete('key')
+        cache.save()
+        self.assertIsNone(JsonCache(self.path).get('key'))
+
+    def test_unchanged_cache_is_not_written(self):
+        JsonCache(self.path).save()
+        self.assertFalse(os.path.exists(self.path))
+        JsonCache(None).set('key', 1)
+        JsonCache(None).save()
+
+    def test_corrupted_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{"key": ')
+        cache = JsonCache(self.path)
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', 'value')
+        cache.save()
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'key': 'value'})
+
+
+class TestExpiringCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @patch('txclib.cache.time.time')
+    def test_entries_expire(self, time_mock):
+        time_mock.return_value = 1000
+        cache = ExpiringCache(self.path, ttl=60)
+        cache.set('old', 1)
+        time_mock.return_value = 1030
+        cache.set('new', 2)
+        cache.save()
+
+        time_mock.return_value = 1070
+        cache = ExpiringCache(self.path, ttl=60)
+        self.assertIsNone(cache.get('old'))
+        self.assertEqual(cache.get('new'), 2)
+        # Expired entries are not written back
+        cache.set('newer', 3)
+        cache.save()
+        with open(self.path) as f:
+            self.assertEqual(sorted(json.load(f)), ['new', 'newer'])
+
+        time_mock.return_value = 1100
+        self.assertEqual(cache.get('missing', 'default'), 'default')
+        self.assertEqual(cache.get('new', 'default'), 'default')
+
+
+class TestSyncState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file = os.path.join(self.tmpdir, 'el.po')
+        with open(self.file, 'wb') as f:
+            f.write(b'msgid "a"\nmsgstr "b"\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_is_unchanged(self):
+        state = SyncState(os.path.join(self.tmpdir, 'state'))
+        self.assertFalse(state.is_unchanged('proj.res', 'el', self.file))
+
+        state.record('proj.res', 'el', self.file, '2011-11-01 15:00:00')
+        state.save()
+        state = SyncState(os.path.join(self.tmpdir, 'state'))
+        self.assertEqual(state.get_entry('proj.res', 'el'), {
+            'sha1': file_digest(self.file),
+            'size': os.path.getsize(self.file),
+            'last_update': '2011-11-01 15:00:00',
+        })
+        self.assertTrue(state.is_unchanged('proj.res', 'el', self.file))
+        self.assertFalse(state.is_unchanged('proj.res', 'fr', self.file))
+        self.assertFalse(state.is_unchanged('proj.other', 'el', self.file))
+
+        # Same size, different contents
+        with open(self.file, 'wb') as f:
+            f.write(b'msgid "a"\nmsgstr "c"\n')
+        self.assertFalse(state.is_unchanged('proj.res', 'el', self.file))
+
+        os.remove(self.file)
+        self.assertFalse(state.is_unchanged('proj.res', 'el', self.file))
@@ -1,18 +1,24 @@
 import fileinput
+import inspect
 import os
 import shutil
 import unittest
 import sys
+import tempfile
+import threading
+import time
 try:
     from StringIO import StringIO
 except ImportError:
     from io import StringIO
-from mock import patch, MagicMock, call
+from mock import ANY, patch, MagicMock, call
 from six import assertRaisesRegex
 from txclib.commands import _set_source_file, _set_translation, cmd_pull, \
     cmd_init, cmd_config, cmd_status, cmd_help, UnInitializedError
 from txclib.cmdline import main
 from txclib.parsers import MAPPING, MAPPINGREMOTE, MAPPINGBULK
+from txclib import utils
+from txclib.exceptions import UnknownCommandError
 
 
 class TestCommands(unittest.TestCase):
@@ -67,6 +73,42 @@ class TestHelpCommand(unittest.TestCase):
             pull_mock.assert_called_once_with(['--help'], None)
 
 
+class TestConfigWizard(unittest.TestCase):
+
+    @patch('txclib.commands.wizard')
+    def test_refresh_option(self, wizard_mock):
+        wizard_mock.Wizard.return_value.run.side_effect = SystemExit
+        for argv, refresh in (([], False), (['--refresh'], True)):
+            with self.assertRaises(SystemExit):
+                cmd_config(argv, 'path')
+            wizard_mock.Wizard.assert_called_with('path', refresh=refresh)
+
+    @patch('txclib.commands.wizard')
+    def test_refresh_needs_the_wizard(self, wizard_mock):
+        with patch('sys.stderr', new_callable=StringIO) as stderr:
+            with self.assertRaises(SystemExit):
+                cmd_config(['--refresh', '-r', 'proj.res', 'file.po'],
+                           'path')
+        self.assertIn('--refresh can only be used', stderr.getvalue())
+        wizard_mock.Wizard.assert_not_called()
+
+
+class TestCommandRegistry(unittest.TestCase):
+
+    def test_registry_lists_all_commands(self):
+        from txclib import commands
+        functions = dict(
+            (name[len('cmd_'):], fn) for name, fn in
+            inspect.getmembers(commands, inspect.isfunction)
+            if name.startswith('cmd_')
+        )
+        self.assertEqual(utils.discover_commands(), functions)
+
+    def test_unknown_command(self):
+        with self.assertRaises(UnknownCommandError):
+            utils.exec_command('unknown', [], None)
+
+
 class TestInitCommand(unittest.TestCase):
 
     def setUp(self):
@@ -164,7 +206,7 @@ class TestPullCommand(unittest.TestCase):
             force=False, languages=[], minimum_perc=None, mode=None,
             overwrite=True, pseudo=False, resources=[], skip=False,
             xliff=False, parallel=False, no_interactive=False,
-            use_git_timestamps=False
+            use_git_timestamps=False, workers=None, use_async=False
         )
         pr_instance.pull.assert_has_calls([pull_call])
 
@@ -184,7 +226,7 @@ class TestPullCommand(unittest.TestCase):
             force=False, languages=[], minimum_perc=None, mode=None,
             overwrite=True, pseudo=False, resources=[], skip=False,
             xliff=False, parallel=False, no_interactive=False,
-            use_git_timestamps=False
+            use_git_timestamps=False, workers=None, use_async=False
         )
         pr_instance.pull.assert_has_calls([pull_call])
 
@@ -199,7 +241,7 @@ class TestPullCommand(unittest.TestCase):
             skip=False, no_interactive=True, resources=[], pseudo=False,
             languages=[], fetchsource=False, mode=None, branch=None,
             xliff=False, parallel=False, overwrite=True,
-            use_git_timestamps=False
+            use_git_timestamps=False, workers=None, use_async=False
         )
         self.assertEqual(pr_instance.pull.call_count, 1)
         pr_instance.pull.assert_has_calls([pull_call])
@@ -215,7 +257,7 @@ class TestPullCommand(unittest.TestCase):
             skip=False, no_interactive=False, resources=[], pseudo=False,
             languages=[], fetchsource=False, mode=None, branch=None,
             xliff=False, parallel=False, overwrite=True,
-            use_git_timestamps=True
+            use_git_timestamps=True, workers=None, use_async=False
         )
         self.assertEqual(pr_instance.pull.call_count, 1)
         pr_instance.pull.assert_has_calls([pull_call])
@@ -398,6 +440,46 @@ class TestConfigCommand(unittest.TestCase):
         with open(self.config_file) as config:
             self.assertEqual(config.read(), expected)
 
+    @patch('txclib.project.Project.save')
+    @patch('txclib.utils.get_details')
+    @patch('txclib.project.Project._extension_for')
+    def test_auto_remote_fetches_resources_concurrently(
+            self, extension_mock, get_details_mock, save_mock):
+        open(self.config_file, "w").write(
+            '[main]\nhost = https://www.transifex.com\n'
+        )
+        extension_mock.return_value = ".txt"
+        lock = threading.Lock()
+        active = {'now': 0, 'max': 0}
+
+        def get_details(api_call, username, password, **kwargs):
+            if api_call == 'project_details':
+                return {'resources': [{'slug': 'res%d' % i}
+                                      for i in range(20)]}
+            with lock:
+                active['now'] += 1
+                active['max'] = max(active['max'], active['now'])
+            time.sleep(0.02)
+            with lock:
+                active['now'] -= 1
+            return {'source_language_code': 'fr',
+                    'i18n_type': kwargs['resource'].upper()}
+        get_details_mock.side_effect = get_details
+
+        args = [MAPPINGREMOTE, "https://www.transifex.com/test-org/proj/"]
+        with patch('txclib.project.Project.set_remote_resource') as set_mock:
+            cmd_config(args, self.path_to_tx)
+        self.assertGreater(active['max'], 1)
+        # The resources are configured in order with their own details
+        self.assertEqual(
+            [c[1]['resource'] for c in set_mock.call_args_list],
+            ['proj.res%d' % i for i in range(20)]
+        )
+        for c in set_mock.call_args_list:
+            self.assertEqual(c[1]['i18n_type'],
+                             c[1]['resource'].split('.')[1].upper())
+        save_mock.assert_called_once_with()
+
     def test_bulk_missing_options(self):
         with self.assertRaises(SystemExit):
             args = [MAPPINGBULK]
@@ -474,6 +556,67 @@ class TestConfigCommand(unittest.TestCase):
         self.assertFalse("test_expressions/es/test.txt" in output)
 
 
+class TestBulkMapping(unittest.TestCase):
+    """Benchmark the mapping of many resources on a synthetic tree."""
+
+    DIRECTORIES = 20
+    FILES = 25
+
+    def setUp(self):
+        self.curr_dir = os.getcwd()
+        self.path_to_tx = os.path.realpath(tempfile.mkdtemp())
+        os.mkdir(os.path.join(self.path_to_tx, '.tx'))
+        self.config_file = os.path.join(self.path_to_tx, '.tx', 'config')
+        with open(self.config_file, 'w') as f:
+            f.write("[main]\nhost = https://foo.var\n")
+        for lang in ('en', 'el', 'fr'):
+            for i in range(self.DIRECTORIES):
+                directory = os.path.join(self.path_to_tx, 'locale', lang,
+                                         'dir%d' % i)
+                os.makedirs(directory)
+                for j in range(self.FILES):
+                    path = os.path.join(directory, 'file%d.txt' % j)
+                    with open(path, 'w') as f:
+                        f.write(lang)
+        os.chdir(self.path_to_tx)
+
+    def tearDown(self):
+        os.chdir(self.curr_dir)
+        shutil.rmtree(self.path_to_tx)
+
+    def test_bulk_mapping_writes_the_config_once(self):
+        args = [MAPPINGBULK, "-p", "proj", "--source-file-dir", "locale/en",
+                "--source-language", "en", "-t", "TXT",
+                "--file-extension", ".txt", "--minimum-perc", "50",
+                "--mode", "reviewed", "--execute", "--expression",
+                "locale/<lang>/{filepath}/{filename}{extension}"]
+        with patch('txclib.utils.save_tx_config',
+                   wraps=utils.save_tx_config) as save_mock, \
+                patch('txclib.utils.read_config_file',
+                      wraps=utils.read_config_file) as read_mock, \
+                patch('txclib.utils._walk_files',
+                      wraps=utils._walk_files) as walk_mock:
+            cmd_config(args, self.path_to_tx)
+
+        resources = self.DIRECTORIES * self.FILES
+        save_mock.assert_called_once_with(self.config_file, ANY)
+        self.assertEqual(read_mock.call_count, 1)
+        self.assertEqual(walk_mock.call_count, 1)
+
+        config = utils.read_config_file(self.config_file)
+        self.assertEqual(len(config.sections()), resources + 1)
+        self.assertEqual(dict(config.items('proj.locale_en_dir3_file7')), {
+            'file_filter': 'locale/<lang>/dir3/file7.txt',
+            'source_file': 'locale/en/dir3/file7.txt',
+            'source_lang': 'en',
+            'minimum_perc': '50',
+            'mode': 'reviewed',
+            'type': 'TXT',
+        })
+        self.assertEqual(os.listdir(os.path.dirname(self.config_file)),
+                         ['config'])
+
+
 class TestMainCommand(unittest.TestCase):
     def test_call_tx_with_no_command(self):
         with self.assertRaises(SystemExit):
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+import unittest
+
+from txclib.lazy import LazyModule, lazy_import
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that commands which do not need them should not import
+HEAVY_MODULES = ['git', 'requests', 'slugify', 'pkg_resources', 'txclib.api',
+                 'txclib.wizard', 'urllib3.contrib.pyopenssl']
+
+
+def run_python(code, *options):
+    """Run python code in a new interpreter and return its stderr output."""
+    process = subprocess.Popen(
+        [sys.executable] + list(options) + ['-c', code], cwd=ROOT_DIR,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise AssertionError(stderr.decode('utf-8'))
+    return stdout.decode('utf-8'), stderr.decode('utf-8')
+
+
+class LazyImportTestCase(unittest.TestCase):
+
+    def test_module_is_imported_on_first_use(self):
+        code = (
+            "import sys\n"
+            "from txclib.lazy import lazy_import\n"
+            "colorsys = lazy_import('colorsys')\n"
+            "assert 'colorsys' not in sys.modules\n"
+            "assert colorsys.rgb_to_hsv(1, 1, 1) == (0, 0, 1)\n"
+            "assert 'colorsys' in sys.modules\n"
+        )
+        run_python(code)
+
+    def test_attributes_are_set_on_the_module(self):
+        module = LazyModule('colorsys')
+        module.TX_LAZY_VALUE = 0.5
+        try:
+            self.assertEqual(sys.modules['colorsys'].TX_LAZY_VALUE, 0.5)
+        finally:
+            del module.TX_LAZY_VALUE
+        self.assertFalse(hasattr(sys.modules['colorsys'], 'TX_LAZY_VALUE'))
+
+    def test_unicode_names(self):
+        # Modules with unicode_literals pass unicode names on Python 2
+        module = LazyModule(u'colorsys')
+        self.assertIsInstance(module.__name__, str)
+        self.assertEqual(module.rgb_to_hsv(1, 1, 1), (0, 0, 1))
+
+    def test_imported_modules_are_returned(self):
+        self.assertIs(lazy_import('os'), os)
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "-X importtime needs Python 3.7")
+class StartupTestCase(unittest.TestCase):
+    """Check the import-time profile of the tx entry point."""
+
+    def imported_modules(self, code):
+        _, profile = run_python(code, '-X', 'importtime')
+        return set(line.rsplit('|', 1)[-1].strip()
+                   for line in profile.splitlines()
+                   if line.startswith('import time:'))
+
+    def test_startup_does_not_import_heavy_modules(self):
+        imported = self.imported_modules(
+            "import txclib.cmdline, txclib.commands"
+        )
+        self.assertIn('txclib.utils', imported)
+        self.assertEqual(imported.intersection(HEAVY_MODULES), set())
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import os
+import shutil
+import tempfile
 import unittest
 import itertools
 try:
@@ -12,14 +14,20 @@ try:
 except ImportError:
     import ConfigParser as configparser
 
+import threading
 from functools import wraps
 from mock import Mock, patch, mock_open
 from collections import namedtuple
 from os.path import dirname
 from sys import modules, version_info
+from six.moves import BaseHTTPServer
 
-from txclib.exceptions import AuthenticationError, TXConnectionError
+from txclib.exceptions import (
+    AuthenticationError, MalformedConfigFile, TransifexrcConfigFileError,
+    TXConnectionError
+)
 from txclib.project import (Project, DEFAULT_PULL_URL)
+from txclib.cache import ExpiringCache, clear_formats, get_formats
 
 from txclib.config import Flipdict
 from txclib import utils
@@ -203,6 +211,33 @@ class TestProject(unittest.TestCase):
         self.assertEqual(m_input.call_count, 1)
         p.save.assert_called()
 
+    def test_host_credentials_are_cached(self):
+        p = Project(init=False)
+        p.txrc = Mock()
+        p.txrc.get.return_value = 'https://www.transifex.com'
+        p.url_info = {'host': 'https://www.transifex.com',
+                      'project': 'proj', 'resource': 'res'}
+        with patch.object(p, 'getset_host_credentials') as getset_mock, \
+                patch('txclib.utils.make_request') as request_mock:
+            getset_mock.return_value = ('api', 'token')
+            p.do_url_request('resource_stats')
+            p.do_url_request('resource_details')
+            getset_mock.assert_called_once_with(
+                'https://www.transifex.com', no_interactive=False
+            )
+            self.assertEqual(p.txrc.get.call_count, 1)
+            self.assertEqual(request_mock.call_count, 2)
+
+    def test_missing_host_raises_error(self):
+        p = Project(init=False)
+        p.txrc = Mock()
+        p.txrc.get.side_effect = configparser.NoSectionError('host')
+        with patch.object(p, 'getset_host_credentials') as getset_mock:
+            getset_mock.return_value = ('api', 'token')
+            with self.assertRaises(TransifexrcConfigFileError):
+                p._get_host_credentials('https://www.transifex.com')
+            self.assertEqual(p._host_credentials, {})
+
     def test_extract_fields(self):
         """Test the functions that extract a field from a stats object."""
         stats = {
@@ -258,130 +293,103 @@ class TestProjectMinimumPercent(unittest.TestCase):
         self.p = Project(init=False)
         self.p.minimum_perc = None
         self.p.resource = "resource"
+        self.p.config = configparser.RawConfigParser()
+        self.p.config.add_section('main')
+        self.p.config.add_section('resource')
+
+    def set_minimum_perc(self, main, resource):
+        """Set the minimum_perc option of the main and resource sections."""
+        for section, value in (('main', main), ('resource', resource)):
+            if value is not None:
+                self.p.config.set(section, 'minimum_perc', str(value))
 
     def test_cmd_option(self):
         """Test command-line option."""
         self.p.minimum_perc = 20
-        results = itertools.cycle([80, 90])
-
-        def side_effect(*args):
-            return next(results)
-
-        with patch.object(self.p, "get_resource_option") as mock:
-            mock.side_effect = side_effect
-            self.assertFalse(
-                self.p._satisfies_min_translated({'completed': '12%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '20%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '30%'})
-            )
+        self.set_minimum_perc(80, 90)
+        self.assertFalse(
+            self.p._satisfies_min_translated({'completed': '12%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '20%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '30%'})
+        )
 
     def test_global_only(self):
         """Test only global option."""
-        results = itertools.cycle([80, None])
-
-        def side_effect(*args):
-            return next(results)
-
-        with patch.object(self.p, "get_resource_option") as mock:
-            mock.side_effect = side_effect
-            self.assertFalse(
-                self.p._satisfies_min_translated({'completed': '70%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '80%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '90%'})
-            )
+        self.set_minimum_perc(80, None)
+        self.assertFalse(
+            self.p._satisfies_min_translated({'completed': '70%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '80%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '90%'})
+        )
 
     def test_local_lower_than_global(self):
         """Test the case where the local option is lower than the global."""
-        results = itertools.cycle([80, 70])
-
-        def side_effect(*args):
-            return next(results)
-
-        with patch.object(self.p, "get_resource_option") as mock:
-            mock.side_effect = side_effect
-            self.assertFalse(
-                self.p._satisfies_min_translated({'completed': '60%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '70%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '80%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '90%'})
-            )
+        self.set_minimum_perc(80, 70)
+        self.assertFalse(
+            self.p._satisfies_min_translated({'completed': '60%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '70%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '80%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '90%'})
+        )
 
     def test_local_higher_than_global(self):
         """Test the case where the local option is lower than the global."""
-        results = itertools.cycle([60, 70])
-
-        def side_effect(*args):
-            return next(results)
-
-        with patch.object(self.p, "get_resource_option") as mock:
-            mock.side_effect = side_effect
-            self.assertFalse(
-                self.p._satisfies_min_translated({'completed': '60%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '70%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '80%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '90%'})
-            )
+        self.set_minimum_perc(60, 70)
+        self.assertFalse(
+            self.p._satisfies_min_translated({'completed': '60%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '70%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '80%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '90%'})
+        )
 
     def test_local_only(self):
         """Test the case where the local option is lower than the global."""
-        results = itertools.cycle([None, 70])
-
-        def side_effect(*args):
-            return next(results)
-
-        with patch.object(self.p, "get_resource_option") as mock:
-            mock.side_effect = side_effect
-            self.assertFalse(
-                self.p._satisfies_min_translated({'completed': '60%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '70%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '80%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '90%'})
-            )
+        self.set_minimum_perc(None, 70)
+        self.assertFalse(
+            self.p._satisfies_min_translated({'completed': '60%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '70%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '80%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '90%'})
+        )
 
     def test_no_option(self):
         """"Test the case there is nothing defined."""
-        results = itertools.cycle([None, None])
-
-        def side_effect(*args):
-            return next(results)
-
-        with patch.object(self.p, "get_resource_option") as mock:
-            mock.side_effect = side_effect
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '0%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '10%'})
-            )
-            self.assertTrue(
-                self.p._satisfies_min_translated({'completed': '90%'})
-            )
+        self.set_minimum_perc(None, None)
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '0%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '10%'})
+        )
+        self.assertTrue(
+            self.p._satisfies_min_translated({'completed': '90%'})
+        )
 
 
 class TestProjectFilters(unittest.TestCase):
@@ -394,6 +402,8 @@ class TestProjectFilters(unittest.TestCase):
         self.p = Project(init=False)
         self.p.minimum_perc = None
         self.p.resource = "resource"
+        self.p.config = configparser.RawConfigParser()
+        self.p.config.add_section('resource')
         self.stats = {
             'en': {
                 'completed': '100%', 'last_update': '2011-11-01 15:00:00',
@@ -544,6 +554,8 @@ class TestProjectPull(unittest.TestCase):
         self.p = Project(init=False)
         self.p.minimum_perc = None
         self.p.resource = "resource"
+        self.p.config = configparser.RawConfigParser()
+        self.p.config.add_section('resource')
         self.p.host = 'foo'
         self.p.project_slug = 'foo'
         self.p.resource_slug = 'foo'
@@ -684,46 +696,45 @@ class TestProjectPull(unittest.TestCase):
 
     def test_in_combination_with_force_option(self):
         """Test the minimum-perc option along with -f."""
-        with patch.object(self.p, 'get_resource_option') as mock:
-            mock.return_value = 70
-
-            res = self.p._should_download('de', self.stats, None, False)
-            self.assertEqual(res, False)
-            res = self.p._should_download('el', self.stats, None, False)
-            self.assertEqual(res, False)
-            res = self.p._should_download('el', self.stats, None, True)
-            self.assertEqual(res, False)
-            res = self.p._should_download('en', self.stats, None, False)
+        self.p.config.set('resource', 'minimum_perc', '70')
+
+        res = self.p._should_download('de', self.stats, None, False)
+        self.assertEqual(res, False)
+        res = self.p._should_download('el', self.stats, None, False)
+        self.assertEqual(res, False)
+        res = self.p._should_download('el', self.stats, None, True)
+        self.assertEqual(res, False)
+        res = self.p._should_download('en', self.stats, None, False)
+        self.assertEqual(res, True)
+        res = self.p._should_download('en', self.stats, None, True)
+        self.assertEqual(res, True)
+
+        with patch.object(self.p, '_remote_is_newer'):
+            res = self.p._should_download('pt', self.stats, None, False)
             self.assertEqual(res, True)
-            res = self.p._should_download('en', self.stats, None, True)
+            res = self.p._should_download('pt', self.stats, None, True)
             self.assertEqual(res, True)
 
-            with patch.object(self.p, '_remote_is_newer'):
-                res = self.p._should_download('pt', self.stats, None, False)
-                self.assertEqual(res, True)
-                res = self.p._should_download('pt', self.stats, None, True)
-                self.assertEqual(res, True)
-
-            with patch.object(utils, 'get_git_file_timestamp') as ts_mock:
-                # Note that the test needs an existing file path
-                # The current test (__file__) is the only file
-                # we're sure will exist and won't change
-
-                # Old timestamp (1990)
-                ts_mock.return_value = 640124371
-                res = self.p._should_download(
-                    'pt', self.stats, os.path.abspath(__file__), False,
-                    use_git_timestamps=True
-                )
-                self.assertEqual(res, True)
+        with patch.object(utils, 'get_git_file_timestamp') as ts_mock:
+            # Note that the test needs an existing file path
+            # The current test (__file__) is the only file
+            # we're sure will exist and won't change
 
-                # "Recent" timestamp (in the future - 2100)
-                ts_mock.return_value = 4111417171
-                res = self.p._should_download(
-                    'pt', self.stats, os.path.abspath(__file__), False,
-                    use_git_timestamps=True
-                )
-                self.assertEqual(res, False)
+            # Old timestamp (1990)
+            ts_mock.return_value = 640124371
+            res = self.p._should_download(
+                'pt', self.stats, os.path.abspath(__file__), False,
+                use_git_timestamps=True
+            )
+            self.assertEqual(res, True)
+
+            # "Recent" timestamp (in the future - 2100)
+            ts_mock.return_value = 4111417171
+            res = self.p._should_download(
+                'pt', self.stats, os.path.abspath(__file__), False,
+                use_git_timestamps=True
+            )
+            self.assertEqual(res, False)
 
     def test_get_url_by_pull_mode(self):
         self.assertEqual(
@@ -771,6 +782,8 @@ class TestProjectPull(unittest.TestCase):
                 # Mock configuration files
                 p = Project(init=False)
                 p._init(path_to_tx=app_dir + "/../templates")
+                # Keep the cached resource details in memory
+                p._resource_details = ExpiringCache(None, 60)
 
                 kwargs['mock_project'] = p
                 kwargs['mocks'] = {
@@ -788,6 +801,8 @@ class TestProjectPull(unittest.TestCase):
     @patch("txclib.project.logger.error")
     def test_pull_raises_authentication_exception(self, mock_logger, **kwargs):
         project = kwargs['mock_project']
+        # Without a configured type, the resource details are fetched
+        project.config.remove_option('example.enpo', 'type')
         with self.assertRaises(AuthenticationError):
             project.pull()
             mock_logger.assert_called_once_with(
@@ -851,6 +866,7 @@ class TestProjectPull(unittest.TestCase):
                                               **kwargs):
         """Test that all connection errors are properly handled."""
         project = kwargs["mock_project"]
+        project.config.remove_option('example.enpo', 'type')
         response = 502
         msg = "Failed with code %d" % response
         mock_request.side_effect = TXConnectionError(msg, code=response)
@@ -892,25 +908,707 @@ class TestProjectPull(unittest.TestCase):
             self.assertEqual(mock_queue.call_count, 1)
 
 
+class TestParallelRequests(unittest.TestCase):
+    """Test the handling of the queued requests."""
+
+    def setUp(self):
+        self.p = Project(init=False)
+
+    def test_get_workers(self):
+        with patch.object(self.p, 'get_resource_option') as option_mock:
+            option_mock.return_value = None
+            self.assertEqual(self.p._get_workers(), utils.DEFAULT_WORKERS)
+            self.assertEqual(self.p._get_workers(4), 4)
+            option_mock.return_value = '25'
+            self.assertEqual(self.p._get_workers(), 25)
+            option_mock.return_value = 'many'
+            with self.assertRaises(MalformedConfigFile):
+                self.p._get_workers()
+            with self.assertRaises(MalformedConfigFile):
+                self.p._get_workers(0)
+
+    @patch('txclib.project.perform_parallel_requests')
+    def test_failures_are_propagated(self, requests_mock):
+        error = TXConnectionError("Failed", code=502)
+        requests_mock.return_value = [error]
+        with self.assertRaises(TXConnectionError):
+            self.p._perform_queued_requests(workers=3)
+        requests_mock.assert_called_once_with(workers=3, use_async=False)
+        # With --skip the errors are only logged
+        self.p._perform_queued_requests(skip=True, workers=3)
+
+
+class TestPrefetchMetadata(unittest.TestCase):
+    """Test fetching the metadata of many resources at once."""
+
+    def setUp(self):
+        self.p = Project(init=False)
+        self.p.get_resource_host = Mock(return_value='https://fake.com')
+        self.p._get_host_credentials = Mock()
+        self.p._get_workers = Mock(return_value=4)
+
+    def test_prefetch(self):
+        error = AuthenticationError('Boom!')
+
+        def stats(no_interactive, url_info):
+            if url_info['resource'] == 'branch--res2':
+                raise error
+            return {'en': {}}
+
+        with patch.object(self.p, '_get_stats_for_resource') as stats_mock, \
+                patch.object(self.p, 'do_url_request') as request_mock:
+            stats_mock.side_effect = stats
+            request_mock.return_value = ('{"i18n_type": "PO"}', 'utf-8')
+            prefetched = self.p._prefetch_resource_metadata(
+                ['proj.res1', 'proj.res2'], branch='branch'
+            )
+        self.assertEqual(prefetched, {
+            'proj.res1': {'stats': ({'en': {}}, None),
+                          'details': (('{"i18n_type": "PO"}', 'utf-8'),
+                                      None)},
+            'proj.res2': {'stats': (None, error),
+                          'details': (('{"i18n_type": "PO"}', 'utf-8'),
+                                      None)},
+        })
+        request_mock.assert_any_call(
+            'resource_details', no_interactive=False,
+            url_info={'host': 'https://fake.com', 'project': 'proj',
+                      'resource': 'branch--res1'}
+        )
+        self.assertEqual(self.p._get_host_credentials.call_count, 2)
+
+        fetch = Mock()
+        self.assertEqual(
+            self.p._get_metadata(prefetched, 'proj.res1', 'stats', fetch),
+            {'en': {}}
+        )
+        with self.assertRaises(AuthenticationError):
+            self.p._get_metadata(prefetched, 'proj.res2', 'stats', fetch)
+        fetch.assert_not_called()
+        self.p._get_metadata(prefetched, 'proj.res3', 'stats', fetch)
+        fetch.assert_called_once_with()
+
+    def test_prefetch_without_details(self):
+        with patch.object(self.p, '_get_stats_for_resource') as stats_mock, \
+                patch.object(self.p, 'do_url_request') as request_mock:
+            stats_mock.return_value = {}
+            prefetched = self.p._prefetch_resource_metadata(
+                ['proj.res1'], details=False
+            )
+        self.assertEqual(prefetched, {'proj.res1': {'stats': ({}, None)}})
+        request_mock.assert_not_called()
+
+    def test_prefetch_project_details_once_per_project(self):
+        with patch.object(self.p, '_get_stats_for_resource') as stats_mock, \
+                patch.object(self.p, 'do_url_request') as request_mock:
+            stats_mock.return_value = {}
+            request_mock.return_value = ('{"teams": []}', 'utf-8')
+            prefetched = self.p._prefetch_resource_metadata(
+                ['proj.res1', 'proj.res2', 'other.res1'], details=False,
+                project_details=True
+            )
+        self.assertEqual(request_mock.call_count, 2)
+        for resource in ('proj.res1', 'proj.res2', 'other.res1'):
+            self.assertEqual(prefetched[resource]['project_details'],
+                             (('{"teams": []}', 'utf-8'), None))
+
+
+class TestResourceSettings(unittest.TestCase):
+    """Test reading the settings of resources."""
+
+    def setUp(self):
+        self.p = Project(init=False)
+        self.p.config = configparser.RawConfigParser()
+        self.p.config.add_section('main')
+        self.p.config.set('main', 'lang_map', 'pt_PT: pt, de_DE: de')
+        self.p.config.set('main', 'minimum_perc', '30')
+        self.p.config.set('main', 'mode', 'reviewed')
+        self.p.config.add_section('proj.res')
+        self.p.config.set('proj.res', 'source_lang', 'en')
+        self.p.config.set('proj.res', 'file_filter', 'locale/<lang>.po')
+        self.p.config.set('proj.res', 'lang_map', 'fr_FR: fr')
+        self.p.config.set('proj.res', 'type', 'PO')
+        self.p.config.set('proj.res', 'trans.el', 'other/el.po')
+        self.p.config_file = 'config'
+        self.p.txrc_file = 'transifexrc'
+        self.p.txrc = None
+
+    def test_settings(self):
+        settings = self.p.get_resource_settings('proj.res')
+        self.assertEqual(settings.source_lang, 'en')
+        self.assertIsNone(settings.source_file)
+        self.assertEqual(settings.file_filter, 'locale/<lang>.po')
+        self.assertEqual(settings.lang_map,
+                         {'pt_PT': 'pt', 'de_DE': 'de', 'fr_FR': 'fr'})
+        self.assertEqual(settings.lang_map.flip['fr'], 'fr_FR')
+        self.assertEqual(settings.trans,
+                         (('el', os.path.join('other', 'el.po')),))
+        self.assertEqual(settings.minimum_perc, 30)
+        self.assertEqual(settings.mode, 'reviewed')
+        self.assertEqual(settings.type, 'PO')
+        with self.assertRaises(AttributeError):
+            settings.type = 'QT'
+
+    def test_malformed_options(self):
+        self.p.config.set('proj.res', 'minimum_perc', 'many')
+        with self.assertRaises(MalformedConfigFile):
+            self.p.get_resource_settings('proj.res')
+        self.p.config.set('proj.res', 'minimum_perc', '10')
+        self.p.config.set('proj.res', 'lang_map', 'fr_FR')
+        with self.assertRaises(MalformedConfigFile):
+            self.p.get_resource_settings('proj.res')
+
+    @patch('txclib.project.utils.save_txrc_file')
+    @patch('txclib.project.utils.save_tx_config')
+    def test_settings_are_read_once(self, save_config, save_txrc):
+        settings = self.p.get_resource_settings('proj.res')
+        self.p.config.set('proj.res', 'source_lang', 'fr')
+        self.assertIs(self.p.get_resource_settings('proj.res'), settings)
+
+        # Saving or setting options through the project reads them again
+        self.p.save()
+        settings = self.p.get_resource_settings('proj.res')
+        self.assertEqual(settings.source_lang, 'fr')
+        self.p.set_min_perc(['proj.res'], '50')
+        self.assertEqual(
+            self.p.get_resource_settings('proj.res').minimum_perc, 50
+        )
+        self.p.set_default_mode([], 'translator')
+        self.p.set_i18n_type(['proj.res'], 'QT')
+        settings = self.p.get_resource_settings('proj.res')
+        self.assertEqual((settings.mode, settings.type), ('translator', 'QT'))
+
+
+class TestResourceDetails(unittest.TestCase):
+    """Test looking up the i18n type of resources."""
+
+    def setUp(self):
+        self.p = Project(init=False)
+        self.p._resource_details = ExpiringCache(None, 60)
+        self.p.url_info = {'host': 'https://fake.com', 'project': 'proj',
+                           'resource': 'res'}
+        self.p.config = configparser.RawConfigParser()
+        self.p.config.add_section('proj.res')
+        self.p.config.add_section('proj.typed')
+        self.p.config.set('proj.typed', 'type', 'PO')
+
+    def test_i18n_type(self):
+        with patch.object(self.p, 'do_url_request') as request_mock:
+            self.assertEqual(self.p._get_i18n_type('proj.typed'), 'PO')
+            request_mock.assert_not_called()
+
+            # Without a configured type, the details are fetched once
+            request_mock.return_value = ('{"i18n_type": "DOCX"}', 'utf-8')
+            self.assertEqual(self.p._get_i18n_type('proj.res'), 'DOCX')
+            self.assertEqual(self.p._get_i18n_type('proj.res'), 'DOCX')
+            request_mock.assert_called_once_with('resource_details')
+            self.assertEqual(
+                self.p._known_i18n_type('proj.res', self.p.url_info), 'DOCX'
+            )
+
+
+class TestDelete(unittest.TestCase):
+    """Test deleting resources and translations."""
+
+    def setUp(self):
+        self.p = Project(init=False)
+        self.p.config = configparser.RawConfigParser()
+        for resource in ('proj.res1', 'proj.res2', 'proj.res3'):
+            self.p.config.add_section(resource)
+            self.p.config.set(resource, 'source_lang', 'en')
+        self.p.get_resource_host = Mock(return_value='https://fake.com')
+        self.p._get_host_credentials = Mock()
+        self.p.save = Mock()
+        self.details = json.dumps({
+            'resources': [{'slug': 'res1'}, {'slug': 'res2'}],
+            'teams': ['fr'],
+        })
+        self.stats = {
+            'res1': {'en': {'translated_entities': 10},
+                     'el': {'translated_entities': 0}},
+            'res2': {'en': {'translated_entities': 10},
+                     'el': {'translated_entities': 5}},
+            'res3': {},
+        }
+
+    def do_url_request(self, api_call, **kwargs):
+        if api_call == 'project_details':
+            return self.details, 'utf-8'
+        return None, None
+
+    def get_stats(self, url_info=None, **kwargs):
+        url_info = url_info or self.p.url_info
+        return self.stats[url_info['resource']]
+
+    def test_resources_are_deleted_and_saved_once(self):
+        with patch.object(self.p, 'do_url_request') as request_mock, \
+                patch.object(self.p, '_get_stats_for_resource') as stats_mock:
+            request_mock.side_effect = self.do_url_request
+            stats_mock.side_effect = self.get_stats
+            self.p.delete(['proj.*'])
+
+        request_mock.assert_any_call('delete_resource', language=None,
+                                     method="DELETE")
+        # The details of the project are fetched once for all its resources
+        details_calls = [c for c in request_mock.call_args_list
+                         if c[0][0] == 'project_details']
+        self.assertEqual(len(details_calls), 1)
+        self.assertEqual(self.p._deletions['deleted'], [('proj.res1', None)])
+        # res2 has translations and res3 does not exist
+        self.assertEqual(self.p._deletions['skipped'],
+                         [('proj.res2', None), ('proj.res3', None)])
+        self.assertEqual(self.p.config.sections(), ['proj.res2', 'proj.res3'])
+        self.p.save.assert_called_once_with()
+
+    def test_parallel_delete(self):
+        queued = []
+
+        def do_url_request(api_call, **kwargs):
+            if kwargs.get('parallel'):
+                queued.append((kwargs['callback'], kwargs['callback_args']))
+                return
+            return self.do_url_request(api_call, **kwargs)
+
+        def perform_requests(**kwargs):
+            # The deletion of the el translation of res2 fails
+            for callback, callback_args in queued:
+                if callback_args['resource'] != 'proj.res2':
+                    callback(data='', charset='utf-8', **callback_args)
+
+        with patch.object(self.p, 'do_url_request') as request_mock, \
+                patch.object(self.p, '_get_stats_for_resource') as stats, \
+                patch.object(self.p, '_perform_queued_requests') as perform:
+            request_mock.side_effect = do_url_request
+            stats.side_effect = self.get_stats
+            perform.side_effect = perform_requests
+            self.p.delete(['proj.*'], ['el', 'fr'], force=True,
+                          parallel=True, workers=4)
+
+        perform.assert_called_once_with(skip=False, workers=4,
+                                        use_async=False)
+        self.assertEqual(len(queued), 2)
+        self.assertEqual(self.p._deletions['deleted'], [('proj.res1', 'el')])
+        self.assertEqual(self.p._deletions['failed'], [('proj.res2', 'el')])
+        self.assertEqual(len(self.p._deletions['skipped']), 4)
+        # No resources were deleted, so the configuration is unchanged
+        self.assertEqual(len(self.p.config.sections()), 3)
+        self.p.save.assert_not_called()
+
+
 class TestFormats(unittest.TestCase):
     """Tests for the supported formats."""
 
+    sample_formats = {
+        'PO': {'file-extensions': '.po, .pot'},
+        'QT': {'file-extensions': '.ts'},
+    }
+
     def setUp(self):
         self.p = Project(init=False)
+        self.p.url_info = {'host': 'https://fake.com'}
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_patch = patch('txclib.utils.get_cache_dir',
+                                 return_value=self.cache_dir)
+        self.cache_patch.start()
+        clear_formats()
+
+    def tearDown(self):
+        self.cache_patch.stop()
+        shutil.rmtree(self.cache_dir)
+        clear_formats()
 
     def test_extensions(self):
         """Test returning the correct extension for a format."""
-        sample_formats = {
-            'PO': {'file-extensions': '.po, .pot'},
-            'QT': {'file-extensions': '.ts'},
-        }
         extensions = ['.po', '.ts', '', ]
         with patch.object(self.p, "do_url_request") as mock:
-            mock.return_value = json.dumps(sample_formats), "utf-8"
+            mock.return_value = json.dumps(self.sample_formats), "utf-8"
             for (type_, ext) in zip(['PO', 'QT', 'NONE', ], extensions):
                 extension = self.p._extension_for(type_)
                 self.assertEqual(extension, ext)
 
+    def test_formats_are_cached(self):
+        with patch.object(Project, "do_url_request") as mock:
+            mock.return_value = json.dumps(self.sample_formats), "utf-8"
+            self.assertEqual(self.p._extension_for('PO'), '.po')
+            other = Project(init=False)
+            other.url_info = {'host': 'https://fake.com'}
+            self.assertEqual(other._extension_for('QT'), '.ts')
+            mock.assert_called_once_with('formats')
+
+            # A new process reads them from the disk cache
+            clear_formats()
+            self.assertEqual(self.p._extension_for('QT'), '.ts')
+            self.assertEqual(mock.call_count, 1)
+
+            # unless they were cached by another version of the client
+            clear_formats()
+            with patch('txclib.cache.__version__', '0.0.1'):
+                self.assertEqual(self.p._extension_for('QT'), '.ts')
+            self.assertEqual(mock.call_count, 2)
+
+
+    def test_cached_formats_are_refreshed_for_unknown_types(self):
+        old_formats = {'PO': self.sample_formats['PO']}
+        with patch.object(Project, "do_url_request") as mock:
+            mock.return_value = json.dumps(old_formats), "utf-8"
+            self.assertEqual(self.p._extension_for('PO'), '.po')
+
+            # Another process finds a format added since in Transifex
+            clear_formats()
+            mock.return_value = json.dumps(self.sample_formats), "utf-8"
+            self.assertEqual(self.p._extension_for('QT'), '.ts')
+            self.assertEqual(mock.call_count, 2)
+            clear_formats()
+            self.assertEqual(self.p._extension_for('QT'), '.ts')
+            self.assertEqual(mock.call_count, 2)
+
+            # Unknown formats are fetched only once per process
+            self.assertEqual(self.p._extension_for('NONE'), '')
+            self.assertEqual(mock.call_count, 3)
+            self.assertEqual(self.p._extension_for('NONE'), '')
+            self.assertEqual(mock.call_count, 3)
+
+    def test_formats_of_other_hosts_are_fetched_concurrently(self):
+        fetching = threading.Event()
+        release = threading.Event()
+        released = []
+
+        def slow_fetch():
+            fetching.set()
+            released.append(release.wait(5))
+            return self.sample_formats
+
+        thread = threading.Thread(
+            target=get_formats, args=('https://slow.com', slow_fetch)
+        )
+        thread.start()
+        try:
+            self.assertTrue(fetching.wait(5))
+            formats = get_formats('https://fast.com',
+                                  lambda: self.sample_formats)
+            self.assertEqual(formats, self.sample_formats)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(released, [True])
+
+
+class TestSaveFile(unittest.TestCase):
+    """Test saving downloaded files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_save_streamed_response(self):
+        local_file = os.path.join(self.tmp_dir, 'fr', 'file.po')
+        response = Mock()
+        response.stream.return_value = iter([b'msgid ', b'"\xc3\xa9"'])
+        Project._save_file(local_file=local_file, response=response)
+        with open(local_file, 'rb') as f:
+            self.assertEqual(f.read(), b'msgid "\xc3\xa9"')
+        self.assertEqual(os.listdir(os.path.dirname(local_file)),
+                         ['file.po'])
+
+    def test_failed_stream_keeps_existing_file(self):
+        local_file = os.path.join(self.tmp_dir, 'file.po')
+        with open(local_file, 'wb') as f:
+            f.write(b'old')
+
+        def broken_stream(*args):
+            yield b'new'
+            raise IOError('Connection lost')
+        response = Mock()
+        response.stream.side_effect = broken_stream
+        with self.assertRaises(IOError):
+            Project._save_file(local_file=local_file, response=response)
+        with open(local_file, 'rb') as f:
+            self.assertEqual(f.read(), b'old')
+        self.assertEqual(os.listdir(self.tmp_dir), ['file.po'])
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), "Needs symlinks")
+    def test_streamed_response_to_symlinked_file(self):
+        os.mkdir(os.path.join(self.tmp_dir, 'real'))
+        target = os.path.join(self.tmp_dir, 'real', 'el.po')
+        with open(target, 'wb') as f:
+            f.write(b'old')
+        os.chmod(target, 0o640)
+        local_file = os.path.join(self.tmp_dir, 'el.po')
+        os.symlink(target, local_file)
+        response = Mock()
+        response.stream.return_value = iter([b'new'])
+        Project._save_file(local_file=local_file, response=response)
+        self.assertTrue(os.path.islink(local_file))
+        with open(target, 'rb') as f:
+            self.assertEqual(f.read(), b'new')
+        self.assertEqual(os.stat(target).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(os.path.dirname(target)), ['el.po'])
+
+    def test_save_data(self):
+        local_file = os.path.join(self.tmp_dir, 'file.po')
+        Project._save_file(local_file=local_file, charset='utf-8',
+                           data=u'\xe9')
+        with open(local_file, 'rb') as f:
+            self.assertEqual(f.read(), b'\xc3\xa9')
+
+
+class TestSyncState(unittest.TestCase):
+    """Test skipping the push of files unchanged since the last sync."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp_dir, '.tx'))
+        os.makedirs(os.path.join(self.tmp_dir, 'translations'))
+        with open(os.path.join(self.tmp_dir, '.tx', 'config'), 'w') as f:
+            f.write("[main]\nhost = https://fake.com\n\n"
+                    "[proj.res]\nfile_filter = translations/<lang>.po\n"
+                    "source_file = translations/en.po\nsource_lang = en\n"
+                    "type = PO\n")
+        self.el_file = os.path.join(self.tmp_dir, 'translations', 'el.po')
+        for lang in ('en', 'el'):
+            path = os.path.join(self.tmp_dir, 'translations', '%s.po' % lang)
+            with open(path, 'wb') as f:
+                f.write(b'msgid "a"\nmsgstr "b"\n')
+        app_dir = dirname(modules['txclib'].__file__)
+        txrc_file = os.path.join(self.tmp_dir, 'transifexrc')
+        shutil.copy(os.path.join(app_dir, '..', 'tests', 'templates',
+                                 'transifexrc'), txrc_file)
+        with patch('txclib.utils.get_transifex_file',
+                   return_value=txrc_file):
+            self.p = Project(path_to_tx=self.tmp_dir)
+        self.stats = {'el': {'completed': '100%',
+                             'last_update': '2011-11-01 15:00:00'}}
+        self.pushed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def do_url_request(self, api_call, **kwargs):
+        if api_call == 'push_translation':
+            self.pushed.append(kwargs['language'])
+        callback = kwargs.get('callback')
+        if callback is not None:
+            response = Mock(status=200, headers={})
+            response.stream.return_value = iter([b'msgid "a"\n'])
+            callback(response=response, **kwargs['callback_args'])
+        return '{"i18n_type": "PO"}', 'utf-8'
+
+    def push(self, **kwargs):
+        self.pushed = []
+        self.p._state = None
+        with patch.object(self.p, 'do_url_request',
+                          side_effect=self.do_url_request), \
+                patch.object(self.p, '_get_stats_for_resource',
+                             return_value=self.stats):
+            self.p.push(translations=True, no_interactive=True, **kwargs)
+        return self.pushed
+
+    def test_unchanged_files_are_not_pushed(self):
+        self.assertEqual(self.push(), ['el'])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.tmp_dir, '.tx', 'state')
+        ))
+        self.assertEqual(self.push(), [])
+        self.assertEqual(self.push(force=True), ['el'])
+
+        with open(self.el_file, 'ab') as f:
+            f.write(b'msgid "c"\nmsgstr "d"\n')
+        self.assertEqual(self.push(), ['el'])
+        self.assertEqual(self.push(), [])
+
+        # Languages that do not exist in Transifex are always pushed
+        self.stats = {}
+        self.assertEqual(self.push(), ['el'])
+
+    def test_remote_updates_fall_back_to_timestamps(self):
+        self.assertEqual(self.push(), ['el'])
+        # The local file is newer than the update in Transifex
+        self.stats['el']['last_update'] = '2011-11-02 15:00:00'
+        self.assertEqual(self.push(), ['el'])
+        self.assertEqual(self.push(), [])
+        # The translation in Transifex is newer than the local file
+        self.stats['el']['last_update'] = '2100-01-01 00:00:00'
+        self.assertEqual(self.push(), [])
+
+    def test_pulled_files_are_not_pushed(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        try:
+            with patch.object(self.p, 'do_url_request',
+                              side_effect=self.do_url_request), \
+                    patch.object(self.p, '_get_stats_for_resource',
+                                 return_value=self.stats):
+                self.p.pull(force=True)
+        finally:
+            os.chdir(cwd)
+        with open(self.el_file, 'rb') as f:
+            self.assertEqual(f.read(), b'msgid "a"\n')
+        self.assertEqual(self.push(), [])
+
+
+class TestPullNewFiles(unittest.TestCase):
+    """Test pulling the new translations of many resources."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp_dir, '.tx'))
+        os.makedirs(os.path.join(self.tmp_dir, 'translations', 'en'))
+        self.resources = ['proj.res%d' % i for i in range(20)]
+        config = "[main]\nhost = https://fake.com\n"
+        for i, resource in enumerate(self.resources):
+            path = os.path.join(self.tmp_dir, 'translations', 'en',
+                                'res%d.po' % i)
+            with open(path, 'wb') as f:
+                f.write(b'msgid "a"\nmsgstr "b"\n')
+            config += ("\n[%s]\nfile_filter = translations/<lang>/res%d.po\n"
+                       "source_file = translations/en/res%d.po\n"
+                       "source_lang = en\ntype = PO\n" % (resource, i, i))
+        with open(os.path.join(self.tmp_dir, '.tx', 'config'), 'w') as f:
+            f.write(config)
+        txrc_file = os.path.join(self.tmp_dir, 'transifexrc')
+        with open(txrc_file, 'w') as f:
+            f.write("[https://fake.com]\nhostname = https://fake.com\n"
+                    "username = api\npassword = token\n")
+        with patch('txclib.utils.get_transifex_file',
+                   return_value=txrc_file):
+            self.p = Project(path_to_tx=self.tmp_dir)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def do_url_request(self, api_call, **kwargs):
+        callback = kwargs.get('callback')
+        if callback is not None:
+            response = Mock(status=200, headers={})
+            response.stream.return_value = iter([b'msgid "a"\n'])
+            callback(response=response, **kwargs['callback_args'])
+        return '{"i18n_type": "PO"}', 'utf-8'
+
+    def test_project_is_walked_once(self):
+        stats = {'el': {'completed': '100%',
+                        'last_update': '2011-11-01 15:00:00'}}
+        with patch.object(self.p, 'do_url_request',
+                          side_effect=self.do_url_request), \
+                patch.object(self.p, '_get_stats_for_resource',
+                             return_value=stats), \
+                patch('txclib.utils._walk_files',
+                      wraps=utils._walk_files) as walk:
+            self.p.pull(fetchall=True)
+            self.assertEqual(walk.call_count, 1)
+            for i in range(len(self.resources)):
+                self.assertTrue(os.path.exists(os.path.join(
+                    self.tmp_dir, 'translations', 'el', 'res%d.po' % i
+                )))
+
+            # The new files are found after the pull
+            self.assertEqual(
+                self.p.get_resource_files(self.resources[0]),
+                {'el': os.path.join('translations', 'el', 'res0.po')}
+            )
+            self.assertEqual(walk.call_count, 2)
+
+
+class TranslationHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve a translation file with an ETag, honouring If-None-Match."""
+
+    etag = '"v1"'
+    content = b'msgid "a"\nmsgstr "b"\n' * 1000
+
+    def do_GET(self):
+        self.server.requests.append(self.headers.get('If-None-Match'))
+        if '/translation/' not in self.path:
+            self.respond(b'{"i18n_type": "PO", "available_languages": []}')
+        elif self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+        else:
+            self.respond(self.content)
+
+    def respond(self, content):
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        self.server.bytes_sent += len(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConditionalPull(unittest.TestCase):
+    """Test pulling translations with conditional requests."""
+
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+                                                TranslationHandler)
+        self.server.requests = []
+        self.server.bytes_sent = 0
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        host = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp_dir, '.tx'))
+        with open(os.path.join(self.tmp_dir, '.tx', 'config'), 'w') as f:
+            f.write("[main]\nhost = %s\n\n[proj.res]\n"
+                    "file_filter = translations/<lang>.po\n"
+                    "source_file = translations/en.po\nsource_lang = en\n"
+                    "type = PO\n" % host)
+        txrc_file = os.path.join(self.tmp_dir, 'transifexrc')
+        with open(txrc_file, 'w') as f:
+            f.write("[%s]\nhostname = %s\nusername = api\n"
+                    "password = token\n" % (host, host))
+        with patch('txclib.utils.get_transifex_file',
+                   return_value=txrc_file):
+            self.p = Project(path_to_tx=self.tmp_dir)
+        self.el_file = os.path.join('translations', 'el.po')
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        os.makedirs('translations')
+        with open(self.el_file, 'wb') as f:
+            f.write(b'old')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def pull(self):
+        self.server.requests = []
+        self.server.bytes_sent = 0
+        stats = {'el': {'completed': '100%',
+                        'last_update': '2100-01-01 00:00:00'}}
+        with patch.object(self.p, '_get_stats_for_resource',
+                          return_value=stats):
+            self.p.pull()
+        with open(self.el_file, 'rb') as f:
+            self.assertEqual(f.read(), TranslationHandler.content)
+
+    def test_not_modified_files_are_not_downloaded(self):
+        self.pull()
+        self.assertEqual(self.server.requests, [None])
+        self.assertEqual(self.server.bytes_sent,
+                         len(TranslationHandler.content))
+
+        self.pull()
+        self.assertEqual(self.server.requests, ['"v1"'])
+        self.assertLess(self.server.bytes_sent, 100)
+
+        # Local changes are overwritten with an unconditional request
+        with open(self.el_file, 'ab') as f:
+            f.write(b'msgid "c"\n')
+        self.pull()
+        self.assertEqual(self.server.requests, [None])
+
 
 class TestOptions(unittest.TestCase):
     """Test the methods related to parsing the configuration file."""
@@ -1,9 +1,14 @@
 import os
+import re
+import shutil
+import tempfile
 import time
 import unittest
+import git
 import six
 from mock import patch, MagicMock, Mock, mock_open
 from urllib3.exceptions import SSLError
+from urllib3.filepost import encode_multipart_formdata
 
 from txclib import utils, exceptions
 
@@ -19,6 +24,12 @@ def Any():
 
 class MakeRequestTestCase(unittest.TestCase):
 
+    def setUp(self):
+        utils.clear_pool_managers()
+
+    def tearDown(self):
+        utils.clear_pool_managers()
+
     @patch('urllib3.PoolManager')
     def test_makes_request(self, mock_manager):
         response_mock = MagicMock()
@@ -38,7 +49,9 @@ class MakeRequestTestCase(unittest.TestCase):
             'a_user',
             'a_pass'
         )
-        mock_manager.assert_called_once_with(num_pools=1)
+        mock_manager.assert_called_once_with(
+            num_pools=10, maxsize=utils.POOL_MAXSIZE
+        )
         mock_connection.request.assert_called_once()
 
         # In case the http proxy variable exists but is empty,
@@ -51,7 +64,10 @@ class MakeRequestTestCase(unittest.TestCase):
                 'a_user',
                 'a_pass'
             )
-            mock_manager.assert_called_with(num_pools=1)
+            # The same pool manager is reused
+            mock_manager.assert_called_once_with(
+                num_pools=10, maxsize=utils.POOL_MAXSIZE
+            )
             self.assertEqual(mock_connection.request.call_count, 2)
 
         # In case the https proxy variable exists but is empty,
@@ -64,7 +80,9 @@ class MakeRequestTestCase(unittest.TestCase):
                 'a_user',
                 'a_pass'
             )
-            mock_manager.assert_called_with(num_pools=1)
+            mock_manager.assert_called_once_with(
+                num_pools=10, maxsize=utils.POOL_MAXSIZE
+            )
             self.assertEqual(mock_connection.request.call_count, 3)
 
     @patch('urllib3.ProxyManager')
@@ -88,9 +106,10 @@ class MakeRequestTestCase(unittest.TestCase):
                 'a_user',
                 'a_pass'
             )
-            mock_manager.assert_called_once_with(num_pools=1,
-                                                 proxy_headers=Any(),
-                                                 proxy_url='http://proxy.host:333')
+            mock_manager.assert_called_once_with(
+                num_pools=10, maxsize=utils.POOL_MAXSIZE,
+                proxy_headers=Any(), proxy_url='http://proxy.host:333'
+            )
             mock_connection.request.assert_called_once()
 
         # Test https
@@ -103,11 +122,11 @@ class MakeRequestTestCase(unittest.TestCase):
                 'a_user',
                 'a_pass'
             )
-            mock_manager.assert_called_with(num_pools=1,
-                                            proxy_headers=Any(),
-                                            proxy_url='https://proxy.host:333',
-                                            ca_certs=Any(),
-                                            cert_reqs=Any())
+            mock_manager.assert_called_with(
+                num_pools=10, maxsize=utils.POOL_MAXSIZE,
+                proxy_headers=Any(), proxy_url='https://proxy.host:333',
+                ca_certs=Any(), cert_reqs=Any()
+            )
             self.assertEqual(mock_connection.request.call_count, 2)
 
     @patch('urllib3.PoolManager')
@@ -151,7 +170,9 @@ class MakeRequestTestCase(unittest.TestCase):
             'a_pass',
             skip_decode=True
         )
-        mock_conn.assert_called_once_with(num_pools=1)
+        mock_conn.assert_called_once_with(
+            num_pools=10, maxsize=utils.POOL_MAXSIZE
+        )
         mock_connection.request.assert_called_once()
         mock_determine.assert_not_called()
 
@@ -221,13 +242,16 @@ class MakeRequestTestCase(unittest.TestCase):
             'a_pass'
         )
 
+    @patch('txclib.utils.time.sleep')
     @patch('urllib3.PoolManager')
-    def test_makes_request_connection_error(self, mock_manager):
+    def test_makes_request_connection_error(self, mock_manager, mock_sleep):
         """Tests for common 50X connection errors."""
         for code in range(500, 506):
+            utils.clear_pool_managers()
             mock_connection = MagicMock()
             mock_connection.request.return_value = MagicMock(status=code,
-                                                             data=None)
+                                                             data=None,
+                                                             headers={})
             mock_manager.return_value = mock_connection
 
             host = 'http://whynotestsforthisstuff.com'
@@ -236,6 +260,69 @@ class MakeRequestTestCase(unittest.TestCase):
             with self.assertRaises(exceptions.TXConnectionError) as err:
                 utils.make_request(*args)
             self.assertEqual(err.exception.response_code, code)
+            # Server errors are retried with back-off
+            attempts = 1
+            if code in utils.RETRY_STATUSES:
+                attempts += utils.MAX_RETRIES
+            self.assertEqual(mock_connection.request.call_count, attempts)
+
+    @patch('txclib.utils.random.uniform', side_effect=lambda a, b: b)
+    @patch('txclib.utils.time.sleep')
+    @patch('urllib3.PoolManager')
+    def test_retries_throttled_requests(self, mock_manager, mock_sleep,
+                                        mock_uniform):
+        throttled = MagicMock(status=429, data=b'Throttled',
+                              headers={'Retry-After': '3'})
+        unavailable = MagicMock(status=503, data=b'', headers={})
+        ok = MagicMock(status=200, data=b'{}', headers={})
+        mock_connection = MagicMock()
+        mock_connection.request.side_effect = [throttled, unavailable, ok]
+        mock_manager.return_value = mock_connection
+
+        data, _ = utils.make_request('GET', 'http://test.com/', '/path/',
+                                     'a_user', 'a_pass')
+        self.assertEqual(data, '{}')
+        self.assertEqual(mock_connection.request.call_count, 3)
+        self.assertEqual([c[0][0] for c in mock_sleep.call_args_list],
+                         [3.0, utils.RETRY_BACKOFF * 2])
+
+        # Only throttled requests are retried for other methods, rewinding
+        # their body
+        body = MagicMock(spec=utils.MultipartFileBody)
+        body.headers = {}
+        mock_connection.request.reset_mock()
+        mock_connection.request.side_effect = [throttled, unavailable]
+        with self.assertRaises(exceptions.TXConnectionError) as err:
+            utils.make_request('PUT', 'http://test.com/', '/path/',
+                               'a_user', 'a_pass', body)
+        self.assertEqual(err.exception.response_code, 503)
+        self.assertEqual(mock_connection.request.call_count, 2)
+        body.seek.assert_called_once_with(0)
+
+        # A 429 that is not retried raises a connection error
+        mock_connection.request.reset_mock()
+        mock_connection.request.side_effect = None
+        mock_connection.request.return_value = MagicMock(
+            status=429, data=b'', headers={'Retry-After': '3600'}
+        )
+        with self.assertRaises(exceptions.TXConnectionError) as err:
+            utils.make_request('GET', 'http://test.com/', '/path/',
+                               'a_user', 'a_pass')
+        self.assertEqual(err.exception.response_code, 429)
+        self.assertEqual(mock_connection.request.call_count, 1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(utils._parse_retry_after('120'), 120.0)
+        self.assertIsNone(utils._parse_retry_after(None))
+        self.assertIsNone(utils._parse_retry_after('soon'))
+        self.assertEqual(
+            utils._parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0
+        )
+        with patch('txclib.utils.time.time', return_value=1445412470.0):
+            self.assertEqual(
+                utils._parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'),
+                10.0
+            )
 
     @patch('urllib3.PoolManager')
     def test_makes_request_None(self, mock_manager):
@@ -256,7 +343,9 @@ class MakeRequestTestCase(unittest.TestCase):
             'a_user',
             'a_pass'
         )
-        mock_manager.assert_called_once_with(num_pools=1)
+        mock_manager.assert_called_once_with(
+            num_pools=10, maxsize=utils.POOL_MAXSIZE
+        )
         mock_connection.request.assert_called_once()
 
     @patch('urllib3.PoolManager')
@@ -284,6 +373,67 @@ class MakeRequestTestCase(unittest.TestCase):
                                                         fields=Any(),
                                                         headers=Any())
 
+    @patch('urllib3.PoolManager')
+    def test_pool_managers_are_shared(self, mock_manager):
+        mock_manager.side_effect = lambda **kwargs: MagicMock()
+        _, http_manager = utils._prepare_url_request(
+            'http://a.com', 'user', 'pass'
+        )
+        _, other_manager = utils._prepare_url_request(
+            'http://b.com', 'user', 'pass'
+        )
+        self.assertIs(http_manager, other_manager)
+        _, https_manager = utils._prepare_url_request(
+            'https://a.com', 'user', 'pass'
+        )
+        self.assertIsNot(http_manager, https_manager)
+        self.assertEqual(mock_manager.call_count, 2)
+
+        utils.set_pool_maxsize(25)
+        try:
+            http_manager.connection_pool_kw.__setitem__.assert_called_with(
+                'maxsize', 25
+            )
+            _, manager = utils._prepare_url_request(
+                'https://c.com', 'user', 'pass'
+            )
+            self.assertIs(manager, https_manager)
+        finally:
+            utils.set_pool_maxsize(utils.DEFAULT_WORKERS)
+
+    @patch('urllib3.PoolManager')
+    def test_makes_streamed_request(self, mock_manager):
+        response_mock = MagicMock()
+        response_mock.status = 200
+        mock_connection = MagicMock()
+        mock_connection.request.return_value = response_mock
+        mock_manager.return_value = mock_connection
+        callback = MagicMock()
+
+        utils.make_request(
+            'GET', 'http://test.com/', '/path/', 'a_user', 'a_pass',
+            callback=callback, callback_args={'local_file': 'a.po'},
+            stream=True
+        )
+        mock_connection.request.assert_called_once_with(
+            'GET', 'http://test.com/path/', fields=Any(), headers=Any(),
+            preload_content=False
+        )
+        callback.assert_called_once_with(local_file='a.po',
+                                         response=response_mock)
+        response_mock.close.assert_called_once_with()
+
+        # Errors are read and raised as usual
+        response_mock.status = 404
+        response_mock.data = 'Not found'
+        callback.reset_mock()
+        with self.assertRaises(exceptions.HttpNotFound):
+            utils.make_request(
+                'GET', 'http://test.com/', '/path/', 'a_user', 'a_pass',
+                callback=callback, stream=True
+            )
+        callback.assert_not_called()
+
     def test_get_current_branch_root_dir_no_git(self):
         with patch('txclib.utils.os.getcwd') as cwd_mock, \
              patch('txclib.utils.os.path.isdir') as isdir_mock:
@@ -327,6 +477,200 @@ class MakeRequestTestCase(unittest.TestCase):
             self.assertEqual(b, 'test_branch/abc')
 
 
+class MultipartFileBodyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'en.po')
+        self.content = b'msgid "a"\nmsgstr "\xce\xb1"\n' * 1000
+        with open(self.path, 'wb') as f:
+            f.write(self.content)
+        self.fields = {'resource': 'r1', 'language': 'el', 'xliff': 'true'}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_matches_urllib3_encoding(self):
+        body = utils.MultipartFileBody(self.fields, 'uploaded_file',
+                                       self.path, boundary='b0undary')
+        fields = dict(self.fields)
+        fields['uploaded_file'] = ('en.po', self.content)
+        expected, content_type = encode_multipart_formdata(
+            fields, boundary='b0undary'
+        )
+        data = body.read()
+        self.assertEqual(data, expected)
+        self.assertEqual(body.headers, {
+            'Content-Type': content_type,
+            'Content-Length': str(len(expected)),
+        })
+        self.assertEqual(body.read(), b'')
+
+    def test_reads_in_chunks_and_rewinds(self):
+        body = utils.MultipartFileBody(self.fields, 'uploaded_file',
+                                       self.path)
+        self.assertIsNone(body._file)
+        chunks = []
+        chunk = body.read(100)
+        while chunk:
+            self.assertLessEqual(len(chunk), 100)
+            chunks.append(chunk)
+            chunk = body.read(100)
+        data = b''.join(chunks)
+        self.assertEqual(body.tell(), len(data))
+        self.assertEqual(str(len(data)), body.headers['Content-Length'])
+        self.assertIsNone(body._file)
+
+        body.read(10000)
+        body.seek(0)
+        self.assertEqual(body.tell(), 0)
+        self.assertEqual(body.read(), data)
+        self.assertRaises(IOError, body.seek, 10)
+
+    @patch('txclib.utils._get_pool_manager')
+    def test_is_sent_as_request_body(self, mock_manager):
+        response_mock = MagicMock()
+        response_mock.status = 200
+        response_mock.data = b'{}'
+        mock_connection = MagicMock()
+        mock_connection.request.return_value = response_mock
+        mock_manager.return_value = mock_connection
+        body = utils.MultipartFileBody(self.fields, 'uploaded_file',
+                                       self.path)
+        body.close = MagicMock()
+
+        utils.make_request('PUT', 'http://test.com/', '/path/', 'a_user',
+                           'a_pass', body)
+        args, kwargs = mock_connection.request.call_args
+        self.assertIs(kwargs['body'], body)
+        self.assertNotIn('fields', kwargs)
+        self.assertEqual(kwargs['headers']['Content-Type'],
+                         body.headers['Content-Type'])
+        body.close.assert_called_once_with()
+
+
+class AdaptiveConcurrencyTestCase(unittest.TestCase):
+
+    def test_limit_adapts_to_responses(self):
+        limiter = utils.AdaptiveConcurrency(8)
+        self.assertEqual(limiter.limit, 8)
+        with patch('txclib.utils.time.time', return_value=100.0):
+            # Multiplicative decrease, once per cool-down
+            limiter.acquire()
+            limiter.acquire()
+            limiter.release(throttled=True)
+            limiter.release(throttled=True)
+            self.assertEqual(limiter.limit, 4)
+            self.assertEqual(limiter.in_flight, 0)
+
+            # Failed requests change nothing
+            limiter.acquire()
+            limiter.release(responded=False)
+            self.assertEqual(limiter.limit, 4)
+
+        with patch('txclib.utils.time.time', return_value=102.0):
+            limiter.acquire()
+            limiter.release(throttled=True)
+            self.assertEqual(limiter.limit, 2)
+
+            # Additive increase, up to the maximum
+            for _ in range(100):
+                limiter.acquire()
+                limiter.release()
+            self.assertEqual(limiter.limit, 8)
+
+    def test_slow_responses_do_not_shrink_the_limit(self):
+        limiter = utils.AdaptiveConcurrency(5)
+
+        def request(duration):
+            limiter.acquire()
+            time.sleep(duration)
+            limiter.release()
+
+        # A fast 304 response among slower downloads of different sizes
+        tasks = [(request, (duration,), {})
+                 for duration in [0.001, 0.05, 0.02, 0.001, 0.05] * 4]
+        utils.run_in_parallel(tasks, workers=5)
+        self.assertEqual(limiter.limit, 5)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_retry_after_pauses_requests(self):
+        limiter = utils.AdaptiveConcurrency(4)
+        limiter.acquire()
+        limiter.release(throttled=True, retry_after=0.2)
+        start = time.time()
+        limiter.acquire()
+        self.assertGreaterEqual(time.time() - start, 0.15)
+        limiter.release()
+
+    def test_limits_requests_in_flight(self):
+        limiter = utils.AdaptiveConcurrency(10, initial=2)
+        running, peak = [0], [0]
+        lock = utils.threading.Lock()
+
+        def task():
+            limiter.acquire()
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            limiter.release(throttled=True)
+
+        utils.run_in_parallel([(task, (), {}) for _ in range(10)], workers=10)
+        self.assertLessEqual(peak[0], 2)
+        self.assertEqual(limiter.limit, 1)
+
+
+class ParallelRequestsTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        utils.REQUESTS = []
+
+    def test_run_in_parallel_keeps_order(self):
+        def slow_double(x):
+            time.sleep(0.01 * (5 - x))
+            return x * 2
+        tasks = [(slow_double, (x,), {}) for x in range(5)]
+        results = utils.run_in_parallel(tasks, workers=3)
+        self.assertEqual(results, [(x * 2, None) for x in range(5)])
+
+    def test_run_in_parallel_is_bounded(self):
+        running, peak = [0], [0]
+        lock = utils.threading.Lock()
+
+        def task():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+        utils.run_in_parallel([(task, (), {})] * 20, workers=4)
+        self.assertLessEqual(peak[0], 4)
+
+    def test_run_in_parallel_collects_errors(self):
+        error = ValueError('Boom!')
+
+        def fail():
+            raise error
+        results = utils.run_in_parallel([(fail, (), {}), (int, ('1',), {})])
+        self.assertEqual(results, [(None, error), (1, None)])
+
+    @patch('txclib.utils.update_progress')
+    @patch('txclib.utils.perform_single_request')
+    def test_perform_parallel_requests(self, mock_request, mock_progress):
+        error = exceptions.HttpNotFound('Not found')
+        mock_request.side_effect = [('data', 'utf-8'), error]
+        utils.REQUESTS = [('GET', 'http://a/1'), ('GET', 'http://a/2')]
+        errors = utils.perform_parallel_requests(workers=2)
+        self.assertEqual(errors, [error])
+        self.assertEqual(utils.REQUESTS, [])
+        self.assertEqual(mock_progress.call_count, 3)
+        mock_progress.assert_called_with(2, 2)
+
+
 class ProjectFilesTestCase(unittest.TestCase):
 
     def test_project_files_scanning(self):
@@ -366,6 +710,117 @@ class ProjectFilesTestCase(unittest.TestCase):
             for file, lang in utils.get_project_files(os.getcwd(), expression):
                 pass
 
+    def test_project_files_with_index(self):
+        expressions = [
+            "tests/project_dir/test_expressions/<lang>/test.txt",
+            "tests/project_dir/<lang>/test.txt",
+            "tests/project_dir/test_expressions/bulk/1.<lang>.po",
+            "tests/project_dir/test_expressions/bulk/2_<lang>.po",
+            "tests/project_dir/translations/<lang>/test.txt",
+        ]
+        expected = [list(utils.get_project_files(os.getcwd(), expr))
+                    for expr in expressions]
+        index = utils.FileIndex()
+        with patch('txclib.utils.os.walk', side_effect=os.walk) as walk_mock:
+            for _ in range(2):
+                found = [list(utils.get_project_files(os.getcwd(), expr,
+                                                      index=index))
+                         for expr in expressions]
+                self.assertEqual(found, expected)
+        # Only test_expressions/ and project_dir/ itself are walked
+        self.assertEqual(walk_mock.call_count, 2)
+
+        index.clear()
+        with patch('txclib.utils.os.walk', side_effect=os.walk) as walk_mock:
+            list(utils.get_project_files(os.getcwd(), expressions[0],
+                                         index=index))
+        self.assertEqual(walk_mock.call_count, 1)
+
+
+class FileFilterMatcherTestCase(unittest.TestCase):
+
+    def test_match_project_files(self):
+        expressions = {
+            'dirs': "tests/project_dir/test_expressions/<lang>/test.txt",
+            'bulk1': "tests/project_dir/test_expressions/bulk/1.<lang>.po",
+            'bulk2': "tests/project_dir/test_expressions/bulk/2_<lang>.po",
+            'bulk3': "tests/project_dir/test_expressions/bulk/3 <lang>.po",
+            'top': "tests/project_dir/<lang>/test.txt",
+            'none': "tests/project_dir/missing/<lang>.po",
+        }
+        expected = dict(
+            (key, list(utils.get_project_files(os.getcwd(), expression)))
+            for key, expression in expressions.items()
+        )
+        self.assertEqual(
+            utils.match_project_files(os.getcwd(), expressions), expected
+        )
+        self.assertEqual(len(expected['bulk3']), 2)
+        self.assertEqual(expected['none'], [])
+
+        msg = r"File filter (.*) does not contain"
+        with six.assertRaisesRegex(self, exceptions.MalformedConfigFile, msg):
+            utils.match_project_files(os.getcwd(), {
+                'invalid': "tests/project_dir/test_expressions/bulk/1.en.po"
+            })
+
+    def test_paths_are_matched_against_candidates_only(self):
+        """
+        Dispatching the paths of a large project to the file filters of its
+        resources should find what trying every file filter finds, while
+        evaluating about one regex per path instead of all of them.
+        """
+        root = "/project"
+        langs = ["lang%02d" % i for i in range(10)]
+        file_filters = {}
+        for i in range(300):
+            file_filters["res%d" % i] = [
+                "locale/<lang>/LC_MESSAGES/res%d.po" % i,
+                "res%d/<lang>.json" % i,
+                "translations/proj.res%d/<lang>.po" % i,
+            ][i % 3]
+        paths = [
+            utils.posix_path(os.path.join(root, utils.native_path(
+                file_filter.replace('<lang>', lang)
+            )))
+            for file_filter in file_filters.values() for lang in langs
+        ]
+
+        regexes = [
+            (key, re.compile(utils.regex_from_filefilter(file_filter, root)))
+            for key, file_filter in file_filters.items()
+        ]
+        expected = []
+        for path in paths:
+            for key, regex in regexes:
+                match = regex.match(path)
+                if match:
+                    expected.append((key, match.group(1)))
+
+        evaluated = []
+        compile_regex = re.compile
+
+        class CountingRegex(object):
+            def __init__(self, pattern):
+                self.regex = compile_regex(pattern)
+
+            def match(self, path):
+                evaluated.append(path)
+                return self.regex.match(path)
+
+        matcher = utils.FileFilterMatcher()
+        with patch('txclib.utils.re.compile', CountingRegex):
+            for key, file_filter in file_filters.items():
+                matcher.add(key, file_filter, root)
+        found = []
+        for path in paths:
+            found.extend(matcher.match(path))
+
+        self.assertEqual(sorted(found), sorted(expected))
+        self.assertEqual(len(found), len(paths))
+        self.assertEqual(len(evaluated), len(paths))
+
+
 class GitUtilsTestCase(unittest.TestCase):
 
     def test_fetch_timestamp_from_git_tree(self):
@@ -385,6 +840,47 @@ class GitUtilsTestCase(unittest.TestCase):
         parsed_ts = time.mktime(time.gmtime(epoch_ts))
         self.assertIsNotNone(parsed_ts)
 
+    def test_file_timestamps_are_read_at_once(self):
+        tmpdir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        utils.clear_git_timestamps()
+        try:
+            repo = git.Repo.init(tmpdir)
+            actor = git.Actor('Test', 'test@example.com')
+            os.makedirs(os.path.join(tmpdir, 'locale'))
+            paths = [os.path.join(tmpdir, 'locale', '%s.po' % lang)
+                     for lang in ('el', 'fr', 'pt br')]
+            for date, changed in [('2020-01-01T00:00:00', paths),
+                                  ('2020-02-01T00:00:00', paths[1:2])]:
+                for path in changed:
+                    with open(path, 'a') as f:
+                        f.write(date)
+                repo.index.add(changed)
+                repo.index.commit('Update', author=actor, committer=actor,
+                                  author_date=date, commit_date=date)
+            untracked = os.path.join(tmpdir, 'locale', 'de.po')
+            open(untracked, 'w').close()
+
+            os.chdir(tmpdir)
+            expected = [c.authored_date for c in (
+                next(repo.iter_commits(paths=path)) for path in paths
+            )]
+            with patch('txclib.utils.git.Repo.iter_commits') as iter_mock:
+                timestamps = [utils.get_git_file_timestamp(path)
+                              for path in paths]
+                self.assertIsNone(utils.get_git_file_timestamp(untracked))
+                iter_mock.assert_not_called()
+            self.assertEqual(timestamps, expected)
+            self.assertNotEqual(timestamps[0], timestamps[1])
+            self.assertEqual(
+                utils.get_git_file_timestamp(os.path.join('locale', 'el.po')),
+                timestamps[0]
+            )
+        finally:
+            os.chdir(cwd)
+            utils.clear_git_timestamps()
+            shutil.rmtree(tmpdir)
+
     def test_uses_authorized_date(self):
         commit = Mock()
         commit.authored_date = 1590969254
@@ -393,3 +889,135 @@ class GitUtilsTestCase(unittest.TestCase):
             repo.return_value.iter_commits.return_value = [commit]
             epoch_ts = utils.get_git_file_timestamp('any')
         self.assertEqual(1590969254, epoch_ts)
+
+
+class SaveConfigTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.tmpdir, 'config')
+        with open(self.config_file, 'w') as f:
+            f.write('[main]\nhost = https://foo.var\n')
+        self.config = utils.read_config_file(self.config_file)
+        self.config.set('main', 'minimum_perc', '10')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_permissions_are_kept(self):
+        os.chmod(self.config_file, 0o640)
+        utils.save_tx_config(self.config_file, self.config)
+        self.assertIn('minimum_perc = 10', self.read(self.config_file))
+        self.assertEqual(os.stat(self.config_file).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(self.tmpdir), ['config'])
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), "Needs symlinks")
+    def test_symlinks_are_kept(self):
+        link = os.path.join(self.tmpdir, 'link')
+        os.symlink(self.config_file, link)
+        utils.save_tx_config(link, self.config)
+        self.assertTrue(os.path.islink(link))
+        self.assertIn('minimum_perc = 10', self.read(self.config_file))
+
+
+class ConfigCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.tmpdir, '.tx'))
+        self.config_file = os.path.join(self.tmpdir, '.tx', 'config')
+        self.cache_file = self.config_file + utils.CONFIG_CACHE_SUFFIX
+        self.write_config('[main]\nhost = https://www.transifex.com\n\n'
+                          '[proj.res]\nsource_lang = en\n'
+                          'trans.el = el.po\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_config(self, content, age=60):
+        with open(self.config_file, 'w') as f:
+            f.write(content)
+        mtime = time.time() - age
+        os.utime(self.config_file, (mtime, mtime))
+
+    def test_parsed_config_is_cached(self):
+        config = utils.read_config_file(self.config_file)
+        self.assertTrue(os.path.exists(self.cache_file))
+        with patch.object(utils.OrderedRawConfigParser, 'read') as read:
+            cached = utils.read_config_file(self.config_file)
+        read.assert_not_called()
+        self.assertEqual(cached.sections(), config.sections())
+        self.assertEqual(cached.items('proj.res'), config.items('proj.res'))
+        self.assertEqual(cached.get('main', 'host'),
+                         'https://www.transifex.com')
+        cached.set('proj.res', 'type', 'PO')
+        self.assertEqual(cached.get('proj.res', 'type'), 'PO')
+
+    def test_cache_is_invalidated_when_the_config_changes(self):
+        utils.read_config_file(self.config_file)
+        self.write_config('[main]\nhost = https://www.transifex.com\n',
+                          age=30)
+        config = utils.read_config_file(self.config_file)
+        self.assertEqual(config.sections(), ['main'])
+        self.assertEqual(utils.read_config_file(self.config_file).sections(),
+                         ['main'])
+
+    def test_recently_modified_config_is_not_cached(self):
+        self.write_config('[main]\nhost = https://www.transifex.com\n',
+                          age=0)
+        utils.read_config_file(self.config_file)
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_broken_cache_is_ignored(self):
+        with open(self.cache_file, 'wb') as f:
+            f.write(b'garbage')
+        config = utils.read_config_file(self.config_file)
+        self.assertEqual(config.sections(), ['main', 'proj.res'])
+
+    def test_only_tx_config_files_are_cached(self):
+        config_file = os.path.join(self.tmpdir, 'config')
+        shutil.copy(self.config_file, config_file)
+        utils.read_config_file(config_file)
+        self.assertFalse(os.path.exists(
+            config_file + utils.CONFIG_CACHE_SUFFIX
+        ))
+
+
+class MigrateTxrcTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.txrc_file = os.path.join(self.tmpdir, '.transifexrc')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_txrc(self, content):
+        with open(self.txrc_file, 'w') as f:
+            f.write(content)
+        return utils.get_transifex_config(self.txrc_file)
+
+    @patch('txclib.utils.save_txrc_file')
+    def test_txrc_is_not_saved_when_nothing_migrated(self, save_mock):
+        self.read_txrc('[https://www.transifex.com]\n'
+                       'api_hostname = https://api.transifex.com\n'
+                       'hostname = https://www.transifex.com\n'
+                       'username = api\npassword = token\n')
+        save_mock.assert_not_called()
+
+    @patch('txclib.utils.save_txrc_file')
+    def test_txrc_is_saved_once_when_migrated(self, save_mock):
+        txrc = self.read_txrc('[https://www.transifex.com]\n'
+                              'hostname = https://www.transifex.com\n'
+                              'username = api\npassword = token\n\n'
+                              '[https://example.com]\n'
+                              'hostname = https://example.com\n')
+        save_mock.assert_called_once_with(self.txrc_file, txrc)
+        self.assertEqual(
+            txrc.get('https://www.transifex.com', 'api_hostname'),
+            utils.DEFAULT_HOSTNAMES['api_hostname']
+        )
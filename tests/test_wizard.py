@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import shutil
+import tempfile
+import time
 import unittest
-from mock import patch, MagicMock
+from mock import ANY, patch, MagicMock
 
 from six import assertRaisesRegex
 
-from txclib.wizard import Wizard
+from txclib.cache import clear_formats
+from txclib.wizard import LISTINGS_TTL, Wizard
 
 
 @patch('txclib.wizard.Api')
@@ -18,8 +22,21 @@ class WizardCase(unittest.TestCase):
                     'foo', 'bar'
                 project_mock.return_value = instance_mock
                 self.wizard = Wizard('/foo/bar/tmp')
+        self.wizard.host = 'https://fake.com'
+        self.fingerprint = self.wizard.fingerprint
+        # Do not share the cached formats and listings between tests
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_patch = patch('txclib.utils.get_cache_dir',
+                                 return_value=self.cache_dir)
+        self.cache_patch.start()
+        clear_formats()
         super(WizardCase, self).setUp(*args, **kwargs)
 
+    def tearDown(self):
+        self.cache_patch.stop()
+        shutil.rmtree(self.cache_dir)
+        clear_formats()
+
     def test_get_organizations(self, api_mock):
         self.wizard.api.get.return_value = [
             {
@@ -119,6 +136,64 @@ class WizardCase(unittest.TestCase):
         with assertRaisesRegex(self, Exception, error_msg):
             self.wizard.get_formats('test.txt')
 
+    def test_listings_are_cached(self, api_mock):
+        self.wizard.api.get.return_value = [{"name": "Org", "slug": "org"}]
+        self.assertEqual(self.wizard.get_organizations(), [("org", "Org")])
+        self.wizard.api.get.return_value = [{"name": "New", "slug": "new"}]
+        self.assertEqual(self.wizard.get_organizations(), [("org", "Org")])
+        self.assertEqual(self.wizard.api.get.call_count, 1)
+
+        # The cache is per token
+        self.wizard.fingerprint = 'other'
+        self.assertEqual(self.wizard.get_organizations(), [("new", "New")])
+
+        # and not used with --refresh
+        self.wizard.fingerprint = self.fingerprint
+        self.wizard.refresh = True
+        self.assertEqual(self.wizard.get_organizations(), [("new", "New")])
+        self.assertEqual(self.wizard.api.get.call_count, 3)
+
+    def test_projects_are_cached_per_organization(self, api_mock):
+        projects = {
+            'org1': [{"name": "p1", "slug": "p1", "archived": False}],
+            'org2': [{"name": "p2", "slug": "p2", "archived": False}],
+        }
+        self.wizard.api.get.side_effect = \
+            lambda api_call, organization: projects[organization]
+        for _ in range(2):
+            self.assertEqual(self.wizard.get_projects_for_org('org1'),
+                             projects['org1'])
+            self.assertEqual(self.wizard.get_projects_for_org('org2'),
+                             projects['org2'])
+        self.assertEqual(self.wizard.api.get.call_count, 2)
+        self.wizard.get_projects_for_org('org1', refresh=True)
+        self.assertEqual(self.wizard.api.get.call_count, 3)
+
+    @patch('txclib.wizard.threading.Thread')
+    def test_stale_listings_are_refreshed_in_background(self, thread_mock,
+                                                        api_mock):
+        self.wizard.api.get.return_value = [{"name": "Org", "slug": "org"}]
+        self.wizard.get_organizations()
+        later = time.time() + LISTINGS_TTL + 1
+        with patch('txclib.cache.time.time', return_value=later):
+            self.assertEqual(self.wizard.get_organizations(),
+                             [("org", "Org")])
+            thread_mock.assert_called_once_with(
+                target=self.wizard._refresh_listing,
+                args=(ANY, 'organizations', {})
+            )
+            thread_mock.return_value.start.assert_called_once_with()
+
+            # The refresh updates the cache
+            self.wizard.api.get.return_value = [{"name": "New",
+                                                 "slug": "new"}]
+            self.wizard._refresh_listing(
+                *thread_mock.call_args[1]['args']
+            )
+            self.assertEqual(self.wizard.get_organizations(),
+                             [("new", "New")])
+        self.assertEqual(self.wizard.api.get.call_count, 2)
+
     @patch('txclib.wizard.os.path.isfile')
     def test_run(self, api_mock, isfile_mock):
         isfile_mock.return_value = True
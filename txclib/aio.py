@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+An asyncio based engine for the queued requests.
+
+The requests queued with `utils.queue_request` are sent from a single thread,
+keeping up to `concurrency` of them in flight at once, fewer while the server
+throttles them. This needs Python 3.6+
+and aiohttp (pip install transifex-client[async]); use it through
+`utils.perform_parallel_requests(use_async=True)`.
+"""
+import asyncio
+import ssl
+import tempfile
+
+import aiohttp
+from urllib3.exceptions import HTTPError, SSLError
+from urllib3.filepost import encode_multipart_formdata
+
+from txclib import utils
+from txclib.log import logger
+from txclib.web import certs_file
+
+CHUNK_SIZE = 64 * 1024
+# Bodies of responses larger than this are spooled to disk
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class SpooledResponse(object):
+    """
+    A response whose body has been read into a spooled temporary file.
+
+    It provides the parts of the urllib3 response interface used by
+    `utils.parse_tx_response` and the callbacks of the queued requests.
+    """
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    @property
+    def data(self):
+        self._body.seek(0)
+        return self._body.read()
+
+    def stream(self, amt=CHUNK_SIZE):
+        self._body.seek(0)
+        chunk = self._body.read(amt)
+        while chunk:
+            yield chunk
+            chunk = self._body.read(amt)
+
+    def close(self):
+        self._body.close()
+
+
+class AdaptiveConcurrency(utils.AdaptiveConcurrency):
+    """
+    A utils.AdaptiveConcurrency for the coroutines of a single event loop,
+    which wait for their turn without blocking the loop.
+
+    It has to be created on the event loop it is used on.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._released = asyncio.Event()
+
+    async def acquire(self):
+        """Wait until another request can be sent."""
+        acquired, timeout = self._try_acquire()
+        while not acquired:
+            self._released.clear()
+            try:
+                await asyncio.wait_for(self._released.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            acquired, timeout = self._try_acquire()
+
+    def release(self, *args, **kwargs):
+        super().release(*args, **kwargs)
+        self._released.set()
+
+
+async def _read_chunks(body):
+    """Read a MultipartFileBody in chunks while it is being sent."""
+    chunk = body.read(CHUNK_SIZE)
+    while chunk:
+        yield chunk
+        chunk = body.read(CHUNK_SIZE)
+
+
+async def _send(session, method, url, headers, fields):
+    """Send a request and return its response as a SpooledResponse."""
+    kwargs = {'headers': dict(headers)}
+    if isinstance(fields, utils.MultipartFileBody):
+        kwargs['headers'].update(fields.headers)
+        kwargs['data'] = _read_chunks(fields)
+    elif fields and method in ('GET', 'HEAD', 'DELETE'):
+        kwargs['params'] = fields
+    elif fields:
+        body, content_type = encode_multipart_formdata(fields)
+        kwargs['headers']['Content-Type'] = content_type
+        kwargs['data'] = body
+
+    try:
+        async with session.request(method, url, **kwargs) as response:
+            body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            try:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    body.write(chunk)
+            except BaseException:
+                body.close()
+                raise
+            return SpooledResponse(response.status, response.headers, body)
+    except aiohttp.ClientSSLError as e:
+        # Raise the same errors as the urllib3 based requests
+        raise SSLError(str(e)) from e
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise HTTPError(str(e) or e.__class__.__name__) from e
+
+
+async def _send_with_retries(session, method, url, headers, fields,
+                             limiter=None):
+    """
+    Send a request, retrying it as long as the server is unavailable or
+    throttles it, like `utils.perform_single_request` does.
+
+    If an AdaptiveConcurrency `limiter` is given, every attempt waits for
+    its turn and reports back how the server responded.
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire()
+        response = None
+        try:
+            response = await _send(session, method, url, headers, fields)
+        finally:
+            if limiter is not None:
+                limiter.release_response(response)
+        delay = utils.get_retry_delay(method, response.status,
+                                      response.headers, attempt)
+        if delay is None:
+            return response
+        msg = "Server responded with HTTP code %s, retrying in %.1f seconds"
+        logger.debug(msg % (response.status, delay))
+        response.close()
+        if isinstance(fields, utils.MultipartFileBody):
+            fields.seek(0)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def perform_single_request(session, method, url, headers, fields,
+                                 manager, skip_decode, callback=None,
+                                 callback_args=None, stream=False,
+                                 limiter=None):
+    """
+    Perform a queued request and pass the result to the callback, if any,
+    like `utils.perform_single_request` does.
+
+    The `manager` of the queued request is not used.
+    """
+    callback_args = callback_args or {}
+    response = None
+    try:
+        response = await _send_with_retries(session, method, url, headers,
+                                            fields, limiter=limiter)
+        if stream and 200 <= response.status < 400:
+            if callback is not None:
+                callback_args.update({"response": response})
+                callback(**callback_args)
+            return None, None
+        r_value = utils.parse_tx_response(response, skip_decode)
+    except SSLError:
+        logger.error("Invalid SSL certificate")
+        raise
+    except HTTPError:
+        logger.error("HTTP error")
+        raise
+    except Exception as e:
+        logger.error(str(e))
+        raise
+    finally:
+        if response is not None:
+            response.close()
+        if isinstance(fields, utils.MultipartFileBody):
+            fields.close()
+
+    if callback is not None:
+        callback_args.update({"data": r_value[0],
+                              "charset": r_value[1]})
+        callback(**callback_args)
+    return r_value
+
+
+async def _perform_requests(requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = AdaptiveConcurrency(concurrency)
+    total = len(requests)
+    progress = {'done': 0}
+
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        ssl=ssl.create_default_context(cafile=certs_file())
+    )
+    # Like urllib3, do not time out long transfers
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     trust_env=True) as session:
+        async def run(request):
+            async with semaphore:
+                try:
+                    await perform_single_request(session, *request,
+                                                 limiter=limiter)
+                except Exception as e:
+                    return e
+                finally:
+                    progress['done'] += 1
+                    utils.update_progress(progress['done'], total)
+
+        utils.update_progress(0, total)
+        results = await asyncio.gather(*[run(r) for r in requests])
+    return [error for error in results if error is not None]
+
+
+def perform_requests(requests, concurrency=utils.DEFAULT_WORKERS):
+    """
+    Perform a list of requests, as queued by `utils.queue_request`, on a new
+    event loop with at most `concurrency` of them in flight.
+
+    Return a list with the exceptions raised by the failed requests.
+    """
+    if not requests:
+        return []
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(
+            _perform_requests(requests, concurrency)
+        )
+    finally:
+        loop.close()
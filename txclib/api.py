@@ -1,13 +1,39 @@
+import itertools
+import threading
+from collections import deque
+
 import six
 import requests
 
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from six.moves.urllib import parse as urlparse
 
 from txclib import utils
 from txclib.urls import API_URLS, HOSTNAMES
 from txclib.log import logger
 
 
+_SESSION = None
+# The header with the total number of items of paginated responses
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+
+
+def get_session():
+    """
+    Return the requests Session shared by all API calls of the process, so
+    that connections to the API hosts are kept alive and reused.
+    """
+    global _SESSION
+    if _SESSION is None:
+        utils.use_pyopenssl()
+        _SESSION = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=utils.POOL_MAXSIZE)
+        _SESSION.mount('http://', adapter)
+        _SESSION.mount('https://', adapter)
+    return _SESSION
+
+
 class Api(object):
 
     USERNAME = 'api'
@@ -39,6 +65,30 @@ class Api(object):
         Performs the GET API call specified by api_call and
         parses the response
         """
+        pages = self.iter_pages(api_call, *args, **kwargs)
+        all_data = next(pages)
+        for page in pages:
+            all_data.extend(page)
+        return all_data
+
+    def iterate(self, api_call, *args, **kwargs):
+        """
+        Performs the GET API call specified by api_call and yields the
+        items of its pages as they arrive, instead of collecting them
+        """
+        for page in self.iter_pages(api_call, *args, **kwargs):
+            for item in page:
+                yield item
+
+    def iter_pages(self, api_call, *args, **kwargs):
+        """
+        Performs the GET API call specified by api_call and yields the
+        parsed data of each page of the response.
+
+        If the links of the first page tell the urls of all pages, the rest
+        of them are fetched concurrently. Otherwise the pages are followed
+        one by one, fetching the next page while the current one is used.
+        """
         # mock response
         if api_call not in self.VALID_CALLS:
             raise Exception(
@@ -51,27 +101,143 @@ class Api(object):
         url = API_URLS[api_call] % kwargs
         url = "{}{}".format(hostname, url)
 
+        response = self._fetch(url)
+        while True:
+            page_urls = _page_urls(response)
+            if page_urls:
+                yield self._parse(response)
+                for page in self._fetch_pages(page_urls):
+                    yield page
+                return
+            next_page = response.links.get('next')
+            if not next_page:
+                yield self._parse(response)
+                return
+            pending = _Prefetch(self._fetch, next_page['url'])
+            yield self._parse(response)
+            response = pending.result()
+
+    def _fetch(self, url):
+        session = get_session()
         try:
-            response = requests.get(
+            response = session.get(
                 url, auth=HTTPBasicAuth(self.username, self.token)
             )
             response.raise_for_status()
-            all_data = response.json()
         except Exception as e:
             logger.debug(six.u(str(e)))
             raise
+        return response
 
-        next_page = response.links.get('next')
-        while next_page:
-            try:
-                response = requests.get(
-                    next_page['url'],
-                    auth=HTTPBasicAuth(self.USERNAME, self.token)
-                )
-                response.raise_for_status()
-                all_data.extend(response.json())
-                next_page = response.links.get('next')
-            except Exception as e:
-                logger.debug(six.u(str(e)))
-                raise
-        return all_data
+    @staticmethod
+    def _parse(response):
+        try:
+            return response.json()
+        except Exception as e:
+            logger.debug(six.u(str(e)))
+            raise
+
+    def _fetch_pages(self, urls):
+        """
+        Fetch and parse many pages concurrently and yield them in order, each
+        one as soon as it has arrived. At most DEFAULT_WORKERS pages are
+        fetched at a time.
+        """
+        def fetch_page(url):
+            return self._parse(self._fetch(url))
+
+        urls = iter(urls)
+        window = deque(
+            _Prefetch(fetch_page, url)
+            for url in itertools.islice(urls, utils.DEFAULT_WORKERS)
+        )
+        while window:
+            page = window.popleft().result()
+            for url in itertools.islice(urls, 1):
+                window.append(_Prefetch(fetch_page, url))
+            yield page
+
+
+class _Prefetch(object):
+    """Call a function on a background thread, to wait for it later."""
+
+    def __init__(self, func, *args):
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(func, args))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args):
+        try:
+            self._result = func(*args)
+        except Exception as e:
+            self._error = e
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _int_param(url, name):
+    """Return the integer value of a query parameter of the url, if any."""
+    query = dict(urlparse.parse_qsl(urlparse.urlsplit(url).query))
+    try:
+        return int(query[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def _with_param(url, name, value):
+    """Return the url with the value of a query parameter replaced."""
+    parts = list(urlparse.urlsplit(url))
+    query = urlparse.parse_qsl(parts[3], keep_blank_values=True)
+    parts[3] = urlparse.urlencode(
+        [(k, value if k == name else v) for k, v in query]
+    )
+    return urlparse.urlunsplit(parts)
+
+
+def _page_urls(response):
+    """
+    Return the urls of the remaining pages of a paginated response, if they
+    can be told from its links, or None.
+
+    This works for links with a `page` number and a link to the last page,
+    or with an `offset` and a `limit`, along with either a link to the last
+    page or the total number of items.
+    """
+    links = response.links
+    next_url = links.get('next', {}).get('url')
+    if not next_url:
+        return None
+    last_url = links.get('last', {}).get('url')
+    if _int_param(next_url, 'page') is not None:
+        name, step = 'page', 1
+    elif _int_param(next_url, 'offset') is not None:
+        name, step = 'offset', _int_param(next_url, 'limit')
+        if not step or step < 0:
+            return None
+    else:
+        return None
+
+    first = _int_param(next_url, name)
+    if last_url:
+        if (_with_param(last_url, name, first) !=
+                _with_param(next_url, name, first)):
+            # The links differ in more than the page
+            return None
+        last = _int_param(last_url, name)
+    elif name == 'offset':
+        try:
+            last = int(response.headers[TOTAL_COUNT_HEADER]) - 1
+        except (KeyError, TypeError, ValueError):
+            return None
+    else:
+        return None
+    if last is None or last < first:
+        return None
+    return [_with_param(next_url, name, value)
+            for value in range(first, last + 1, step)]
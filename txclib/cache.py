@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Local caches of the client, stored as JSON files.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from txclib import __version__, utils
+from txclib.log import logger
+
+DIGEST_CHUNK_SIZE = 64 * 1024
+# How long the table of the supported file formats is cached for, in seconds
+FORMATS_TTL = 24 * 60 * 60
+
+# The formats tables known to the process, the hosts they were fetched from
+# by it and the locks to fetch them, per host
+_FORMATS = {}
+_FORMATS_FETCHED = set()
+_FORMATS_LOCKS = {}
+_FORMATS_LOCK = threading.Lock()
+
+
+def file_digest(path):
+    """Return the SHA-1 hex digest of the contents of a file."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JsonCache(object):
+    """
+    A dict-like cache, stored in a JSON file.
+
+    The file is read on first access and only written back by `save`, if
+    anything changed. A missing or corrupted file results in an empty cache.
+    If `path` is None, the cache is kept in memory only. It is safe to use the
+    cache from multiple threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._data = None
+        self._dirty = False
+
+    def _load(self):
+        if self._data is not None:
+            return self._data
+        self._data = {}
+        if self.path is None or not os.path.exists(self.path):
+            return self._data
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError) as e:
+            logger.debug("Ignoring unreadable cache %s: %s" % (self.path, e))
+            return self._data
+        if isinstance(data, dict):
+            self._data = data
+        return self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._load()[key] = value
+            self._dirty = True
+
+    def delete(self, key):
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Write the cache to its file, replacing it atomically."""
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return
+            utils.mkdir_p(os.path.dirname(self.path))
+            tmp_path = "%s.%s.tmp" % (self.path, os.getpid())
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._data, f, indent=1, sort_keys=True)
+                utils.replace_file(tmp_path, self.path)
+            except (IOError, OSError) as e:
+                logger.warning("Could not save cache %s: %s" % (self.path, e))
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+            self._dirty = False
+
+
+class SyncState(JsonCache):
+    """
+    The state of the local translation files at their last sync with
+    Transifex, i.e. their last successful push or pull.
+
+    Entries are kept per resource and language and hold the SHA-1 digest and
+    the size of the file, along with the `last_update` of the translation in
+    Transifex at the time. This tells whether a file has changed since the
+    last sync, regardless of its modification time, and whether the
+    translation in Transifex has changed since then. Downloaded files also
+    keep the validators of the response, for conditional requests.
+    """
+
+    def get_entry(self, resource, lang):
+        return self.get(resource, {}).get(lang)
+
+    def is_unchanged(self, resource, lang, path):
+        """Return whether the file has the same contents as when it was last
+        synced for the resource and language.
+        """
+        entry = self.get_entry(resource, lang)
+        if not entry or not os.path.isfile(path):
+            return False
+        # Compare the sizes first, to avoid reading files that changed
+        if os.path.getsize(path) != entry.get('size'):
+            return False
+        return file_digest(path) == entry.get('sha1')
+
+    def is_synced(self, resource, lang, path, last_update):
+        """Return whether neither the file nor the translation in Transifex,
+        as told by its `last_update`, have changed since the last sync.
+        """
+        entry = self.get_entry(resource, lang)
+        if not entry or last_update is None or \
+                entry.get('last_update') != last_update:
+            return False
+        return self.is_unchanged(resource, lang, path)
+
+    def record(self, resource, lang, path, last_update=None, **extra):
+        """Record the current contents of the file as synced.
+
+        Any `extra` values that are not None are stored in the entry too.
+        """
+        entry = {
+            'sha1': file_digest(path),
+            'size': os.path.getsize(path),
+            'last_update': last_update,
+        }
+        entry.update((k, v) for k, v in extra.items() if v is not None)
+        with self._lock:
+            languages = dict(self.get(resource, {}))
+            languages[lang] = entry
+            self.set(resource, languages)
+
+
+class ExpiringCache(JsonCache):
+    """
+    A JsonCache whose entries expire `ttl` seconds after they were set.
+
+    It is meant for metadata fetched from Transifex, which rarely changes and
+    can be shared by all projects of the user. Entries set by another version
+    of the client are considered expired as well. Expired entries are dropped
+    when the cache is loaded.
+    """
+
+    def __init__(self, path, ttl):
+        super(ExpiringCache, self).__init__(path)
+        self.ttl = ttl
+
+    def _is_fresh(self, entry):
+        return (isinstance(entry, dict) and
+                entry.get('version') == __version__ and
+                0 <= time.time() - entry.get('time', 0) <= self.ttl)
+
+    def _load(self):
+        if self._data is None:
+            data = super(ExpiringCache, self)._load()
+            self._data = dict(
+                (k, v) for k, v in data.items() if self._is_fresh(v)
+            )
+        return self._data
+
+    def get(self, key, default=None):
+        entry = super(ExpiringCache, self).get(key)
+        if not self._is_fresh(entry):
+            return default
+        return entry.get('value', default)
+
+    def age(self, key):
+        """Return how many seconds ago an entry was set, or None if there is
+        no such entry or it has expired.
+        """
+        entry = super(ExpiringCache, self).get(key)
+        if not self._is_fresh(entry):
+            return None
+        return time.time() - entry['time']
+
+    def set(self, key, value):
+        super(ExpiringCache, self).set(key, {
+            'value': value, 'time': time.time(), 'version': __version__
+        })
+
+
+def get_formats(host, fetch, refresh=False):
+    """Return the table of the file formats supported by a Transifex host.
+
+    The table is kept in memory for the rest of the process and cached in
+    the user cache directory for FORMATS_TTL seconds. `fetch` is called to
+    get it from the host, only if neither cache has it or, with `refresh`,
+    if the process has not fetched it yet, e.g. because a cached table
+    lacks a format added since. Only the callers for the same host wait for
+    the table to be fetched.
+    """
+    with _FORMATS_LOCK:
+        lock = _FORMATS_LOCKS.setdefault(host, threading.Lock())
+    with lock:
+        if refresh and host not in _FORMATS_FETCHED:
+            _FORMATS.pop(host, None)
+        if host not in _FORMATS:
+            cache = ExpiringCache(
+                os.path.join(utils.get_cache_dir(), 'formats.json'),
+                FORMATS_TTL
+            )
+            formats = None if refresh else cache.get(host)
+            if formats is None:
+                formats = fetch()
+                _FORMATS_FETCHED.add(host)
+                cache.set(host, formats)
+                cache.save()
+            _FORMATS[host] = formats
+        return _FORMATS[host]
+
+
+def clear_formats():
+    """Forget the formats tables kept in memory."""
+    with _FORMATS_LOCK:
+        _FORMATS.clear()
+        _FORMATS_FETCHED.clear()
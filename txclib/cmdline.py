@@ -10,14 +10,6 @@ from txclib.parsers import tx_main_parser
 from txclib.exceptions import AuthenticationError
 
 
-# use pyOpenSSL if available
-try:
-    import urllib3.contrib.pyopenssl
-    urllib3.contrib.pyopenssl.inject_into_urllib3()
-except ImportError:
-    pass
-
-
 # This block ensures that ^C interrupts are handled quietly.
 try:
     import signal
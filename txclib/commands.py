@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 """
-In this file we have all the top level commands for the Transifex client. Since
-we're using a way to automatically list them and execute them, when adding code
-to this file you must take care of the following:
+In this file we have all the top level commands for the Transifex client. When
+adding code to this file you must take care of the following:
  * Added functions must begin with 'cmd_' followed by the actual name of the
-   command being used in the command line (e.g. cmd_init)
+   command being used in the command line (e.g. cmd_init), and they must be
+   registered in utils.COMMANDS, which is used to list and execute them
  * The description for each function that we display to the user is read from
    the func_doc attribute which reads the doc string. So, when adding
    docstring to a new function make sure you add an one-liner which is
@@ -28,12 +28,14 @@ from txclib.config import OrderedRawConfigParser
 from txclib.exceptions import UnInitializedError
 from txclib.parsers import delete_parser, help_parser, parse_csv_option, \
     status_parser, pull_parser, set_parser, push_parser, init_parser, \
-    MAPPING, MAPPINGREMOTE, MAPPINGBULK
+    wizard_parser, MAPPING, MAPPINGREMOTE, MAPPINGBULK
 from txclib.paths import posix_path
+from txclib.lazy import lazy_import
 from txclib.log import logger
-from txclib.wizard import Wizard
 from txclib import messages
 
+wizard = lazy_import('txclib.wizard')
+
 
 def cmd_init(argv, path_to_tx):
     """Initialize a new Transifex project."""
@@ -101,7 +103,13 @@ def cmd_set(argv, path_to_tx):
 def cmd_config(argv, path_to_tx, is_legacy=False):
     """Add local or remote files under Transifex"""
     from_wizard = False
-    if len(argv) == 0:
+    # The interactive wizard runs without other arguments than its own
+    parser = wizard_parser(is_legacy=is_legacy)
+    wizard_args, other_args = parser.parse_known_args(argv)
+    if wizard_args.refresh and other_args:
+        parser.error("--refresh can only be used with the interactive "
+                     "wizard, without other arguments.")
+    if not other_args:
         # since interactive wizard should be equivalent to auto-local
         # subcommand there are some default options that need to be set
         default_options = {
@@ -113,7 +121,9 @@ def cmd_config(argv, path_to_tx, is_legacy=False):
         }
         try:
             # Run the wizard and configure parse with the wizard inputs
-            wizard_options = Wizard(path_to_tx).run()
+            wizard_options = wizard.Wizard(
+                path_to_tx, refresh=wizard_args.refresh
+            ).run()
             wizard_options.update(default_options)
             options = Namespace(**wizard_options)
             parser = set_parser(is_legacy=is_legacy)
@@ -222,7 +232,13 @@ def _print_instructions(resource, path_to_tx):
 
 
 def subcommand_mapping_bulk(path_to_tx, options, **kwargs):
-    """Add local files for multiple resources under Transifex"""
+    """Add local files for multiple resources under Transifex
+
+    With --execute, all resources are configured on the same project and
+    the .tx/config file is written once, after all of them: the helpers given
+    a `prj` only change its configuration and leave saving it to the caller.
+    The files of all resources are looked up in a shared utils.FileIndex.
+    """
 
     if not options.file_extension.startswith('.'):
         file_extension = '.{}'.format(options.file_extension)
@@ -231,6 +247,9 @@ def subcommand_mapping_bulk(path_to_tx, options, **kwargs):
 
     curpath = os.path.join(path_to_tx, options.source_file_dir)
 
+    prj = project.Project(path_to_tx) if options.execute else None
+    # The project files are walked once for the expressions of all resources
+    index = utils.FileIndex()
     for root, dirs, files in os.walk(curpath):
         for file_name in files:
             if not file_name.endswith(file_extension):
@@ -260,17 +279,23 @@ def subcommand_mapping_bulk(path_to_tx, options, **kwargs):
             _auto_local(
                 path_to_tx, full_resource, options.source_language, expr,
                 source_file=source_file, execute=options.execute, regex=False,
+                prj=prj, index=index,
             )
 
             if options.execute:
                 _set_minimum_perc(full_resource, options.minimum_perc,
-                                  path_to_tx)
-                _set_mode(full_resource, options.mode, path_to_tx)
-                _set_type(full_resource, options.i18n_type, path_to_tx)
+                                  path_to_tx, prj=prj)
+                _set_mode(full_resource, options.mode, path_to_tx, prj=prj)
+                _set_type(full_resource, options.i18n_type, path_to_tx,
+                          prj=prj)
+
+    if prj is not None:
+        prj.save()
 
 
 def _auto_local(path_to_tx, resource, source_language, expression,
-                execute=False, source_file=None, regex=False):
+                execute=False, source_file=None, regex=False, prj=None,
+                index=None):
     """Auto configure local project."""
     # The path everything will be relative to
     curpath = os.path.abspath(os.curdir)
@@ -287,7 +312,8 @@ def _auto_local(path_to_tx, resource, source_language, expression,
     # First, let's construct a dictionary of all matching files.
     # Note: Only the last matching file of a language will be stored.
     translation_files = {}
-    for f_path, lang in utils.get_project_files(curpath, expression):
+    for f_path, lang in utils.get_project_files(curpath, expression,
+                                                index=index):
         if lang == source_language and not source_file:
             source_file = f_path
         else:
@@ -303,14 +329,16 @@ def _auto_local(path_to_tx, resource, source_language, expression,
                         source_file, path_to_tx)
                     ))
         _set_source_file(path_to_tx, resource, source_language,
-                         os.path.relpath(source_file, path_to_tx))
+                         os.path.relpath(source_file, path_to_tx), prj=prj)
     else:
         logger.info('\ntx set --source -r %(res)s -l %(lang)s %(file)s\n' % {
             'res': resource,
             'lang': source_language,
             'file': os.path.relpath(source_file, curpath)})
 
-    prj = project.Project(path_to_tx)
+    save = prj is None
+    if save:
+        prj = project.Project(path_to_tx)
 
     if execute:
         try:
@@ -336,7 +364,7 @@ def _auto_local(path_to_tx, resource, source_language, expression,
                 'lang': lang,
                 'file': os.path.relpath(f_path, curpath)})
 
-    if execute:
+    if execute and save:
         prj.save()
 
 
@@ -379,14 +407,22 @@ def _auto_remote(path_to_tx, url):
     else:
         raise Exception("Url '%s' is not recognized." % url)
 
+    # Fetch the details of all resources concurrently
+    workers = prj._get_workers()
+    utils.set_pool_maxsize(workers)
+    tasks = []
     for resource in resources:
-        logger.info("Configuring resource %s." % resource)
         proj, res = resource.split('.')
-        res_info = utils.get_details(
-            'resource_details',
-            username, password,
-            hostname=vars['hostname'],
-            project=proj, resource=res)
+        tasks.append((utils.get_details,
+                      ('resource_details', username, password),
+                      {'hostname': vars['hostname'], 'project': proj,
+                       'resource': res}))
+    results = utils.run_in_parallel(tasks, workers=workers)
+
+    for resource, (res_info, error) in zip(resources, results):
+        if error is not None:
+            raise error
+        logger.info("Configuring resource %s." % resource)
         try:
             source_lang = res_info['source_language_code']
             i18n_type = res_info['i18n_type']
@@ -427,7 +463,8 @@ def cmd_push(argv, path_to_tx):
         translations=options.push_translations,
         no_interactive=options.no_interactive,
         xliff=xliff, branch=branch, parallel=parallel,
-        use_git_timestamps=use_git_timestamps,
+        use_git_timestamps=use_git_timestamps, workers=options.workers,
+        use_async=options.use_async,
     )
     logger.info("Done.")
 
@@ -460,12 +497,13 @@ def cmd_pull(argv, path_to_tx):
         force=options.force, skip=skip, minimum_perc=minimum_perc,
         mode=options.mode, pseudo=pseudo, xliff=xliff, branch=branch,
         parallel=parallel, no_interactive=options.no_interactive,
-        use_git_timestamps=use_git_timestamps
+        use_git_timestamps=use_git_timestamps, workers=options.workers,
+        use_async=options.use_async
     )
     logger.info("Done.")
 
 
-def _set_source_file(path_to_tx, resource, lang, path_to_file):
+def _set_source_file(path_to_tx, resource, lang, path_to_file, prj=None):
     """Reusable method to set source file."""
     proj, res = resource.split('.')
     if not proj or not res:
@@ -482,8 +520,9 @@ def _set_source_file(path_to_tx, resource, lang, path_to_file):
         raise Exception("tx: File ( %s ) does not exist." %
                         os.path.join(path_to_tx, path_to_file))
 
-    # instantiate the project.Project
-    prj = project.Project(path_to_tx)
+    save = prj is None
+    if save:
+        prj = project.Project(path_to_tx)
     root_dir = os.path.abspath(path_to_tx)
 
     if root_dir not in os.path.normpath(os.path.abspath(path_to_file)):
@@ -494,8 +533,6 @@ def _set_source_file(path_to_tx, resource, lang, path_to_file):
 
     path_to_file = os.path.relpath(path_to_file, root_dir)
 
-    prj = project.Project(path_to_tx)
-
     # FIXME: Check also if the path to source file already exists.
     try:
         try:
@@ -510,7 +547,8 @@ def _set_source_file(path_to_tx, resource, lang, path_to_file):
         )
         prj.config.set("%s.%s" % (proj, res), "source_lang", lang)
 
-    prj.save()
+    if save:
+        prj.save()
 
 
 def _set_translation(path_to_tx, resource, lang, path_to_file):
@@ -558,14 +596,16 @@ def cmd_status(argv, path_to_tx):
     resources = parse_csv_option(options.resources)
     prj = project.Project(path_to_tx)
     resources = prj.get_chosen_resources(resources)
+    prj.preload_resource_files(resources)
     resources_num = len(resources)
     for idx, res in enumerate(resources):
         p, r = res.split('.')
         print("%s -> %s (%s of %s)" % (p, r, idx + 1, resources_num))
         print("Translation Files:")
-        slang = prj.get_resource_option(res, 'source_lang')
-        sfile = prj.get_resource_option(res, 'source_file') or "N/A"
-        lang_map = prj.get_resource_lang_mapping(res)
+        settings = prj.get_resource_settings(res)
+        slang = settings.source_lang
+        sfile = settings.source_file or "N/A"
+        lang_map = settings.lang_map
         print(" - %s: %s (%s)" % (utils.color_text(slang, "RED"),
               sfile, utils.color_text("source", "YELLOW")))
         files = prj.get_resource_files(res)
@@ -618,7 +658,8 @@ def cmd_delete(argv, path_to_tx):
     skip = options.skip_errors
     force = options.force_delete
     prj = project.Project(path_to_tx)
-    prj.delete(resources, languages, skip, force)
+    prj.delete(resources, languages, skip, force, parallel=options.parallel,
+               workers=options.workers, use_async=options.use_async)
     logger.info("Done.")
 
 
@@ -639,25 +680,26 @@ def _go_to_dir(path):
     os.chdir(path)
 
 
-def _set_minimum_perc(resource, value, path_to_tx):
+def _set_minimum_perc(resource, value, path_to_tx, prj=None):
     """Set the minimum percentage in the .tx/config file."""
     args = (resource, 'minimum_perc', value, path_to_tx, 'set_min_perc')
-    _set_project_option(*args)
+    _set_project_option(*args, prj=prj)
 
 
-def _set_mode(resource, value, path_to_tx):
+def _set_mode(resource, value, path_to_tx, prj=None):
     """Set the mode in the .tx/config file."""
     args = (resource, 'mode', value, path_to_tx, 'set_default_mode')
-    _set_project_option(*args)
+    _set_project_option(*args, prj=prj)
 
 
-def _set_type(resource, value, path_to_tx):
+def _set_type(resource, value, path_to_tx, prj=None):
     """Set the i18n type in the .tx/config file."""
     args = (resource, 'type', value, path_to_tx, 'set_i18n_type')
-    _set_project_option(*args)
+    _set_project_option(*args, prj=prj)
 
 
-def _set_project_option(resource, name, value, path_to_tx, func_name):
+def _set_project_option(resource, name, value, path_to_tx, func_name,
+                        prj=None):
     """Save the option to the project configuration file."""
     if value is None:
         return
@@ -667,6 +709,9 @@ def _set_project_option(resource, name, value, path_to_tx, func_name):
     else:
         logger.debug("Setting the %s for resource %s." % (name, resource))
         resources = [resource, ]
+    if prj is not None:
+        getattr(prj, func_name)(resources, value)
+        return
     prj = project.Project(path_to_tx)
     getattr(prj, func_name)(resources, value)
     prj.save()
@@ -6,6 +6,7 @@ except ImportError:
 import six
 
 from txclib.exceptions import MalformedConfigFile
+from txclib.paths import native_path
 
 
 class OrderedRawConfigParser(configparser.RawConfigParser):
@@ -32,6 +33,30 @@ class OrderedRawConfigParser(configparser.RawConfigParser):
 
     optionxform = str
 
+    def snapshot(self):
+        """Return the defaults and the sections of the configuration as
+        plain data, which can be serialized with marshal.
+        """
+        return {
+            'defaults': list(self._defaults.items()),
+            'sections': [(section, list(options.items()))
+                         for section, options in self._sections.items()],
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Create a configuration from the result of `snapshot`."""
+        config = cls()
+        config._defaults.update(snapshot['defaults'])
+        for section, options in snapshot['sections']:
+            config._sections[section] = config._dict(options)
+            if hasattr(config, '_proxies'):
+                # Python 3 keeps a proxy for each section
+                config._proxies[section] = configparser.SectionProxy(
+                    config, section
+                )
+        return config
+
 
 _NOTFOUND = object()
 
@@ -125,6 +150,98 @@ class Flipdict(dict):
         dict.clear(self._flip)
 
 
+def parse_lang_map(value):
+    """Parse a lang_map option, e.g. "pt_PT: pt, de_DE: de", to a Flipdict
+    of the remote language codes to the local ones.
+    """
+    lang_map = Flipdict()
+    try:
+        for arg in value.replace(' ', '').split(','):
+            k, v = arg.split(":")
+            lang_map.update({k: v})
+    except ValueError:
+        raise MalformedConfigFile(
+            "Your lang map configuration is not correct.")
+    return lang_map
+
+
+class ResourceSettings(object):
+    """
+    The settings of a resource in the .tx/config file, read at once.
+
+    Options that are not set for the resource fall back to the main section,
+    where the configuration allows it. The settings do not change after they
+    are read; Project.get_resource_settings reads them again after the
+    configuration is modified through the project.
+
+    Attributes:
+        resource: The full name of the resource, i.e. project.resource.
+        source_lang: The source language code, or None.
+        source_file: The source file, or None.
+        file_filter: The file filter of the translation files, or None.
+        lang_map: A Flipdict of the remote language codes to the local ones,
+            for both the main section and the resource. Do not modify it.
+        trans: A tuple of the (language code, native path) tuples of the
+            translation files set with trans.<lang> options, in the order of
+            the configuration.
+        minimum_perc: The minimum translated percentage, an int.
+        mode: The default pull mode, or None.
+        type: The i18n type, or None.
+    """
+
+    __slots__ = ('resource', 'source_lang', 'source_file', 'file_filter',
+                 'lang_map', 'trans', 'minimum_perc', 'mode', 'type')
+
+    def __init__(self, config, resource):
+        main = {}
+        if config.has_section('main'):
+            main = dict(config.items('main'))
+        options = {}
+        trans = []
+        if config.has_section(resource):
+            for name, value in config.items(resource):
+                options[name] = value
+                if name.startswith('trans.'):
+                    trans.append((name.split('.')[1], native_path(value)))
+
+        lang_map = Flipdict()
+        if 'lang_map' in main:
+            lang_map.update(parse_lang_map(main['lang_map']))
+        if 'lang_map' in options:
+            lang_map.update(parse_lang_map(options['lang_map']))
+
+        try:
+            minimum_perc = int(
+                options.get('minimum_perc') or main.get('minimum_perc') or 0
+            )
+        except ValueError:
+            raise MalformedConfigFile(
+                "The minimum_perc of %s is not a number." % resource)
+
+        values = {
+            'resource': resource,
+            'source_lang': options.get('source_lang'),
+            'source_file': options.get('source_file') or None,
+            'file_filter': options.get('file_filter'),
+            'lang_map': lang_map,
+            'trans': tuple(trans),
+            'minimum_perc': minimum_perc,
+            'mode': options.get('mode', main.get('mode')),
+            'type': options.get('type', main.get('type')),
+        }
+        for name, value in six.iteritems(values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ResourceSettings are read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("ResourceSettings are read-only")
+
+    def __repr__(self):
+        return "<ResourceSettings %s>" % self.resource
+
+
 import os
 import ssl
 
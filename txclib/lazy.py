@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Lazily imported modules.
+
+Some dependencies take a noticeable time to import, while most commands
+never use them (e.g. `tx status` needs neither git nor requests). Modules
+imported with `lazy_import` are only imported the first time one of their
+attributes is used, so that each command only pays for what it uses.
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    A stand-in for a module that imports it on first attribute access.
+
+    Setting or deleting attributes, e.g. with mock.patch, applies to the
+    module itself.
+    """
+
+    def __init__(self, name):
+        # Python 2 only accepts native strings as module names
+        super(LazyModule, self).__init__(str(name))
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return "<lazy module %r>" % self.__name__
+
+
+def lazy_import(name):
+    """Return the module with the given name, importing it on first use."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
@@ -12,6 +12,10 @@ MAPPING, MAPPINGREMOTE, MAPPINGBULK = (
     'mapping', 'mapping-remote', 'mapping-bulk'
 )
 
+ASYNC_HELP = ("perform the requests in parallel from a single thread, using "
+              "asyncio. Requires Python 3.6+ and aiohttp.")
+
+
 def check_file_exists(file=None):
     if file and not os.path.isfile(file):
         raise argparse.ArgumentTypeError(
@@ -75,7 +79,9 @@ def delete_parser():
         "\nExamples:\n"
         "To delete a translation:\n"
         "$ tx delete -r project.resource -l <lang_code>\n\n"
-        "To delete a resource:\n  $ tx delete -r project.resource\n"
+        "To delete a resource:\n  $ tx delete -r project.resource\n\n"
+        "To delete many resources concurrently:\n"
+        "  $ tx delete -r 'project.*' --parallel\n"
     )
     parser = ArgumentParser(description=description, epilog=epilog,
                             formatter_class=RawDescriptionHelpFormatter)
@@ -95,6 +101,15 @@ def delete_parser():
         "-f", "--force", action="store_true", dest="force_delete",
         default=False, help="Delete an entity forcefully."
     )
+    parser.add_argument("--parallel", action="store_true", default=False,
+                        help="perform delete requests in parallel")
+    parser.add_argument("--workers", action="store", type=int,
+                        dest="workers", default=None,
+                        help="Specify the maximum number of concurrent "
+                        "requests to use with --parallel (default: 10).")
+    parser.add_argument("--async", action="store_true", dest="use_async",
+                        default=False,
+                        help=ASYNC_HELP)
     return parser
 
 
@@ -218,6 +233,13 @@ def pull_parser():
                         "file as xliff.")
     parser.add_argument("--parallel", action="store_true", default=False,
                         help="perform push/pull requests in parallel")
+    parser.add_argument("--workers", action="store", type=int,
+                        dest="workers", default=None,
+                        help="Specify the maximum number of concurrent "
+                        "requests to use with --parallel (default: 10).")
+    parser.add_argument("--async", action="store_true", dest="use_async",
+                        default=False,
+                        help=ASYNC_HELP)
     parser.add_argument("--no-interactive", action="store_true",
                         dest="no_interactive", default=False,
                         help="Don't require user input.")
@@ -275,6 +297,13 @@ def push_parser():
     )
     parser.add_argument("--parallel", action="store_true", default=False,
                         help="perform push/pull requests in parallel")
+    parser.add_argument("--workers", action="store", type=int,
+                        dest="workers", default=None,
+                        help="Specify the maximum number of concurrent "
+                        "requests to use with --parallel (default: 10).")
+    parser.add_argument("--async", action="store_true", dest="use_async",
+                        default=False,
+                        help=ASYNC_HELP)
     return parser
 
 
@@ -320,6 +349,31 @@ def set_extra_parser():
     return extra_parser
 
 
+def set_wizard_parser():
+    wizard_parser = ArgumentParser(add_help=False)
+    wizard_parser.add_argument(
+        "--refresh", action="store_true", dest="refresh", default=False,
+        help=("Reload the organizations and projects that the interactive "
+              "wizard has cached. It can only be used without other "
+              "arguments.")
+    )
+    return wizard_parser
+
+
+def wizard_parser(is_legacy=False):
+    """Return the command-line parser for the interactive wizard of the
+    config command.
+    """
+    description = "Run the interactive wizard to map a local file to a "\
+        "resource."
+    prog = 'tx config'
+    if is_legacy:
+        prog = 'tx set'
+    # The help of the wizard is part of the help of the config command
+    return ArgumentParser(prog=prog, description=description,
+                          parents=[set_wizard_parser()], add_help=False)
+
+
 def set_parser(subparser=False, is_legacy=False):
     """Return the command-line parser for the config command."""
     set_warning = ""
@@ -340,9 +394,12 @@ def set_parser(subparser=False, is_legacy=False):
         "To set the source file:\n\
         $ %(prog)s -r project.resource --source -l en <file>\n\n"\
         "To set a single translation file:\n\
-        $ %(prog)s -r project.resource -l de <file>\n".format(
-        autolocal=MAPPING, autoremote=MAPPINGREMOTE, bulk=MAPPINGBULK
-    )
+        $ %(prog)s -r project.resource -l de <file>\n\n"\
+        "Run %(prog)s without arguments to use the interactive wizard. Add "\
+        "--refresh\nto reload the organizations and projects it has cached."\
+        "\n".format(
+            autolocal=MAPPING, autoremote=MAPPINGREMOTE, bulk=MAPPINGBULK
+        )
     auto_local_description = "This command can be used to create a mapping "\
                              "for a local file using the path expression "\
                              "argument to automatically detect source and "\
@@ -374,7 +431,7 @@ def set_parser(subparser=False, is_legacy=False):
     if subparser:
         parents = []
     else:
-        parents = [main_parser, extra_parser]
+        parents = [main_parser, extra_parser, set_wizard_parser()]
 
     prog = 'tx config'
     if is_legacy:
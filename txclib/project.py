@@ -4,7 +4,6 @@ import os
 import fnmatch
 import datetime
 import time
-import urllib3
 import six
 
 try:
@@ -18,12 +17,8 @@ try:
 except ImportError:
     import ConfigParser as configparser
 
-from requests.exceptions import HTTPError
-from slugify import slugify
-
-from txclib import web
-from txclib import api
 from txclib import utils
+from txclib.cache import ExpiringCache, SyncState, get_formats
 from txclib import messages
 from urllib3.exceptions import SSLError
 from six.moves import input
@@ -32,17 +27,26 @@ from txclib.exceptions import (
     TransifexrcConfigFileError
 )
 from txclib.urls import API_URLS
-from txclib.config import Flipdict, CERT_REQUIRED
+from txclib.config import ResourceSettings
+from txclib.lazy import lazy_import
 from txclib.log import logger
 from txclib.paths import native_path, posix_sep
 from txclib.utils import ProjectNotInit, perform_parallel_requests
 
+api = lazy_import('txclib.api')
+requests = lazy_import('requests')
+slugify = lazy_import('slugify')
+
 
 DEFAULT_PULL_URL = 'pull_file'
 PULL_MODE_URL_NAME = "pull_{mode}_file"
 
 DEFAULT_API_HOSTNAME = "https://api.transifex.com"
-API_USERNAME = api.Api.USERNAME
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# How long the details of remote resources are cached for, in seconds
+RESOURCE_DETAILS_TTL = 24 * 60 * 60
+# The username of token authentication, i.e. api.Api.USERNAME
+API_USERNAME = 'api'
 
 
 class Project(object):
@@ -55,6 +59,13 @@ class Project(object):
 
     def __init__(self, path_to_tx=None, init=True):
         """Initialize the Project attributes."""
+        self._host_credentials = {}
+        self._state = None
+        self._resource_details = None
+        self._file_index = utils.FileIndex()
+        self._matched_files = {}
+        self._files_added = False
+        self._settings = {}
         if init:
             self._init(path_to_tx)
 
@@ -70,15 +81,6 @@ class Project(object):
         except ProjectNotInit:
             logger.error(instructions)
             raise
-        host = self.config.get('main', 'host')
-        if host.lower().startswith('https://'):
-            self.conn = urllib3.connection_from_url(
-                host,
-                cert_reqs=CERT_REQUIRED,
-                ca_certs=web.certs_file()
-            )
-        else:
-            self.conn = urllib3.connection_from_url(host)
 
     def validate_config(self):
         """To ensure the json structure is correctly formed."""
@@ -92,7 +94,7 @@ class Project(object):
                 path_to_tx=self.txrc_file, host=host
             ).get('auth_check')
             return True
-        except HTTPError as e:
+        except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401:
                 return False
             raise
@@ -173,9 +175,34 @@ class Project(object):
             self._add_host_to_config_file(host)
             self.txrc.set(host, 'username', username)
             self.txrc.set(host, 'password', password)
+            self._host_credentials.pop(host, None)
             self.save()
         return username, password
 
+    def _get_host_credentials(self, host, no_interactive=False):
+        """Return the username, password and hostname to use for a host.
+
+        They are resolved only once per host and then reused for every
+        request of the run.
+        """
+        try:
+            return self._host_credentials[host]
+        except KeyError:
+            pass
+        username, password = self.getset_host_credentials(
+            host, no_interactive=no_interactive
+        )
+        try:
+            hostname = self.txrc.get(host, 'hostname')
+        except configparser.NoSectionError:
+            raise TransifexrcConfigFileError(
+                "No entry found for host %s. Edit"
+                " ~/.transifexrc and add the appropriate"
+                " info in there." % host
+            )
+        self._host_credentials[host] = (username, password, hostname)
+        return username, password, hostname
+
     def _add_host_to_config_file(self, host):
         """Check if a given host exists in .transifexrc, and if not it
         updates the file with the appropriate info.
@@ -228,6 +255,7 @@ class Project(object):
         self.config.set(resource, 'type', i18n_type)
         if host != self.config.get('main', 'host'):
             self.config.set(resource, 'host', host)
+        self._settings.pop(resource, None)
 
     def get_resource_host(self, resource):
         """Return the host that the resource is configured to use.
@@ -235,55 +263,36 @@ class Project(object):
         """
         return self.config.get('main', 'host')
 
-    def get_resource_lang_mapping(self, resource):
-        """Get language mappings for a specific resource."""
-        lang_map = Flipdict()
-        try:
-            args = self.config.get("main", "lang_map")
-            for arg in args.replace(' ', '').split(','):
-                k, v = arg.split(":")
-                lang_map.update({k: v})
-        except configparser.NoOptionError:
-            pass
-        except ValueError:
-            raise MalformedConfigFile(
-                "Your lang map configuration is not correct.")
-
-        res_lang_map = Flipdict()
-        if self.config.has_section(resource):
-            try:
-                args = self.config.get(resource, "lang_map")
-                for arg in args.replace(' ', '').split(','):
-                    k, v = arg.split(":")
-                    res_lang_map.update({k: v})
-            except configparser.NoOptionError:
-                pass
-            except ValueError:
-                raise MalformedConfigFile(
-                    "Your lang map configuration is not correct.")
+    def get_resource_settings(self, resource):
+        """Return the ResourceSettings of a resource.
 
-        # merge the lang maps and return result
-        lang_map.update(res_lang_map)
+        They are read once from the configuration, until it is saved or
+        modified through the project.
+        """
+        settings = self._settings.get(resource)
+        if settings is None:
+            settings = ResourceSettings(self.config, resource)
+            self._settings[resource] = settings
+        return settings
 
-        return lang_map
+    def get_resource_lang_mapping(self, resource):
+        """Get language mappings for a specific resource."""
+        return self.get_resource_settings(resource).lang_map.copy()
 
     def get_source_file(self, resource):
         """Get source file for a resource."""
         if self.config.has_section(resource):
-            source_lang = self.config.get(resource, "source_lang")
-            source_file = self.get_resource_option(resource, 'source_file')\
-                or None
-
-            if source_file is None:
-                try:
-                    file_filter = self.config.get(resource, "file_filter")
-                    filename = file_filter.replace('<lang>', source_lang)
+            settings = self.get_resource_settings(resource)
+            if settings.source_file is None:
+                if settings.file_filter is not None and \
+                        settings.source_lang is not None:
+                    filename = settings.file_filter.replace(
+                        '<lang>', settings.source_lang
+                    )
                     if os.path.exists(filename):
                         return native_path(filename)
-                except configparser.NoOptionError:
-                    pass
             else:
-                return native_path(source_file)
+                return native_path(settings.source_file)
 
     def get_resource_files(self, resource, xliff=False):
         """Get a dict for all files assigned to a resource.
@@ -299,45 +308,58 @@ class Project(object):
         """
         tr_files = {}
         if self.config.has_section(resource):
-            try:
-                file_filter = self.config.get(resource, "file_filter")
-            except configparser.NoOptionError:
-                file_filter = "$^"
-            if xliff:
-                # update the file-path in case of xliff option
-                file_filter += '.xlf'
-            source_lang = self.config.get(resource, "source_lang")
+            if (resource, xliff) not in self._matched_files:
+                self.preload_resource_files([resource], xliff=xliff)
+            settings = self.get_resource_settings(resource)
             source_file = self.get_source_file(resource)
-            matched_files = utils.get_project_files(self.root, file_filter)
+            matched_files = self._matched_files[(resource, xliff)]
             for f_path, lang in matched_files:
-                if lang != source_lang:
+                if lang != settings.source_lang:
                     f_path = os.path.relpath(f_path, self.root)
                     if f_path != source_file:
                         tr_files.update({lang: f_path})
 
-            for (name, value) in self.config.items(resource):
-                if name.startswith("trans."):
-                    value = native_path(value)
-                    lang = name.split('.')[1]
-                    # delete language which has same file
-                    if value in list(tr_files.values()):
-                        keys = []
-                        for k, v in six.iteritems(tr_files):
-                            if v == value:
-                                keys.append(k)
-                        if len(keys) == 1:
-                            del tr_files[keys[0]]
-                        else:
-                            raise Exception("Your configuration seems wrong. "
-                                            "You have multiple languages "
-                                            "pointing to the same file.")
-                    # Add language with correct file
-                    tr_files.update({lang: value})
+            for lang, value in settings.trans:
+                # delete language which has same file
+                if value in list(tr_files.values()):
+                    keys = []
+                    for k, v in six.iteritems(tr_files):
+                        if v == value:
+                            keys.append(k)
+                    if len(keys) == 1:
+                        del tr_files[keys[0]]
+                    else:
+                        raise Exception("Your configuration seems wrong. "
+                                        "You have multiple languages "
+                                        "pointing to the same file.")
+                # Add language with correct file
+                tr_files.update({lang: value})
 
             return tr_files
 
         return None
 
+    def preload_resource_files(self, resources, xliff=False):
+        """Match the files of the project against the file filters of many
+        resources at once, for the following calls to get_resource_files.
+        """
+        expressions = {}
+        for resource in resources:
+            if not self.config.has_section(resource):
+                continue
+            file_filter = self.get_resource_settings(resource).file_filter
+            if file_filter is None:
+                file_filter = "$^"
+            if xliff:
+                # update the file-path in case of xliff option
+                file_filter += '.xlf'
+            expressions[resource] = file_filter
+        matched_files = utils.match_project_files(
+            self.root, expressions, index=self._file_index
+        )
+        for resource, files in matched_files.items():
+            self._matched_files[(resource, xliff)] = files
+
     def get_resource_option(self, resource, option):
         """Return the requested option for a specific resource
 
@@ -373,6 +395,30 @@ class Project(object):
         """
         utils.save_tx_config(self.config_file, self.config)
         utils.save_txrc_file(self.txrc_file, self.txrc)
+        self._settings.clear()
+
+    @property
+    def state(self):
+        """The state of the translation files at their last sync, kept in the
+        .tx/state file of the project.
+        """
+        if self._state is None:
+            root = getattr(self, 'root', None)
+            path = os.path.join(root, '.tx', 'state') if root else None
+            self._state = SyncState(path)
+        return self._state
+
+    @property
+    def resource_details(self):
+        """A cache of the details of remote resources, shared by all
+        projects of the user.
+        """
+        if self._resource_details is None:
+            self._resource_details = ExpiringCache(
+                os.path.join(utils.get_cache_dir(), 'resource_details.json'),
+                RESOURCE_DETAILS_TTL
+            )
+        return self._resource_details
 
     def get_full_path(self, relpath):
         if relpath[0] == os.path.sep:
@@ -388,47 +434,75 @@ class Project(object):
         """ Return the resource slug prefixed by the branch name.
         """
 
-        return '{branch}--{resource}'.format(branch=slugify(branch),
+        return '{branch}--{resource}'.format(branch=slugify.slugify(branch),
                                              resource=resource_slug)
 
     def pull(self, languages=None, resources=None, overwrite=True,
              fetchall=False, fetchsource=False, force=False, skip=False,
              minimum_perc=0, mode=None, pseudo=False, xliff=False, branch=None,
-             parallel=False, no_interactive=False, use_git_timestamps=False):
-        """Pull all translations file from Transifex server."""
+             parallel=False, no_interactive=False, use_git_timestamps=False,
+             workers=None, use_async=False):
+        """Pull all translations file from Transifex server.
+
+        With `use_async`, the files are downloaded in parallel on an asyncio
+        event loop instead of a pool of threads.
+        """
         languages = languages or []
         resources = resources or []
+        parallel = self._use_parallel(parallel, use_async)
 
         self.minimum_perc = minimum_perc
         resource_list = self.get_chosen_resources(resources)
-        skip_decode = False
+        self.preload_resource_files(resource_list)
+        if parallel:
+            utils.set_pool_maxsize(self._get_workers(workers))
         params = {}
 
         url = self._get_url_by_pull_mode(mode=mode)
 
+        prefetched = {}
+        if parallel:
+            # Fetch the details only of the resources with an unknown type
+            details = set(
+                resource for resource in resource_list
+                if self._known_i18n_type(
+                    resource, self._resource_url_info(resource, branch)
+                ) is None
+            )
+            prefetched = self._prefetch_resource_metadata(
+                resource_list, branch=branch, details=details,
+                no_interactive=no_interactive, workers=workers
+            )
+
         for resource in resource_list:
             logger.debug("Handling resource %s" % resource)
             self.resource = resource
             project_slug, resource_slug = resource.split('.', 1)
             if branch:
                 resource_slug = self._slug_with_branch(resource_slug, branch)
+            settings = self.get_resource_settings(resource)
             files = self.get_resource_files(resource)
-            slang = self.get_resource_option(resource, 'source_lang')
+            slang = settings.source_lang
             sfile = self.get_source_file(resource)
-            lang_map = self.get_resource_lang_mapping(resource)
+            lang_map = settings.lang_map
             host = self.get_resource_host(resource)
             logger.debug("Language mapping is: %s" % lang_map)
             if mode is None:
-                mode = self._get_option(resource, 'mode')
+                mode = settings.mode
             self._set_url_info(host=host, project=project_slug,
                                resource=resource_slug)
             logger.debug("URL data are: %s" % self.url_info)
 
             try:
-                stats = self._get_stats_for_resource(
-                    no_interactive=no_interactive
+                stats = self._get_metadata(
+                    prefetched, resource, 'stats',
+                    lambda: self._get_stats_for_resource(
+                        no_interactive=no_interactive
+                    )
                 )
-                details_response, _ = self.do_url_request('resource_details')
+                if not stats:
+                    raise HttpNotFound("Resource not found")
+                i18n_type = self._get_i18n_type(resource, prefetched)
             except Exception as e:
                 if isinstance(e, HttpNotAuthorized):
                     logger.error("Request is not authorized.")
@@ -444,13 +518,8 @@ class Project(object):
                     logger.warn(msg % resource)
                     continue
 
-            details = utils.parse_json(details_response)
-            if details['i18n_type'] in self.SKIP_DECODE_I18N_TYPES:
-                skip_decode = True
-            try:
-                file_filter = self.config.get(resource, 'file_filter')
-            except configparser.NoOptionError:
-                file_filter = None
+            skip_decode = i18n_type in self.SKIP_DECODE_I18N_TYPES
+            file_filter = settings.file_filter
 
             # Pull source file
             pull_languages = set([])
@@ -553,10 +622,22 @@ class Project(object):
                     " -> %s: %s" % (utils.color_text(remote_lang, "RED"),
                                     local_file)
                 )
+                callback_args = {"local_file": local_file}
+                headers = None
+                if not xliff and overwrite:
+                    callback_args.update(self._sync_args(
+                        project_slug, resource_slug, remote_lang, stats
+                    ), url_name=url)
+                    if not force:
+                        headers = self._conditional_headers(
+                            callback_args['state_key'], remote_lang,
+                            local_file, url
+                        )
                 self.do_url_request(
                     url, language=remote_lang, skip_decode=skip_decode,
-                    params=params, parallel=parallel, callback=self._save_file,
-                    callback_args={"local_file": local_file}
+                    params=params, parallel=parallel, stream=True,
+                    headers=headers, callback=self._save_translation,
+                    callback_args=callback_args
                 )
 
             if new_translations:
@@ -602,42 +683,74 @@ class Project(object):
                                         local_file)
                     )
 
+                    callback_args = {"local_file": local_file}
+                    if not xliff:
+                        callback_args.update(self._sync_args(
+                            project_slug, resource_slug, remote_lang, stats
+                        ), url_name=url)
                     self.do_url_request(
                         url, language=remote_lang, skip_decode=skip_decode,
-                        params=params, parallel=parallel,
-                        callback=self._save_file,
-                        callback_args={"local_file": local_file}
+                        params=params, parallel=parallel, stream=True,
+                        callback=self._save_translation,
+                        callback_args=callback_args
                     )
 
         # Pull the queued resources
-        if parallel:
-            logger.info("Pulling resources...")
-            perform_parallel_requests()
+        try:
+            if parallel:
+                logger.info("Pulling resources...")
+                self._perform_queued_requests(skip=skip, workers=workers,
+                                              use_async=use_async)
+        finally:
+            self.state.save()
+            self.resource_details.save()
+            if self._files_added:
+                # Match the new files on the next lookup
+                self._file_index.clear()
+                self._matched_files = {}
+                self._files_added = False
 
     def push(self, source=False, translations=False, force=False,
              resources=None, languages=None, skip=False, no_interactive=False,
-             xliff=False, branch=None, parallel=False, use_git_timestamps=False):
-        """Push all the resources"""
+             xliff=False, branch=None, parallel=False, use_git_timestamps=False,
+             workers=None, use_async=False):
+        """Push all the resources
+
+        With `use_async`, the files are uploaded in parallel on an asyncio
+        event loop instead of a pool of threads.
+        """
         languages = languages or []
         resources = resources or []
+        parallel = self._use_parallel(parallel, use_async)
 
         resource_list = self.get_chosen_resources(resources)
+        self.preload_resource_files(resource_list, xliff=xliff)
         self.skip = skip
         self.force = force
+        if parallel:
+            utils.set_pool_maxsize(self._get_workers(workers))
 
         params = {}
         if xliff:
             params.update({'file_type': 'xliff'})
 
+        prefetched = {}
+        if parallel:
+            prefetched = self._prefetch_resource_metadata(
+                resource_list, branch=branch, details=not source,
+                no_interactive=no_interactive, workers=workers
+            )
+
         for resource in resource_list:
             push_languages = []
             project_slug, resource_slug = resource.split('.', 1)
             if branch:
                 resource_slug = self._slug_with_branch(resource_slug, branch)
+            settings = self.get_resource_settings(resource)
             files = self.get_resource_files(resource, xliff=xliff)
-            slang = self.get_resource_option(resource, 'source_lang')
+            slang = settings.source_lang
             sfile = self.get_source_file(resource)
-            lang_map = self.get_resource_lang_mapping(resource)
+            lang_map = settings.lang_map
             host = self.get_resource_host(resource)
             logger.debug("Language mapping is: %s" % lang_map)
             logger.debug("Using host %s" % host)
@@ -651,7 +764,9 @@ class Project(object):
                 message += " for branch {}".format(branch)
             logger.info(message)
 
-            stats = self._get_stats_for_resource()
+            stats = self._get_metadata(
+                prefetched, resource, 'stats', self._get_stats_for_resource
+            )
 
             if force and not no_interactive:
                 msg = ("Warning: By using --force, the uploaded files will "
@@ -704,7 +819,10 @@ class Project(object):
                         logger.error(e)
             else:
                 try:
-                    self.do_url_request('resource_details')
+                    self._get_metadata(
+                        prefetched, resource, 'details',
+                        lambda: self.do_url_request('resource_details')
+                    )
                 except Exception as e:
                     if isinstance(e, HttpNotAuthorized):
                         logger.error("Request is not authorized.")
@@ -751,6 +869,19 @@ class Project(object):
                         'force': force,
                         'use_git_timestamps': use_git_timestamps,
                     }
+                    sync_args = self._sync_args(
+                        project_slug, resource_slug, remote_lang, stats
+                    )
+                    if not force and self.state.is_synced(
+                            sync_args['state_key'], remote_lang,
+                            self.get_full_path(local_file),
+                            sync_args['last_update']):
+                        msg = ("Skipping '%s' translation (file: %s), it is "
+                               "unchanged since the last sync.")
+                        logger.info(msg % (utils.color_text(lang, "RED"),
+                                    local_file)
+                                    )
+                        continue
                     if not self._should_push_translation(**kwargs):
                         msg = "Skipping '%s' translation (file: %s)."
                         logger.info(msg % (utils.color_text(lang, "RED"),
@@ -773,6 +904,11 @@ class Project(object):
                                     )], language=remote_lang,
                             params=params,
                             parallel=parallel,
+                            callback=self._record_sync,
+                            callback_args=dict(
+                                sync_args,
+                                local_file=self.get_full_path(local_file)
+                            ),
                         )
                         logger.debug("Translation %s pushed." % remote_lang)
                     except utils.HttpNotFound:
@@ -800,48 +936,150 @@ class Project(object):
                             logger.error(e)
 
         # Push the queued resources
-        if parallel:
-            logger.info("Pushing resources...")
-            perform_parallel_requests()
+        try:
+            if parallel:
+                logger.info("Pushing resources...")
+                self._perform_queued_requests(skip=skip, workers=workers,
+                                              use_async=use_async)
+        finally:
+            self.state.save()
+
+    def _get_workers(self, workers=None):
+        """Return the number of workers to use for parallel requests.
 
-    def delete(self, resources=None, languages=None, skip=False, force=False):
-        """Delete translations."""
+        The value given in the command line takes precedence over the
+        `workers` option of the main section of the .tx/config file.
+        """
+        if workers is None:
+            workers = self.get_resource_option('main', 'workers')
+        if workers is None:
+            return utils.DEFAULT_WORKERS
+        try:
+            workers = int(workers)
+        except ValueError:
+            raise MalformedConfigFile(
+                "The workers option should be a positive integer.")
+        if workers < 1:
+            raise MalformedConfigFile(
+                "The workers option should be a positive integer.")
+        return workers
+
+    @staticmethod
+    def _use_parallel(parallel, use_async):
+        """Return whether to send the requests in parallel, which they are
+        with `use_async`.
+
+        Fail early, if asynchronous requests are not available.
+        """
+        if use_async:
+            utils.get_async_engine()
+            return True
+        return parallel
+
+    def _perform_queued_requests(self, skip=False, workers=None,
+                                 use_async=False):
+        """Send all queued requests and handle the failed ones."""
+        errors = perform_parallel_requests(workers=self._get_workers(workers),
+                                           use_async=use_async)
+        if not errors:
+            return
+        logger.error("%d of the queued requests failed." % len(errors))
+        for error in errors:
+            if isinstance(error, SSLError) or not skip:
+                raise error
+
+    def delete(self, resources=None, languages=None, skip=False, force=False,
+               parallel=False, workers=None, use_async=False):
+        """Delete resources or translations.
+
+        With `parallel`, the details of the resources are fetched and the
+        deletions are sent concurrently. The .tx/config file is saved once,
+        after all deletions.
+        """
         languages = languages or []
         resources = resources or []
+        parallel = self._use_parallel(parallel, use_async)
 
         resource_list = self.get_chosen_resources(resources)
         self.skip = skip
         self.force = force
+        self._deletions = {
+            'queued': [], 'deleted': [], 'skipped': [], 'failed': []
+        }
 
         if not languages:
             delete_func = self._delete_resource
         else:
             delete_func = self._delete_translations
 
-        for resource in resource_list:
-            project_slug, resource_slug = resource.split('.', 1)
-            host = self.get_resource_host(resource)
-            self._set_url_info(host=host, project=project_slug,
-                               resource=resource_slug)
-            logger.debug("URL data are: %s" % self.url_info)
-            try:
-                json, _ = self.do_url_request('project_details', project=self)
-            except Exception as e:
-                if isinstance(e, HttpNotAuthorized):
-                    logger.error("Request is not authorized.")
-                    continue
-                if isinstance(e, HttpNotFound):
-                    msg = "Resource %s doesn't exist on the server."
-                    logger.error(msg % resource)
+        prefetched = {}
+        if parallel:
+            utils.set_pool_maxsize(self._get_workers(workers))
+            prefetched = self._prefetch_resource_metadata(
+                resource_list, details=False, project_details=True,
+                workers=workers
+            )
+
+        # The details of each project, shared by all of its resources
+        projects = {}
+        try:
+            for resource in resource_list:
+                project_slug, resource_slug = resource.split('.', 1)
+                host = self.get_resource_host(resource)
+                self._set_url_info(host=host, project=project_slug,
+                                   resource=resource_slug)
+                logger.debug("URL data are: %s" % self.url_info)
+                key = (host, project_slug)
+                if key not in projects:
+                    projects[key] = self._load_project_details(prefetched,
+                                                               resource)
+                project_details, error = projects[key]
+                if error is not None:
+                    if isinstance(error, HttpNotAuthorized):
+                        logger.error("Request is not authorized.")
+                        self._deletions['failed'].append((resource, None))
+                        continue
+                    if isinstance(error, HttpNotFound):
+                        msg = "Resource %s doesn't exist on the server."
+                        logger.error(msg % resource)
+                        self._deletions['skipped'].append((resource, None))
+                        continue
+                    if isinstance(error, SSLError) or not skip:
+                        raise error
+                    self._deletions['failed'].append((resource, None))
                     continue
-                if isinstance(e, SSLError) or not skip:
-                    raise
 
-            project_details = utils.parse_json(json)
-            stats = self._get_stats_for_resource()
-            delete_func(project_details, resource, stats, languages)
+                stats = self._get_metadata(prefetched, resource, 'stats',
+                                           self._get_stats_for_resource)
+                delete_func(project_details, resource, stats, languages,
+                            parallel=parallel)
+
+            if parallel:
+                logger.info("Deleting...")
+                self._perform_queued_requests(skip=skip, workers=workers,
+                                              use_async=use_async)
+        finally:
+            self._finish_deletions()
+
+    def _load_project_details(self, prefetched, resource):
+        """Fetch the details of the project of a resource, unless they have
+        been prefetched.
+
+        Returns:
+            A (details, error) tuple with the parsed details of the project
+            or the error that occurred while fetching them.
+        """
+        try:
+            json, _ = self._get_metadata(
+                prefetched, resource, 'project_details',
+                lambda: self.do_url_request('project_details', project=self)
+            )
+        except Exception as e:
+            return None, e
+        return utils.parse_json(json), None
 
-    def _delete_resource(self, project_details, resource, stats, *args):
+    def _delete_resource(self, project_details, resource, stats,
+                         languages=None, parallel=False):
         """Delete a resource from Transifex."""
         project_slug, resource_slug = resource.split('.', 1)
         project_resource_slugs = [
@@ -852,9 +1090,10 @@ class Project(object):
             if not self.skip:
                 msg = "Skipping: %s : Resource does not exist."
                 logger.info(msg % resource)
+            self._deletions['skipped'].append((resource, None))
             return
         if not self.force:
-            slang = self.get_resource_option(resource, 'source_lang')
+            slang = self.get_resource_settings(resource).source_lang
             for language in stats:
                 if language == slang:
                     continue
@@ -865,35 +1104,27 @@ class Project(object):
                         "--force option to delete this resource."
                     )
                     logger.info(msg % (resource, language))
+                    self._deletions['skipped'].append((resource, None))
                     return
-        try:
-            self.do_url_request('delete_resource', method="DELETE")
-            self.config.remove_section(resource)
-            self.save()
-            msg = "Deleted resource %s of project %s."
-            logger.info(msg % (resource_slug, project_slug))
-        except Exception as e:
-            msg = "Unable to delete resource %s of project %s."
-            logger.error(msg % (resource_slug, project_slug))
-            if isinstance(e, SSLError) or not self.skip:
-                raise
+        self._send_deletion('delete_resource', resource, parallel=parallel)
 
-    def _delete_translations(self, project_details,
-                             resource, stats, languages):
+    def _delete_translations(self, project_details, resource, stats,
+                             languages, parallel=False):
         """Delete the specified translations for the specified resource."""
         logger.info("Deleting translations from resource %s:" % resource)
         for language in languages:
             self._delete_translation(
-                project_details, resource, stats, language
+                project_details, resource, stats, language, parallel=parallel
             )
 
-    def _delete_translation(self, project_details, resource, stats, language):
+    def _delete_translation(self, project_details, resource, stats, language,
+                            parallel=False):
         """Delete a specific translation from the specified resource."""
-        project_slug, resource_slug = resource.split('.', 1)
         if language not in stats:
             if not self.skip:
                 msg = "Skipping %s: Translation does not exist."
                 logger.warning(msg % (language))
+            self._deletions['skipped'].append((resource, language))
             return
         if not self.force:
             teams = project_details['teams']
@@ -904,6 +1135,7 @@ class Project(object):
                     "to delete this translation."
                 )
                 logger.warning(msg % language)
+                self._deletions['skipped'].append((resource, language))
                 return
             if int(stats[language]['translated_entities']) > 0:
                 msg = (
@@ -912,44 +1144,98 @@ class Project(object):
                     "this translation."
                 )
                 logger.warning(msg % language)
+                self._deletions['skipped'].append((resource, language))
                 return
-        try:
+        self._send_deletion('delete_translation', resource, language,
+                            parallel=parallel)
+
+    def _send_deletion(self, api_call, resource, language=None,
+                       parallel=False):
+        """Delete a resource or, if a `language` is given, a translation.
+
+        With `parallel`, the request is only queued.
+        """
+        item = (resource, language)
+        callback_args = {'resource': resource, 'language': language}
+        if parallel:
+            self._deletions['queued'].append(item)
             self.do_url_request(
-                'delete_translation', language=language, method="DELETE"
+                api_call, language=language, method="DELETE", parallel=True,
+                callback=self._record_deletion, callback_args=callback_args
             )
-            msg = "Deleted %s translations of resource %s of project %s."
-            logger.info(msg % (language, resource_slug, project_slug))
+            return
+        try:
+            self.do_url_request(api_call, language=language, method="DELETE")
         except Exception as e:
-            msg = "Unable to delete translation %s"
-            logger.error(msg % language)
+            if language is None:
+                project_slug, resource_slug = resource.split('.', 1)
+                msg = "Unable to delete resource %s of project %s."
+                logger.error(msg % (resource_slug, project_slug))
+            else:
+                msg = "Unable to delete translation %s"
+                logger.error(msg % language)
+            self._deletions['failed'].append(item)
             if isinstance(e, SSLError) or not self.skip:
                 raise
+            return
+        self._record_deletion(**callback_args)
+
+    def _record_deletion(self, resource, language=None, **kwargs):
+        """Record a successful deletion of a resource or a translation."""
+        project_slug, resource_slug = resource.split('.', 1)
+        if language is None:
+            msg = "Deleted resource %s of project %s."
+            logger.info(msg % (resource_slug, project_slug))
+        else:
+            msg = "Deleted %s translations of resource %s of project %s."
+            logger.info(msg % (language, resource_slug, project_slug))
+        self._deletions['deleted'].append((resource, language))
+
+    def _finish_deletions(self):
+        """Remove the deleted resources from the configuration, save it once
+        and log a summary of the deletions.
+        """
+        deletions = self._deletions
+        deleted = set(deletions['deleted'])
+        # Queued deletions without a result have failed
+        deletions['failed'].extend(
+            item for item in deletions['queued'] if item not in deleted
+        )
+        removed = 0
+        for resource, language in deletions['deleted']:
+            if language is None and self.config.remove_section(resource):
+                removed += 1
+        if removed:
+            self.save()
+        logger.info("%d deleted, %d skipped, %d failed." % (
+            len(deletions['deleted']), len(deletions['skipped']),
+            len(deletions['failed'])
+        ))
 
     def do_url_request(self, api_call, multipart=False, data=None,
                        files=None, method="GET", skip_decode=False,
                        params=None, parallel=False, no_interactive=False,
-                       **kwargs):
-        """Issues a url request."""
+                       url_info=None, stream=False, headers=None, **kwargs):
+        """Issues a url request.
+
+        The request targets the resource of `url_info`, which defaults to the
+        one set with `_set_url_info`. If `stream` is True, the callback
+        receives the open response instead of its decoded data. Any
+        `headers` are sent in addition to the default ones.
+        """
         files = files or []
         params = params or {}
+        url_info = url_info or self.url_info
 
         # Read the credentials from the config file (.transifexrc)
-        host = self.url_info['host']
-        username, passwd = self.getset_host_credentials(
+        host = url_info['host']
+        username, passwd, hostname = self._get_host_credentials(
             host, no_interactive=no_interactive
         )
-        try:
-            hostname = self.txrc.get(host, 'hostname')
-        except configparser.NoSectionError:
-            raise TransifexrcConfigFileError(
-                "No entry found for host %s. Edit"
-                " ~/.transifexrc and add the appropriate"
-                " info in there." % host
-            )
 
         # Create the Url
         kwargs['hostname'] = hostname
-        kwargs.update(self.url_info)
+        kwargs.update(url_info)
         url = API_URLS[api_call] % kwargs
 
         # in case of GET we need to add xliff option as get parameter
@@ -968,15 +1254,16 @@ class Project(object):
             for info, filename in files:
                 # FIXME: It works because we only pass to files argument
                 # only one item
-                name = os.path.basename(filename)
-                data = {
+                fields = {
                     "resource": info.split(';')[0],
                     "language": info.split(';')[1],
-                    "uploaded_file": (name, open(filename, 'rb').read())
                 }
                 # in case of PUT we add xliff option as form data
                 if method == 'PUT':
-                    data.update(params)
+                    fields.update(params)
+                data = utils.MultipartFileBody(
+                    fields, "uploaded_file", filename
+                )
 
         # Prepare the callback function and arguments
         cb = kwargs.get("callback", None)
@@ -985,11 +1272,13 @@ class Project(object):
         if parallel:
             return utils.queue_request(method, hostname, url, username, passwd,
                                        data, skip_decode=skip_decode,
-                                       callback=cb, callback_args=args)
+                                       callback=cb, callback_args=args,
+                                       stream=stream, extra_headers=headers)
 
         return utils.make_request(
             method, hostname, url, username, passwd, data,
-            skip_decode=skip_decode, callback=cb, callback_args=args
+            skip_decode=skip_decode, extra_headers=headers, callback=cb,
+            callback_args=args, stream=stream
         )
 
     def _should_update_translation(self, lang, stats, local_file, force=False,
@@ -1152,19 +1441,12 @@ class Project(object):
             True or False
         """
         cur = self._extract_completed(stats, mode)
-        option_name = 'minimum_perc'
         if self.minimum_perc is not None:
             minimum_percent = self.minimum_perc
         else:
-            global_minimum = int(
-                self.get_resource_option('main', option_name) or 0
-            )
-            resource_minimum = int(
-                self.get_resource_option(
-                    self.resource, option_name
-                ) or global_minimum
-            )
-            minimum_percent = resource_minimum
+            minimum_percent = self.get_resource_settings(
+                self.resource
+            ).minimum_perc
         return cur >= minimum_percent
 
     def _remote_is_newer(self, remote_updated, local_file, use_git_timestamps=False):
@@ -1263,11 +1545,12 @@ class Project(object):
                 new_translations.append(lang)
         return set(new_translations)
 
-    def _get_stats_for_resource(self, no_interactive=False):
+    def _get_stats_for_resource(self, no_interactive=False, url_info=None):
         """Get the statistics information for a resource."""
         try:
             r, charset = self.do_url_request(
-                'resource_stats', no_interactive=no_interactive
+                'resource_stats', no_interactive=no_interactive,
+                url_info=url_info
             )
             logger.debug("Statistics response is %s" % r)
             stats = utils.parse_json(r)
@@ -1279,6 +1562,128 @@ class Project(object):
             raise
         return stats
 
+    def _prefetch_resource_metadata(self, resources, branch=None,
+                                    details=True, no_interactive=False,
+                                    workers=None, project_details=False):
+        """Fetch the statistics and details of many resources concurrently.
+
+        Args:
+            resources: A list of resources.
+            branch: The branch the resources belong to, if any.
+            details: Whether to fetch the resource details as well, or the
+                collection of resources to fetch them for.
+            no_interactive: A boolean flag.
+            workers: The number of concurrent requests.
+            project_details: Whether to fetch the details of the project of
+                each resource as well. They are fetched once per project.
+        Returns:
+            A dict that maps each resource to a dict with a (result, error)
+            tuple for its 'stats', 'details' and 'project_details'.
+        """
+        # Each task is named after the list of resources its result is for
+        tasks, names = [], []
+        projects = {}
+        for resource in resources:
+            project_slug = resource.split('.', 1)[0]
+            url_info = self._resource_url_info(resource, branch)
+            # Resolve the credentials before starting the workers, since
+            # the user may have to be prompted for them.
+            self._get_host_credentials(
+                url_info['host'], no_interactive=no_interactive
+            )
+            tasks.append((self._get_stats_for_resource, (),
+                          {'no_interactive': no_interactive,
+                           'url_info': url_info}))
+            names.append(([resource], 'stats'))
+            if details is True or details and resource in details:
+                tasks.append((self.do_url_request, ('resource_details', ),
+                              {'no_interactive': no_interactive,
+                               'url_info': url_info}))
+                names.append(([resource], 'details'))
+            if project_details:
+                key = (url_info['host'], project_slug)
+                if key in projects:
+                    projects[key].append(resource)
+                    continue
+                projects[key] = [resource]
+                tasks.append((self.do_url_request, ('project_details', ),
+                              {'no_interactive': no_interactive,
+                               'url_info': url_info}))
+                names.append((projects[key], 'project_details'))
+
+        logger.info("Fetching details for %d resources..." % len(resources))
+        results = utils.run_in_parallel(
+            tasks, workers=self._get_workers(workers)
+        )
+        prefetched = {}
+        for (task_resources, name), result in zip(names, results):
+            for resource in task_resources:
+                prefetched.setdefault(resource, {})[name] = result
+        return prefetched
+
+    def _resource_url_info(self, resource, branch=None):
+        """Return the url info of a resource, on the given branch."""
+        project_slug, resource_slug = resource.split('.', 1)
+        if branch:
+            resource_slug = self._slug_with_branch(resource_slug, branch)
+        return {
+            'host': self.get_resource_host(resource),
+            'project': project_slug,
+            'resource': resource_slug,
+        }
+
+    @staticmethod
+    def _resource_details_key(url_info):
+        return "%(host)s/%(project)s/%(resource)s" % url_info
+
+    def _known_i18n_type(self, resource, url_info):
+        """Return the i18n type of a resource, if it is set in the
+        configuration or cached, without fetching the resource details.
+        """
+        i18n_type = self.get_resource_settings(resource).type
+        if i18n_type is None:
+            details = self.resource_details.get(
+                self._resource_details_key(url_info), {}
+            )
+            i18n_type = details.get('i18n_type')
+        return i18n_type
+
+    def _get_i18n_type(self, resource, prefetched=None):
+        """Return the i18n type of the resource of the current url info.
+
+        The resource details are only fetched if the type is neither set in
+        the configuration nor cached.
+        """
+        i18n_type = self._known_i18n_type(resource, self.url_info)
+        if i18n_type is not None:
+            return i18n_type
+        response, _ = self._get_metadata(
+            prefetched or {}, resource, 'details',
+            lambda: self.do_url_request('resource_details')
+        )
+        i18n_type = utils.parse_json(response)['i18n_type']
+        self.resource_details.set(
+            self._resource_details_key(self.url_info),
+            {'i18n_type': i18n_type}
+        )
+        return i18n_type
+
+    @staticmethod
+    def _get_metadata(prefetched, resource, name, fetch):
+        """Return the prefetched metadata of a resource.
+
+        If nothing was prefetched for the resource, call `fetch` instead.
+        Errors that happened while prefetching are raised here, so that they
+        are handled the same way as the ones of `fetch`.
+        """
+        try:
+            result, error = prefetched[resource][name]
+        except KeyError:
+            return fetch()
+        if error is not None:
+            raise error
+        return result
+
     def get_chosen_resources(self, resources):
         """Get the resources the user selected.
 
@@ -1342,10 +1747,20 @@ class Project(object):
             return (set(pull_languages), set(new_translations))
 
     def _extension_for(self, i18n_type):
-        """Return the extension used for the specified type."""
+        """Return the extension used for the specified type.
+
+        The formats are fetched from the host of the current url info once,
+        or once more if the cached ones do not include the type.
+        """
+        host = self.url_info['host']
+
+        def fetch():
+            return utils.parse_json(self.do_url_request('formats')[0])
+
         try:
-            json, charset = self.do_url_request('formats')
-            res = utils.parse_json(json)
+            res = get_formats(host, fetch)
+            if i18n_type not in res:
+                res = get_formats(host, fetch, refresh=True)
             return res[i18n_type]['file-extensions'].split(',')[0]
         except Exception as e:
             logger.warning(
@@ -1378,14 +1793,7 @@ class Project(object):
         api_call = 'create_resource'
 
         host = self.url_info['host']
-        try:
-            hostname = self.txrc.get(host, 'hostname')
-            username, passwd = self.getset_host_credentials(host)
-        except configparser.NoSectionError:
-            raise TransifexrcConfigFileError(
-                "No user credentials found for host %s. Edit "
-                "~/.transifexrc and add the appropriate "
-                "info in there." % host)
+        username, passwd, hostname = self._get_host_credentials(host)
 
         # Create the Url
         kwargs['hostname'] = hostname
@@ -1393,7 +1801,7 @@ class Project(object):
         kwargs['project'] = pslug
         url = (API_URLS[api_call] % kwargs)
 
-        i18n_type = self._get_option(resource, 'type')
+        i18n_type = self.get_resource_settings(resource).type
         if i18n_type is None:
             raise ConfigFileError(
                 "Please define the resource type in "
@@ -1401,15 +1809,14 @@ class Project(object):
                 "More info: http://bit.ly/txcconfig"
             )
 
-        name = os.path.basename(filename)
-        data = {
+        fields = {
             "slug": fileinfo.split(';')[0],
             "name": fileinfo.split(';')[0],
-            "uploaded_file": (name, open(filename, 'rb').read()),
             "i18n_type": i18n_type
         }
         if kwargs.get('branch'):
-            data.update({'category': kwargs['branch']})
+            fields.update({'category': kwargs['branch']})
+        data = utils.MultipartFileBody(fields, "uploaded_file", filename)
 
         r, charset = utils.make_request(
             method, hostname, url, username, passwd, data
@@ -1467,21 +1874,112 @@ class Project(object):
 
         If resources is empty. set the option globally.
         """
+        self._settings.clear()
         if not resources:
             self.config.set('main', key, value)
             return
         for r in resources:
             self.config.set(r, key, value)
 
+    def _sync_args(self, project_slug, resource_slug, lang, stats):
+        """Return the callback arguments to record the sync of a translation
+        file in the state of the project.
+
+        For a push, `last_update` is the one before the upload, so the next
+        push compares the timestamps of the files again, once Transifex
+        reports the update.
+        """
+        return {
+            'state_key': '%s.%s' % (project_slug, resource_slug),
+            'lang': lang,
+            'last_update': self._extract_updated(stats.get(lang, {})),
+        }
+
+    def _record_sync(self, local_file, state_key, lang, last_update=None,
+                     **kwargs):
+        """Callback to record that a local file has been synced."""
+        self.state.record(state_key, lang, local_file, last_update)
+
+    def _conditional_headers(self, state_key, lang, local_file, url_name):
+        """Return the headers to make the download of a translation
+        conditional, or None.
+
+        The validators (ETag and Last-Modified) of the last download of the
+        file are only used if they were returned for the same pull mode and
+        the local file has not been modified since.
+        """
+        entry = self.state.get_entry(state_key, lang)
+        if not entry or entry.get('url_name') != url_name:
+            return None
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        if not headers or \
+                not self.state.is_unchanged(state_key, lang, local_file):
+            return None
+        return headers
+
+    def _save_translation(self, local_file="", state_key=None, lang=None,
+                          last_update=None, url_name=None, response=None,
+                          **kwargs):
+        """Callback to save a pulled translation file and, if `state_key` is
+        given, record it as synced along with the validators of the
+        response.
+
+        A 304 (Not Modified) response to a conditional request leaves the
+        local file as it is.
+        """
+        if response is not None and response.status == 304:
+            logger.info("File %s is up to date." % local_file)
+            return
+        is_new = not os.path.exists(local_file)
+        self._save_file(local_file=local_file, response=response, **kwargs)
+        if is_new:
+            self._files_added = True
+        if state_key is None:
+            return
+        validators = {}
+        if response is not None:
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+        self.state.record(state_key, lang, local_file, last_update,
+                          url_name=url_name, **validators)
+
     @staticmethod
-    def _save_file(local_file="", charset=None, data=None):
+    def _save_file(local_file="", charset=None, data=None, response=None):
+        """Save the data of a response to the local file.
+
+        If an open `response` is given, its body is streamed to a temporary
+        file in chunks, which then replaces the local file (or the target of
+        a symlinked one) with the same permissions. The body is written as
+        received, since it is already in the charset the file should have.
+        """
         base_dir = os.path.split(local_file)[0]
         utils.mkdir_p(base_dir)
-        fd = open(local_file, 'wb')
-        if charset is not None:
-            data = data.encode(charset)
-        fd.write(data)
-        fd.close()
+        if response is None:
+            fd = open(local_file, 'wb')
+            if charset is not None:
+                data = data.encode(charset)
+            fd.write(data)
+            fd.close()
+            return
+
+        local_file = os.path.realpath(local_file)
+        tmp_file = "%s.part" % local_file
+        try:
+            with open(tmp_file, 'wb') as fd:
+                for chunk in response.stream(DOWNLOAD_CHUNK_SIZE):
+                    fd.write(chunk)
+            utils.copy_mode(local_file, tmp_file)
+            utils.replace_file(tmp_file, local_file)
+        except Exception:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
 
     def _set_url_info(self, host, project, resource):
         self.url_info = {
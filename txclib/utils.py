@@ -1,14 +1,19 @@
 from __future__ import unicode_literals
 import functools
+import importlib
+import marshal
 import os
 import sys
 import re
-import git
 import errno
+import stat
 import urllib3
 import collections
 import six
 import platform
+import random
+import threading
+import time
 import txclib
 
 try:
@@ -26,9 +31,11 @@ except ImportError:
     from urllib.parse import urljoin  # Python 3
 
 from email.parser import Parser
+from email.utils import mktime_tz, parsedate_tz
 from urllib3.exceptions import SSLError, HTTPError
-from six.moves import input
-from threading import Thread, current_thread, _MainThread
+from urllib3.fields import RequestField, guess_content_type
+from urllib3.filepost import choose_boundary
+from six.moves import input, queue
 from txclib.urls import API_URLS
 from txclib.exceptions import (
     UnknownCommandError, HttpNotFound, HttpNotAuthorized,
@@ -39,6 +46,9 @@ from txclib.web import user_agent_identifier, certs_file
 from txclib.log import logger
 from txclib.config import OrderedRawConfigParser, CERT_REQUIRED
 from txclib.processors import visit_hostname
+from txclib.lazy import lazy_import
+
+git = lazy_import('git')
 
 
 class ProjectNotInit(Exception):
@@ -50,7 +60,37 @@ DEFAULT_HOSTNAMES = {
     'api_hostname': 'https://api.transifex.com'
 }
 
-THREADS = []
+DEFAULT_WORKERS = 10
+
+# The parsed .tx/config file is cached in a file with this suffix, once the
+# configuration has not changed for CONFIG_CACHE_MIN_AGE seconds
+CONFIG_CACHE_SUFFIX = '.cache'
+CONFIG_CACHE_MIN_AGE = 2
+
+# The available commands, mapped to the "module:function" that implements
+# each of them
+COMMANDS = {
+    'config': 'txclib.commands:cmd_config',
+    'delete': 'txclib.commands:cmd_delete',
+    'help': 'txclib.commands:cmd_help',
+    'init': 'txclib.commands:cmd_init',
+    'pull': 'txclib.commands:cmd_pull',
+    'push': 'txclib.commands:cmd_push',
+    'set': 'txclib.commands:cmd_set',
+    'status': 'txclib.commands:cmd_status',
+}
+
+REQUESTS = []
+
+# Responses to retry, with exponential back-off. Only rate limited requests
+# are retried for methods that are not idempotent, as the server has not
+# processed them.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+THROTTLE_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+MAX_RETRIES = 5
+RETRY_BACKOFF = 0.5
+MAX_RETRY_DELAY = 60
 
 
 def get_base_dir():
@@ -133,14 +173,60 @@ def determine_charset(response):
     return "utf-8"
 
 
-def _prepare_url_request(host, username, password):
+POOL_MAXSIZE = DEFAULT_WORKERS
+
+_POOL_MANAGERS = {}
+_POOL_MANAGERS_LOCK = threading.Lock()
+_PYOPENSSL_CHECKED = False
+
+
+def set_pool_maxsize(maxsize):
     """
-    Return a ProxyManager object (as defined in urllib3 [1]) that can be used
-    to perform authorized requests to a specific host.
+    Set the number of connections to keep alive for each host.
+
+    This should match the number of requests we send concurrently, so that
+    every worker can reuse an open connection.
+    """
+    global POOL_MAXSIZE
+    with _POOL_MANAGERS_LOCK:
+        POOL_MAXSIZE = maxsize
+        for manager in _POOL_MANAGERS.values():
+            manager.connection_pool_kw['maxsize'] = maxsize
 
-    Authorization header is constructed and set using "username" and "password"
-    parameters. Also set the common HTTP headers that we want to be sent with
-    each request.
+
+def clear_pool_managers():
+    """Close all open connections and forget the pool managers."""
+    with _POOL_MANAGERS_LOCK:
+        for manager in _POOL_MANAGERS.values():
+            manager.clear()
+        _POOL_MANAGERS.clear()
+
+
+def use_pyopenssl():
+    """Make urllib3 use pyOpenSSL, if it is available.
+
+    This is done before the first request rather than on startup, since
+    pyOpenSSL takes a while to import.
+    """
+    global _PYOPENSSL_CHECKED
+    if _PYOPENSSL_CHECKED:
+        return
+    _PYOPENSSL_CHECKED = True
+    try:
+        import urllib3.contrib.pyopenssl
+        urllib3.contrib.pyopenssl.inject_into_urllib3()
+    except ImportError:
+        pass
+
+
+def _get_pool_manager(scheme):
+    """
+    Return the PoolManager or ProxyManager (as defined in urllib3 [1]) used
+    for all requests of the given scheme.
+
+    Managers are created once per process and keyed by the scheme, the proxy
+    and the CA bundle in use, so that all requests to a host share the same
+    keep-alive connections.
 
     [1]: http://urllib3.readthedocs.io/en/latest/reference/#urllib3.poolmanager.ProxyManager  # noqa
     """
@@ -156,41 +242,47 @@ def _prepare_url_request(host, username, password):
             fragment=parsed_proxy.fragment
         )
 
-    # Initialize http and https pool managers
-    num_pools = 1
-    managers = {}
-    if host.lower().startswith("http://"):
-        scheme = "http"
-        if os.environ.get("http_proxy"):
-            proxy_url = get_proxy_url(os.environ["http_proxy"], scheme)
-            managers["http"] = urllib3.ProxyManager(
+    env_proxy = os.environ.get("%s_proxy" % scheme) or None
+    ca_certs = certs_file() if scheme == "https" else None
+    key = (scheme, env_proxy, ca_certs)
+
+    with _POOL_MANAGERS_LOCK:
+        manager = _POOL_MANAGERS.get(key)
+        if manager is not None:
+            return manager
+
+        use_pyopenssl()
+        kwargs = {'num_pools': 10, 'maxsize': POOL_MAXSIZE}
+        if scheme == "https":
+            kwargs.update({'cert_reqs': CERT_REQUIRED, 'ca_certs': ca_certs})
+        if env_proxy:
+            proxy_url = get_proxy_url(env_proxy, scheme)
+            manager = urllib3.ProxyManager(
                 proxy_url=proxy_url.url,
                 proxy_headers=urllib3.util.make_headers(
                     user_agent=user_agent_identifier(),
                     proxy_basic_auth=proxy_url.auth),
-                num_pools=num_pools
+                **kwargs
             )
         else:
-            managers["http"] = urllib3.PoolManager(num_pools=num_pools)
+            manager = urllib3.PoolManager(**kwargs)
+        _POOL_MANAGERS[key] = manager
+        return manager
+
+
+def _prepare_url_request(host, username, password):
+    """
+    Return the headers and the pool manager that can be used to perform
+    authorized requests to a specific host.
+
+    Authorization header is constructed and set using "username" and "password"
+    parameters. Also set the common HTTP headers that we want to be sent with
+    each request.
+    """
+    if host.lower().startswith("http://"):
+        scheme = "http"
     elif host.lower().startswith("https://"):
         scheme = "https"
-        if os.environ.get("https_proxy"):
-            proxy_url = get_proxy_url(os.environ["https_proxy"], scheme)
-            managers["https"] = urllib3.ProxyManager(
-                proxy_url=proxy_url.url,
-                proxy_headers=urllib3.util.make_headers(
-                    user_agent=user_agent_identifier(),
-                    proxy_basic_auth=proxy_url.auth),
-                num_pools=num_pools,
-                cert_reqs=CERT_REQUIRED,
-                ca_certs=certs_file()
-            )
-        else:
-            managers["https"] = urllib3.PoolManager(
-                num_pools=num_pools,
-                cert_reqs=CERT_REQUIRED,
-                ca_certs=certs_file()
-            )
     else:
         raise Exception("Unknown scheme")
 
@@ -201,49 +293,52 @@ def _prepare_url_request(host, username, password):
         keep_alive=True
     )
 
-    manager = managers[scheme]
-
-    return headers, manager
+    return headers, _get_pool_manager(scheme)
 
 
 def queue_request(method, host, url, username, password, fields=None,
                   skip_decode=False, get_params=None, callback=None,
-                  callback_args=None):
+                  callback_args=None, stream=False, extra_headers=None):
     """
-    Add a request to the THREADS queue. Request will not be sent until the
+    Add a request to the REQUESTS queue. Request will not be sent until the
     'perform_parallel_requests' method is called.
     """
     get_params = get_params or {}
     callback_args = callback_args or {}
 
     headers, manager = _prepare_url_request(host, username, password)
+    headers = dict(headers)
+    headers.update(extra_headers or {})
     # All arguments must be bytes, not unicode
-    global THREADS
-    THREADS.append(Thread(target=perform_single_request,
-                          args=(method,
-                                urljoin(host, url),
-                                dict(headers),
-                                fields,
-                                manager,
-                                skip_decode,
-                                callback,
-                                callback_args)))
+    REQUESTS.append((method,
+                     urljoin(host, url),
+                     headers,
+                     fields,
+                     manager,
+                     skip_decode,
+                     callback,
+                     callback_args,
+                     stream))
 
 
 def make_request(method, host, url, username, password, fields=None,
-                 skip_decode=False, get_params=None, *args, **kwargs):
+                 skip_decode=False, get_params=None, extra_headers=None,
+                 *args, **kwargs):
     """
     Perform a request.
 
-    This is the (default) blocking method of making requests.
+    This is the (default) blocking method of making requests. Any
+    `extra_headers` are sent along with the common ones.
     """
     get_params = get_params or {}
 
     headers, manager = _prepare_url_request(host, username, password)
+    headers = dict(headers)
+    headers.update(extra_headers or {})
     # All arguments must be bytes, not unicode
     return perform_single_request(method,
                                   urljoin(host, url),
-                                  dict(headers),
+                                  headers,
                                   fields,
                                   manager,
                                   skip_decode,
@@ -251,42 +346,403 @@ def make_request(method, host, url, username, password, fields=None,
                                   **kwargs)
 
 
-def perform_parallel_requests():
+def run_in_parallel(tasks, workers=DEFAULT_WORKERS, progress=False):
+    """
+    Run a list of tasks on a fixed pool of worker threads.
+
+    Each task is a (function, args, kwargs) tuple. Workers pull the next task
+    from a shared queue as soon as they are done with the previous one, so a
+    slow task only keeps its own slot busy.
+
+    Return a list with a (result, exception) tuple for each task, in the order
+    the tasks were given. Exceptions raised by a task are not propagated; it is
+    up to the caller to decide what to do with them.
+    """
+    results = [None] * len(tasks)
+    if not tasks:
+        return results
+
+    pending = queue.Queue()
+    finished = queue.Queue()
+    for index, task in enumerate(tasks):
+        pending.put((index, task))
+
+    def worker():
+        while True:
+            try:
+                index, (func, args, kwargs) = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                outcome = (func(*args, **kwargs), None)
+            except Exception as e:
+                outcome = (None, e)
+            finished.put((index, outcome))
+
+    total = len(tasks)
+    threads = [threading.Thread(target=worker)
+               for _ in range(max(1, min(workers, total)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    if progress:
+        update_progress(0, total)
+    for completed in range(1, total + 1):
+        index, outcome = finished.get()
+        results[index] = outcome
+        if progress:
+            update_progress(completed, total)
+
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _parse_retry_after(value):
+    """
+    Return the seconds to wait according to a Retry-After header, given
+    either in seconds or as an HTTP date, or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        date = parsedate_tz(value)
+    except (TypeError, ValueError):
+        date = None
+    if date is None:
+        return None
+    return max(0.0, mktime_tz(date) - time.time())
+
+
+def get_retry_delay(method, status, headers, attempt):
     """
-    Perform a set of requests in parallel using threads. The requests are saved
-    in the global THREADS variable. We send requests in batches of 20 in order
-    to achieve optimal performance without hitting API limits.
+    Return the seconds to wait before retrying a request, after the given
+    `attempt` got a response with this status and headers, or None if the
+    request should not be retried.
+
+    The Retry-After header of the response is honoured. Otherwise the delay
+    grows exponentially with the attempts, with full jitter.
     """
-    global THREADS
+    if attempt >= MAX_RETRIES or status not in RETRY_STATUSES:
+        return None
+    if status != 429 and method.upper() not in IDEMPOTENT_METHODS:
+        return None
+    retry_after = _parse_retry_after(headers.get('Retry-After'))
+    if retry_after is not None:
+        return retry_after if retry_after <= MAX_RETRY_DELAY else None
+    return random.uniform(0, min(MAX_RETRY_DELAY,
+                                 RETRY_BACKOFF * 2 ** attempt))
 
-    if not THREADS:
-        return
 
-    total = len(THREADS)
-    completed = 0
-    update_progress(0, total)
+class AdaptiveConcurrency(object):
+    """
+    Limit the number of requests in flight, adapting the limit to how the
+    server responds (additive increase, multiplicative decrease).
+
+    The limit starts at `max_limit` and is halved when the server throttles
+    the requests (429 or 503 responses). It grows back by one request for
+    every `limit` other responses, however long they took, since the sizes
+    of the downloaded files differ too much for latency to tell congestion
+    apart. A Retry-After header on a throttled response pauses all requests.
+    """
+
+    # Seconds to wait between two decreases, so that the responses of the
+    # requests already in flight do not decrease the limit again.
+    DECREASE_COOLDOWN = 1.0
+
+    def __init__(self, max_limit, initial=None, min_limit=1):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        if initial is None:
+            initial = self.max_limit
+        self.limit = float(min(self.max_limit, max(min_limit, initial)))
+        self.in_flight = 0
+        self._paused_until = 0
+        self._last_decrease = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait until another request can be sent."""
+        with self._condition:
+            acquired, timeout = self._try_acquire()
+            while not acquired:
+                self._condition.wait(timeout)
+                acquired, timeout = self._try_acquire()
+
+    def _try_acquire(self):
+        """
+        Count another request in flight, if it can be sent now. Return
+        whether it was counted and otherwise how long to wait for, or None to
+        wait for a release.
+        """
+        wait = self._paused_until - time.time()
+        if wait <= 0 and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True, None
+        return False, (wait if wait > 0 else None)
+
+    def release(self, responded=True, throttled=False, retry_after=None):
+        """
+        Record the outcome of a request sent after `acquire`: whether the
+        server responded at all and whether it throttled the request.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            now = time.time()
+            if retry_after:
+                self._paused_until = max(self._paused_until,
+                                         now + retry_after)
+            if throttled:
+                self._decrease(0.5, now)
+            elif responded:
+                self.limit = min(self.max_limit,
+                                 self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def release_response(self, response):
+        """Release a request with its response, or None if it got none."""
+        if response is None:
+            self.release(responded=False)
+            return
+        throttled = response.status in THROTTLE_STATUSES
+        self.release(
+            throttled=throttled,
+            retry_after=throttled and _parse_retry_after(
+                response.headers.get('Retry-After')
+            )
+        )
 
-    while THREADS:
-        next_batch = THREADS[:10]
-        THREADS = THREADS[10:]
+    def _decrease(self, factor, now):
+        if now - self._last_decrease < self.DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
 
-        for thread in next_batch:
-            thread.start()
-        for thread in next_batch:
-            thread.join()
 
-        completed += len(next_batch)
-        update_progress(completed, total)
+def get_async_engine():
+    """
+    Return the module that performs requests on an asyncio event loop.
+
+    It needs Python 3.6+ and the aiohttp package, which is an optional
+    dependency.
+    """
+    try:
+        from txclib import aio
+    except (ImportError, SyntaxError):
+        raise Exception(
+            "Asynchronous requests need Python 3.6+ and the aiohttp package. "
+            "Install it with 'pip install transifex-client[async]'."
+        )
+    return aio
+
+
+def perform_parallel_requests(workers=DEFAULT_WORKERS, use_async=False):
+    """
+    Perform the requests saved in the global REQUESTS queue in parallel, using
+    a pool of `workers` threads.
+
+    If `use_async` is True, the requests are sent from a single thread
+    instead, with up to `workers` of them in flight on an asyncio event loop.
+    Either way, the requests in flight are limited by an
+    AdaptiveConcurrency.
+
+    Return a list with the exceptions raised by the failed requests.
+    """
+    global REQUESTS
+
+    requests, REQUESTS = REQUESTS, []
+    if not requests:
+        return []
+    if use_async:
+        return get_async_engine().perform_requests(requests,
+                                                   concurrency=workers)
+
+    limiter = AdaptiveConcurrency(workers)
+    tasks = [(perform_single_request, args, {'limiter': limiter})
+             for args in requests]
+    results = run_in_parallel(tasks, workers=workers, progress=True)
+    return [error for _, error in results if error is not None]
+
+
+class MultipartFileBody(object):
+    """
+    A multipart/form-data request body for uploading a file.
+
+    This is a file-like object that can be sent as the body of a request. The
+    file is read from disk in chunks while the request is being sent, so it is
+    never loaded in memory, and it is only opened once the upload starts.
+    """
+
+    def __init__(self, fields, file_field, path, boundary=None):
+        self.path = path
+        self.boundary = boundary or choose_boundary()
+
+        head = []
+        for name, value in fields.items():
+            head.append(self._render_part(RequestField.from_tuples(name,
+                                                                   value)))
+        filename = os.path.basename(path)
+        field = RequestField(file_field, None, filename=filename)
+        field.make_multipart(content_type=guess_content_type(filename))
+        head.append(self._render_part(field))
+
+        self._head = b''.join(head)
+        self._tail = ("\r\n--%s--\r\n" % self.boundary).encode('ascii')
+        self._file = None
+        self.seek(0)
+
+    def _render_part(self, field):
+        """Return the boundary, headers and data (if any) of a field."""
+        data = field.data
+        if data is None:
+            data = b''
+        elif isinstance(data, int):
+            data = str(data)
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        headers = field.render_headers().encode('utf-8')
+        part = ("--%s\r\n" % self.boundary).encode('ascii') + headers
+        if field.data is None:
+            return part
+        return part + data + b"\r\n"
+
+    @property
+    def headers(self):
+        """The Content-Type and Content-Length headers of the body."""
+        length = (len(self._head) + os.path.getsize(self.path) +
+                  len(self._tail))
+        return {
+            'Content-Type': "multipart/form-data; boundary=%s" % self.boundary,
+            'Content-Length': str(length),
+        }
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = None
+        chunks = []
+        while size is None or size > 0:
+            chunk = self._read_part(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self._position += len(chunk)
+            if size is not None:
+                size -= len(chunk)
+        return b''.join(chunks)
+
+    def _read_part(self, size):
+        """Read up to `size` bytes from the current part of the body."""
+        while self._part < 3:
+            if self._part == 1:
+                if self._file is None:
+                    self._file = open(self.path, 'rb')
+                chunk = self._file.read(-1 if size is None else size)
+                if chunk:
+                    return chunk
+                self.close()
+            else:
+                data = self._head if self._part == 0 else self._tail
+                end = len(data) if size is None else self._offset + size
+                chunk = data[self._offset:end]
+                if chunk:
+                    self._offset += len(chunk)
+                    return chunk
+            self._part += 1
+            self._offset = 0
+        return b''
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=0):
+        """Rewind the body, so that the request can be retried."""
+        if offset != 0 or whence != 0:
+            raise IOError("Only rewinding a multipart body is supported")
+        self.close()
+        self._part = 0
+        self._offset = 0
+        self._position = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _send_request(manager, method, url, request_kwargs, limiter=None):
+    """
+    Send a request and return its response, retrying it as long as the
+    server is unavailable or throttles it (see get_retry_delay).
+
+    If an AdaptiveConcurrency `limiter` is given, every attempt waits for
+    its turn and reports back how the server responded.
+    """
+    encoded_request = encode_args(manager.request)
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        response = None
+        try:
+            response = encoded_request(method, url, **request_kwargs)
+        finally:
+            if limiter is not None:
+                limiter.release_response(response)
+        if response.status not in RETRY_STATUSES:
+            return response
+        delay = get_retry_delay(method, response.status, response.headers,
+                                attempt)
+        if delay is None:
+            return response
+        msg = "Server responded with HTTP code %s, retrying in %.1f seconds"
+        logger.debug(msg % (response.status, delay))
+        response.close()
+        if 'body' in request_kwargs:
+            request_kwargs['body'].seek(0)
+        time.sleep(delay)
+        attempt += 1
 
 
 def perform_single_request(method, url, headers, fields, manager, skip_decode,
-                           callback=None, callback_args=None):
+                           callback=None, callback_args=None, stream=False,
+                           limiter=None):
+    """
+    Perform a request and pass the result to the callback, if any.
+
+    The `fields` are either a dict of form fields or a MultipartFileBody,
+    which is sent as the body of the request.
+
+    If `stream` is True, the body of a successful response is not read in
+    memory; the callback is called with the open `response` instead, so
+    that it can consume it in chunks.
+
+    Throttled requests and server errors are retried, see _send_request.
+    """
     callback_args = callback_args or {}
     response = None
+    if isinstance(fields, MultipartFileBody):
+        headers = dict(headers)
+        headers.update(fields.headers)
+        request_kwargs = {'headers': headers, 'body': fields}
+    else:
+        request_kwargs = {'headers': headers, 'fields': fields}
+    if stream:
+        request_kwargs['preload_content'] = False
 
     try:
-        encoded_request = encode_args(manager.request)
-        response = encoded_request(method, url, headers=headers, fields=fields)
+        response = _send_request(manager, method, url, request_kwargs,
+                                 limiter=limiter)
+        if stream and 200 <= response.status < 400:
+            r_value = None, None
+            if callback is not None:
+                callback_args.update({"response": response})
+                callback(**callback_args)
+            return r_value
         r_value = parse_tx_response(response, skip_decode)
     except SSLError:
         logger.error("Invalid SSL certificate")
@@ -296,12 +752,12 @@ def perform_single_request(method, url, headers, fields, manager, skip_decode,
         raise
     except Exception as e:
         logger.error(str(e))
-        if isinstance(current_thread(), _MainThread):
-            raise
-        return
+        raise
     finally:
         if response is not None:
             response.close()
+        if isinstance(fields, MultipartFileBody):
+            fields.close()
 
     if callback is not None:
         callback_args.update({"data": r_value[0],
@@ -328,7 +784,7 @@ def parse_tx_response(response, skip_decode):
             raise HttpNotAuthorized(data)
         elif response.status == 404:
             raise HttpNotFound(data)
-        elif response.status >= 500:
+        elif response.status == 429 or response.status >= 500:
             msg = "Failed to connect. Server responded with HTTP code {}"
             raise TXConnectionError(msg.format(response.status),
                                     code=response.status)
@@ -375,37 +831,49 @@ def valid_slug(slug):
     return re.match("^[A-Za-z0-9_-]+$", slug)
 
 
-def discover_commands():
+def get_command(command):
     """
-    Inspect commands.py and find all available commands
+    Return the function of the given command, importing only its module
     """
-    import inspect
-    from txclib import commands
-
-    command_table = {}
-    fns = inspect.getmembers(commands, inspect.isfunction)
+    try:
+        module_name, function_name = COMMANDS[command].split(':')
+    except KeyError:
+        raise UnknownCommandError
+    return getattr(importlib.import_module(module_name), function_name)
 
-    for name, fn in fns:
-        if name.startswith("cmd_"):
-            command_table.update({
-                name.split("cmd_")[1]: fn
-            })
 
-    return command_table
+def discover_commands():
+    """
+    Return a dict with the functions of all available commands
+    """
+    return dict((command, get_command(command)) for command in COMMANDS)
 
 
 def exec_command(command, *args, **kwargs):
     """
     Execute given command
     """
-    commands = discover_commands()
-    try:
-        cmd_fn = commands[command]
-    except KeyError:
-        raise UnknownCommandError
+    cmd_fn = get_command(command)
     cmd_fn(*args, **kwargs)
 
 
+def replace_file(src, dst):
+    """Rename src to dst, atomically replacing dst if it exists."""
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2 can't overwrite an existing file on Windows
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+def copy_mode(src, dst):
+    """Copy the permissions of src to dst, if src exists."""
+    if os.path.exists(src):
+        os.chmod(dst, stat.S_IMODE(os.stat(src).st_mode))
+
+
 def mkdir_p(path):
     try:
         if path:
@@ -477,11 +945,62 @@ def _can_walk(base, subdirectories):
     return "<lang>" not in subdirectories[0]
 
 
-def get_project_files(curpath, expression):
+def _walk_files(curpath, max_depth=50):
     """
-    Iterate over the files in the project that match the given expression.
-    Return a tuple with the absolute file path and the language code of the
-    language that is associated with it.
+    Walk the directory tree under `curpath`, following symbolic links, and
+    return a list with the path and the POSIX path of every file found.
+    """
+    files = []
+    initial_depth = curpath.count(os.sep)
+    for root, dirs, filenames in os.walk(curpath, followlinks=True):
+
+        # Don't visit any subdirectory
+        if root.count(os.sep) > initial_depth + max_depth:
+            del dirs[:]
+            continue
+
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            files.append((path, posix_path(path)))
+    return files
+
+
+class FileIndex(object):
+    """
+    The files found under the directories walked so far.
+
+    Matching several file filters against the same directory, like the file
+    filters of all resources of a project usually are, walks the directory
+    only once. Lookups for a subdirectory of a walked directory reuse the
+    files found there, too.
+    """
+
+    def __init__(self):
+        self._walks = {}
+
+    def files(self, curpath):
+        """
+        Return the path and the POSIX path of every file under `curpath`.
+        """
+        if curpath in self._walks:
+            return self._walks[curpath]
+        prefix = curpath.rstrip(os.sep) + os.sep
+        for walked, files in list(self._walks.items()):
+            if curpath.startswith(walked.rstrip(os.sep) + os.sep):
+                return [f for f in files if f[0].startswith(prefix)]
+        files = _walk_files(curpath)
+        self._walks[curpath] = files
+        return files
+
+    def clear(self):
+        """Forget the walked directories, e.g. after new files are added."""
+        self._walks = {}
+
+
+def _narrow_search_path(curpath, expression):
+    """
+    Return the directory to search for the files that match the given
+    expression and the part of the expression that is relative to it.
     """
     # Strip the reference to the current directory, if it exists
     if expression.startswith(".{}".format(os.sep)):
@@ -493,30 +1012,125 @@ def get_project_files(curpath, expression):
     while _can_walk(curpath, expression_parts):
         curpath = os.path.realpath(os.path.join(curpath, expression_parts[0]))
         expression_parts = expression_parts[1:]
-    expr_re = regex_from_filefilter(os.path.join(*expression_parts), curpath)
+    return curpath, os.path.join(*expression_parts)
+
+
+def _match_lang(match, expression):
+    """Return the language code captured by a file filter match."""
+    try:
+        return match.group(1)
+    except IndexError:
+        msg = ("File filter '{}' does not contain the '<lang>' "
+               "placeholder".format(expression))
+        raise MalformedConfigFile(msg)
+
+
+class FileFilterMatcher(object):
+    """
+    Match paths against many file filters at once.
+
+    The file filters are indexed by their literal parts before the first and
+    after the last <lang> placeholder. A path is looked up by its own prefix
+    and suffix of the same lengths, so it is only tested against the regexes
+    of the file filters it may actually match, instead of all of them.
+    """
+
+    def __init__(self):
+        self._prefixes = {}
+
+    def add(self, key, file_filter, root_path=os.path.curdir,
+            expression=None):
+        """
+        Add a file filter, relative to `root_path`. Matches of it are reported
+        with `key`. The original `expression` is used in error messages.
+        """
+        path = posix_path(os.path.join(root_path, native_path(file_filter)))
+        parts = path.split('<lang>')
+        prefix = parts[0]
+        suffix = parts[-1] if len(parts) > 1 else ''
+        regex = re.compile(regex_from_filefilter(file_filter, root_path))
+        suffixes = self._prefixes.setdefault(len(prefix), {}).setdefault(
+            prefix, {}
+        )
+        suffixes.setdefault(len(suffix), {}).setdefault(suffix, []).append(
+            (key, regex, expression or file_filter)
+        )
+
+    def match(self, path):
+        """
+        Return a list with the key and the language code of every file
+        filter that matches the given POSIX path.
+        """
+        matches = []
+        for prefix_length, prefixes in six.iteritems(self._prefixes):
+            suffixes = prefixes.get(path[:prefix_length])
+            if not suffixes:
+                continue
+            for suffix_length, candidates in six.iteritems(suffixes):
+                if prefix_length + suffix_length > len(path):
+                    continue
+                suffix = path[len(path) - suffix_length:]
+                for key, regex, expression in candidates.get(suffix, ()):
+                    match = regex.match(path)
+                    if match:
+                        matches.append((key, _match_lang(match, expression)))
+        return matches
+
+
+def get_project_files(curpath, expression, index=None):
+    """
+    Iterate over the files in the project that match the given expression.
+    Return a tuple with the absolute file path and the language code of the
+    language that is associated with it.
+
+    If a FileIndex is given, the files are looked up in it, instead of
+    walking the directory tree again.
+    """
+    curpath, file_filter = _narrow_search_path(curpath, expression)
+    expr_re = regex_from_filefilter(file_filter, curpath)
     expression_regex = re.compile(expr_re)
 
-    initial_depth = curpath.count(os.sep)
-    max_depth = 50
-    for root, dirs, files in os.walk(curpath, followlinks=True):
+    if index is not None:
+        files = index.files(curpath)
+    else:
+        files = _walk_files(curpath)
+    for path_to_match, posix_path_to_match in files:
+        match = expression_regex.match(posix_path_to_match)
+        if match:
+            lang = _match_lang(match, expression)
+            yield os.path.realpath(path_to_match), lang
 
-        # Don't visit any subdirectory
-        if root.count(os.sep) > initial_depth + max_depth:
-            del dirs[:]
-            continue
 
-        for file_path in files:
-            path_to_match = os.path.join(root, file_path)
-            full_path = os.path.realpath(os.path.join(root, file_path))
-            match = expression_regex.match(posix_path(path_to_match))
-            if match:
-                try:
-                    lang = match.group(1)
-                except IndexError:
-                    msg = ("File filter '{}' does not contain the '<lang>' "
-                           "placeholder".format(expression))
-                    raise MalformedConfigFile(msg)
-                yield full_path, lang
+def match_project_files(curpath, expressions, index=None):
+    """
+    Match the files in the project against many expressions at once.
+
+    `expressions` is a dict of expressions by key. Return a dict with a list
+    of the (absolute file path, language code) tuples that get_project_files
+    would return for each key. Every file is only tested against the
+    expressions it may match, see FileFilterMatcher.
+    """
+    index = index or FileIndex()
+    matcher = FileFilterMatcher()
+    search_paths = set()
+    for key, expression in expressions.items():
+        search_path, file_filter = _narrow_search_path(curpath, expression)
+        matcher.add(key, file_filter, search_path, expression)
+        search_paths.add(search_path)
+
+    # Directories under another search path are covered by its files
+    walked = []
+    for search_path in sorted(search_paths):
+        if not any(search_path.startswith(w.rstrip(os.sep) + os.sep)
+                   for w in walked):
+            walked.append(search_path)
+
+    results = dict((key, []) for key in expressions)
+    for search_path in walked:
+        for path, posix_path_to_match in index.files(search_path):
+            for key, lang in matcher.match(posix_path_to_match):
+                results[key].append((os.path.realpath(path), lang))
+    return results
 
 
 
@@ -540,7 +1154,7 @@ def _encode_anything(thing, encoding='utf-8', keys_as_unicode=False):
     if sys.version_info.major == 3:
         return thing
 
-    if isinstance(thing, str):
+    if isinstance(thing, (str, MultipartFileBody)):
         return thing
     elif isinstance(thing, unicode):
         return thing.encode(encoding)
@@ -585,16 +1199,77 @@ def get_tx_dir_path(path_to_tx):
 
 
 def read_config_file(config_file):
-    """Parse the configuration file and return its contents."""
+    """Parse the configuration file and return its contents.
+
+    The parsed contents of .tx/config files are cached in .tx/config.cache,
+    which is used for as long as the modification time and the size of the
+    configuration file do not change.
+    """
+    try:
+        file_stat = os.stat(config_file)
+    except OSError:
+        file_stat = None
+    cache_file = None
+    if file_stat is not None and \
+            os.path.basename(os.path.dirname(config_file)) == '.tx':
+        cache_file = config_file + CONFIG_CACHE_SUFFIX
+        config = _read_config_cache(cache_file, file_stat)
+        if config is not None:
+            return config
+
     config = OrderedRawConfigParser()
     try:
         config.read(config_file)
     except Exception as err:
         msg = "Cannot open/parse .tx/config file: %s" % err
         raise ProjectNotInit(msg)
+    if cache_file is not None:
+        _write_config_cache(cache_file, file_stat, config)
     return config
 
 
+def _config_cache_key(file_stat):
+    """Return what a config cache must match to be valid, for a
+    configuration file with the given os.stat result.
+    """
+    return [txclib.__version__, sys.hexversion, marshal.version,
+            getattr(file_stat, 'st_mtime_ns', file_stat.st_mtime),
+            file_stat.st_size]
+
+
+def _read_config_cache(cache_file, file_stat):
+    """Return the cached configuration, or None if it is missing or
+    outdated.
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            key, snapshot = marshal.load(f)
+        if key != _config_cache_key(file_stat):
+            return None
+        return OrderedRawConfigParser.from_snapshot(snapshot)
+    except Exception as e:
+        if os.path.exists(cache_file):
+            logger.debug("Ignoring config cache %s: %s" % (cache_file, e))
+        return None
+
+
+def _write_config_cache(cache_file, file_stat, config):
+    # A file changed within the resolution of its modification time may
+    # change again without a different modification time, so it is cached
+    # only once it is old enough.
+    if time.time() - file_stat.st_mtime < CONFIG_CACHE_MIN_AGE:
+        return
+    tmp_file = "%s.%s.tmp" % (cache_file, os.getpid())
+    try:
+        with open(tmp_file, 'wb') as f:
+            marshal.dump([_config_cache_key(file_stat), config.snapshot()], f)
+        replace_file(tmp_file, cache_file)
+    except (IOError, OSError, ValueError) as e:
+        logger.debug("Could not write config cache %s: %s" % (cache_file, e))
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
 def get_transifex_config(txrc_file):
     """Read the configuration from the .transifexrc files."""
     txrc = OrderedRawConfigParser()
@@ -608,15 +1283,20 @@ def get_transifex_config(txrc_file):
 
 
 def migrate_txrc_file(txrc_file, txrc):
-    """Migrate the txrc file, if needed."""
+    """Migrate the txrc file, if needed.
+
+    The file is only saved if anything was migrated.
+    """
     if not os.path.exists(txrc_file):
         return txrc
+    migrated = False
     for section in txrc.sections():
         try:
             txrc.get(section, 'api_hostname')
         except configparser.NoOptionError:
             txrc.set(section, 'api_hostname',
                      DEFAULT_HOSTNAMES['api_hostname'])
+            migrated = True
 
         orig_hostname = txrc.get(section, 'hostname')
         hostname = visit_hostname(orig_hostname)
@@ -626,14 +1306,27 @@ def migrate_txrc_file(txrc_file, txrc):
             if (sys.stdin.isatty() and sys.stdout.isatty() and
                     confirm('Change it now? ', default=True)):
                 txrc.set(section, 'hostname', hostname)
+                migrated = True
                 msg = 'Hostname changed'
                 logger.info(msg)
             else:
                 hostname = orig_hostname
+    if migrated:
         save_txrc_file(txrc_file, txrc)
     return txrc
 
 
+def get_cache_dir():
+    """Return the directory of the caches that are shared by all projects.
+
+    It is $XDG_CACHE_HOME/transifex, or ~/.cache/transifex by default.
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+    return os.path.join(cache_home, 'transifex')
+
+
 def get_transifex_file(directory=None):
     """Fetch the path of the .transifexrc file.
     It is in the home directory of the user by default.
@@ -662,10 +1355,22 @@ def get_transifex_file(directory=None):
 
 
 def save_tx_config(config_file, config):
-    """Save the local configuration file."""
-    fh = open(config_file, "w")
-    config.write(fh)
-    fh.close()
+    """Save the local configuration file.
+
+    The configuration is written to a temporary file first, which then
+    replaces the configuration file at once. A symlinked configuration file
+    is replaced at its target, and the permissions of the file are kept.
+    """
+    config_file = os.path.realpath(config_file)
+    tmp_file = "%s.%s.tmp" % (config_file, os.getpid())
+    try:
+        with open(tmp_file, "w") as fh:
+            config.write(fh)
+        copy_mode(config_file, tmp_file)
+        replace_file(tmp_file, config_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
 
 
 def save_txrc_file(txrc_file, txrc):
@@ -736,12 +1441,56 @@ def update_progress(done, total):
         sys.stdout.write('\n')
 
 
+_GIT_TIMESTAMPS = {}
+
+
+def _get_git_timestamps(repo):
+    """
+    Return a dict with the timestamp (epoch) of the latest commit of each file
+    in the history of a git repository, keyed by the real path of the file.
+
+    The history is read with a single `git log` call, and the result is kept
+    for the rest of the run.
+    """
+    root = repo.working_tree_dir
+    if root in _GIT_TIMESTAMPS:
+        return _GIT_TIMESTAMPS[root]
+
+    timestamps = {}
+    real_root = os.path.realpath(root)
+    try:
+        output = repo.git(c='core.quotepath=off').log(
+            '--format=%x00%at', '--name-only'
+        )
+    except git.GitCommandError as e:
+        logger.debug("Could not read the git history: %s" % e)
+        output = ''
+    timestamp = None
+    for line in output.splitlines():
+        if line.startswith('\x00'):
+            timestamp = int(line[1:])
+        elif line and timestamp is not None:
+            # The log is ordered from newest to oldest commit
+            path = os.path.normpath(os.path.join(real_root, line))
+            timestamps.setdefault(path, timestamp)
+    _GIT_TIMESTAMPS[root] = timestamps
+    return timestamps
+
+
+def clear_git_timestamps():
+    """Forget the git timestamps read so far."""
+    _GIT_TIMESTAMPS.clear()
+
+
 def get_git_file_timestamp(file_path):
     """
     Return the timestamp (epoch) for the latest commit of a file
     """
     try:
         repo = git.Repo()
+        if os.path.isfile(file_path):
+            timestamps = _get_git_timestamps(repo)
+            return timestamps.get(os.path.realpath(file_path))
         commits_touching_path = list(
             repo.iter_commits(paths=file_path, max_count=1)
         )
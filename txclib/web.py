@@ -2,8 +2,10 @@
 
 import os
 import platform
-from pkg_resources import resource_filename
 import txclib
+from txclib.lazy import lazy_import
+
+pkg_resources = lazy_import('pkg_resources')
 
 
 cacerts_file = None
@@ -44,4 +46,4 @@ def system_certs_file():
         for path in POSSIBLE_CA_BUNDLE_PATHS:
             if os.path.exists(path):
                 return path
-        return resource_filename(__name__, 'cacert.pem')
+        return pkg_resources.resource_filename(__name__, 'cacert.pem')
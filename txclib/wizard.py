@@ -1,15 +1,23 @@
+import hashlib
 import os
+import threading
 
 from slugify import slugify
 from txclib import messages
 from txclib import utils
 from txclib.api import Api
+from txclib.cache import ExpiringCache, get_formats
 from txclib.project import Project
 from txclib.log import logger
 from six.moves import input
 
 
 COLOR = "CYAN"
+# Cached listings of organizations and projects are used for up to
+# LISTINGS_MAX_AGE seconds and refreshed in the background once they are
+# older than LISTINGS_TTL seconds.
+LISTINGS_TTL = 60 * 60
+LISTINGS_MAX_AGE = 7 * 24 * 60 * 60
 
 try:
     import readline
@@ -74,7 +82,10 @@ def input_prompt(key, validation_method):
 
 class Wizard(object):
 
-    def __init__(self, path_to_tx):
+    def __init__(self, path_to_tx, refresh=False):
+        """If `refresh` is True, the cached listings of organizations and
+        projects are not used.
+        """
         p = Project(path_to_tx)
         self.host = p.config.get('main', 'host')
         username, token_or_password = p.getset_host_credentials(
@@ -82,10 +93,56 @@ class Wizard(object):
 
         self.api = Api(username=username, password=token_or_password,
                        host=self.host, path_to_tx=p.txrc_file)
+        self.refresh = refresh
+        # Identify the credentials in the cache without storing them
+        self.fingerprint = hashlib.sha256(
+            u'{}:{}'.format(username, token_or_password).encode('utf-8')
+        ).hexdigest()[:16]
+        self._listings = None
+
+    @property
+    def listings(self):
+        """The cache of the listings fetched from the API."""
+        if self._listings is None:
+            self._listings = ExpiringCache(
+                os.path.join(utils.get_cache_dir(), 'listings.json'),
+                LISTINGS_MAX_AGE
+            )
+        return self._listings
+
+    def get_listing(self, api_call, refresh=False, **kwargs):
+        """Return the result of an API call, from the cache if possible.
+
+        Cached results older than LISTINGS_TTL are returned as well, but they
+        are fetched again in the background for the next time.
+        """
+        params = [u'{}={}'.format(k, v) for k, v in sorted(kwargs.items())]
+        key = u' '.join([self.host, self.fingerprint, api_call] + params)
+        age = self.listings.age(key)
+        if age is None or refresh or self.refresh:
+            return self._fetch_listing(key, api_call, kwargs)
+        if age > LISTINGS_TTL:
+            thread = threading.Thread(target=self._refresh_listing,
+                                      args=(key, api_call, kwargs))
+            thread.daemon = True
+            thread.start()
+        return self.listings.get(key)
+
+    def _fetch_listing(self, key, api_call, kwargs):
+        listing = self.api.get(api_call, **kwargs)
+        self.listings.set(key, listing)
+        self.listings.save()
+        return listing
+
+    def _refresh_listing(self, key, api_call, kwargs):
+        try:
+            self._fetch_listing(key, api_call, kwargs)
+        except Exception as e:
+            logger.debug("Could not refresh the {}: {}".format(api_call, e))
 
     def get_organizations(self):
         try:
-            organizations = self.api.get('organizations')
+            organizations = self.get_listing('organizations')
         except Exception as e:
             logger.error(e)
             raise
@@ -96,9 +153,10 @@ class Wizard(object):
             key=lambda x: x[1]
         )
 
-    def get_projects_for_org(self, organization):
+    def get_projects_for_org(self, organization, refresh=False):
         try:
-            projects = self.api.get('projects', organization=organization)
+            projects = self.get_listing('projects', refresh=refresh,
+                                        organization=organization)
         except Exception as e:
             logger.error(e)
             raise
@@ -112,7 +170,8 @@ class Wizard(object):
     def get_formats(self, filename):
         _, extension = os.path.splitext(filename)
         try:
-            formats = self.api.get('formats')
+            formats = get_formats(self.host,
+                                  lambda: self.api.get('formats'))
         except Exception as e:
             logger.error(e)
             raise
@@ -163,7 +222,9 @@ class Wizard(object):
                 retry_message = "Hit Enter to try selecting a project again: "
                 input(utils.color_text(retry_message, COLOR))
 
-            projects = self.get_projects_for_org(org_slug)
+            # Look for any newly created project when trying again
+            projects = self.get_projects_for_org(org_slug,
+                                                 refresh=not first_time)
             p_choices = [(p['slug'], p['name']) for p in projects]
             p_choices.append(create_project)
             if projects: